@@ -0,0 +1,151 @@
+"""
+Buffered audit log pipeline.
+
+Audited writes call `capture`, which only builds a small dict. Events are
+collected once their transaction commits (rolled back writes never log) and
+written with one bulk_create:
+- under AuditLogMiddleware, once the response has been sent
+  (request_finished), so the write never delays the client;
+- at the end of the `buffered()` context manager;
+- as soon as the buffer reaches AUDIT_LOG_BUFFER_SIZE events in either
+  case, so bulk admin operations flush in batches;
+- straight after commit otherwise (shell, management commands, tasks).
+
+With AUDIT_LOG_ASYNC the flush hands the batch to a Celery task on
+`audit_queue` instead, falling back to a direct write if the broker is down.
+Audit failures are logged and never fail the request that triggered them.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+# ==========================================
+# Cheap object descriptions
+# ==========================================
+# str(instance) on most audited models follows foreign keys (course.name,
+# user.email, ...). These read local columns only, so object_repr for these
+# models names related rows by id rather than by name or email.
+
+def _describe_enrollment(instance):
+    return f"user {instance.user_id} - course {instance.course_id} ({instance.status})"
+
+
+def _describe_course_skill(instance):
+    return f"course {instance.course_id} -> skill {instance.skill_id} (weight: {instance.weight})"
+
+
+def _describe_user_skill(instance):
+    return f"user {instance.user_id} - skill {instance.skill_id}: {instance.proficiency}%"
+
+
+def _describe_payment(instance):
+    return f"user {instance.user_id} - course {instance.course_id} - {instance.amount} ({instance.status})"
+
+
+DESCRIBERS = {
+    'Enrollment': _describe_enrollment,
+    'CourseSkill': _describe_course_skill,
+    'UserSkill': _describe_user_skill,
+    'Payment': _describe_payment,
+}
+
+
+def describe(model_name, instance):
+    describer = DESCRIBERS.get(model_name)
+    return (describer(instance) if describer else str(instance))[:255]
+
+
+# ==========================================
+# Buffering
+# ==========================================
+
+def _buffer():
+    if not hasattr(_state, 'events'):
+        _state.events = []
+        _state.depth = 0
+    return _state.events
+
+
+def capture(action, model_name, object_id, object_repr, user_id=None, ip_address=None, details=None):
+    """Queue one audit event; it is kept only if the current transaction commits."""
+    event = {
+        'user_id': user_id,
+        'action': action,
+        'model_name': model_name,
+        'object_id': None if object_id is None else str(object_id),
+        'object_repr': object_repr,
+        'details': details,
+        'ip_address': ip_address,
+        'timestamp': timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: _collect(event))
+
+
+def _collect(event):
+    events = _buffer()
+    events.append(event)
+    if not _state.depth or len(events) >= getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 500):
+        flush()
+
+
+def flush():
+    """Write every collected event, directly or through Celery."""
+    events = _buffer()
+    if not events:
+        return 0
+    _state.events = []
+
+    if getattr(settings, 'AUDIT_LOG_ASYNC', False):
+        from .tasks import write_audit_logs
+        try:
+            write_audit_logs.delay(events)
+            return len(events)
+        except Exception:
+            logger.warning("Audit log queue unavailable; writing %d events directly", len(events))
+
+    try:
+        return write_events(events)
+    except Exception:
+        logger.exception("Dropped %d audit log events", len(events))
+        return 0
+
+
+def write_events(events):
+    """Persist a batch of captured events with one bulk_create."""
+    from .models import AuditLog
+
+    AuditLog.objects.bulk_create(
+        [
+            AuditLog(**{**event, 'timestamp': datetime.fromisoformat(event['timestamp'])})
+            for event in events
+        ],
+        batch_size=getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 500),
+    )
+    return len(events)
+
+
+@contextmanager
+def buffered(flush_on_exit=True):
+    """
+    Collect audit events for the duration of the block and flush once at
+    the end, or leave them for the caller to `flush` when `flush_on_exit`
+    is false.
+    """
+    _buffer()
+    _state.depth += 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if not _state.depth and flush_on_exit:
+            flush()
@@ -1,6 +1,11 @@
 import django_filters
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+from skills.models import UserSkill
 from .models import Role
+from . import search
 
 User = get_user_model()
 
@@ -24,7 +29,32 @@ class UserFilter(django_filters.FilterSet):
     joined_before = django_filters.DateFilter(field_name='date_joined', lookup_expr='lte')
     last_login_after = django_filters.DateTimeFilter(field_name='last_login', lookup_expr='gte')
     last_login_before = django_filters.DateTimeFilter(field_name='last_login', lookup_expr='lte')
-    skills = django_filters.CharFilter(field_name='user_skills__skill__name', lookup_expr='icontains')
+    skills = django_filters.CharFilter(method='filter_skills')
+
+    def filter_skills(self, queryset, name, value):
+        # EXISTS rather than a join: a user with several matching skills is still one row
+        return queryset.filter(Exists(
+            UserSkill.objects.filter(user=OuterRef('pk'), skill__name__icontains=value)
+        ))
+
     class Meta:
         model = User
-        fields = [] 
+        fields = []
+
+
+class UserSearchFilter(SearchFilter):
+    """
+    ?search= over username, email, first and last name (see accounts.search),
+    best match first unless ?ordering= is given, so this backend must come
+    after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        results = search.search(queryset, terms)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return results.order_by(*queryset.query.order_by)
+        return results
+
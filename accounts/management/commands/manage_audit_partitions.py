@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts import partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming audit log partitions and archive partitions past retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.AUDIT_LOG_PARTITIONS_AHEAD,
+            help='Months of partitions to keep created ahead of today.'
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help='Archive months older than this many months (default: keep everything).'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.AUDIT_LOG_ARCHIVE_DIR,
+            help='Directory for the gzipped JSONL exports.'
+        )
+        parser.add_argument(
+            '--export-only',
+            action='store_true',
+            help='Export old partitions but keep them attached.'
+        )
+
+    def handle(self, *args, **options):
+        if partitions.is_partitioned():
+            for name in partitions.ensure_partitions(options['ahead']):
+                self.stdout.write(f"Created partition {name}.")
+        else:
+            self.stdout.write("Audit log is not partitioned on this database; skipping partition creation.")
+
+        retain = options['retain_months']
+        if retain is None:
+            return
+        if retain < 1:
+            raise CommandError('--retain-months must be at least 1')
+
+        cutoff = partitions.add_months(partitions.month_start(timezone.now().date()), -retain)
+        for path, count in partitions.archive_before(cutoff, options['archive_dir'], drop=not options['export_only']):
+            self.stdout.write(f"Archived {count} row(s) to {path}.")
+        self.stdout.write(self.style.SUCCESS(f"Audit log entries before {cutoff:%Y-%m} archived."))
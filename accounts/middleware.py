@@ -0,0 +1,15 @@
+from . import audit
+
+
+class AuditLogMiddleware:
+    """
+    Buffer the audit events of a request and write them with one
+    bulk_create after the response has been sent (see accounts.audit).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit.buffered(flush_on_exit=False):
+            return self.get_response(request)
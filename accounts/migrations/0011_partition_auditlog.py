@@ -0,0 +1,114 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:48
+
+from datetime import date, datetime, timezone
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+TABLE = 'accounts_auditlog'
+LEGACY = 'accounts_auditlog_legacy'
+MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def recreate_keys(schema_editor, cursor, primary_key):
+    """Sequence-backed id, primary key, user FK and FK index on TABLE."""
+    quote = schema_editor.quote_name
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {TABLE}")
+    max_id = cursor.fetchone()[0]
+    cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, %s)", [max(max_id, 1), max_id > 0])
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({primary_key})")
+    fk_name = schema_editor._create_index_name(TABLE, ['user_id'], suffix='_fk_accounts_user_id')
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {quote(fk_name)} FOREIGN KEY (user_id) "
+        f"REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    cursor.execute(
+        f"CREATE INDEX {quote(schema_editor._create_index_name(TABLE, ['user_id']))} ON {TABLE} (user_id)"
+    )
+
+
+def partition_auditlog(apps, schema_editor):
+    """
+    Rebuild accounts_auditlog as a table range-partitioned by month on
+    timestamp, with a DEFAULT partition for out-of-range rows. The primary
+    key becomes (id, timestamp), as PostgreSQL requires the partition key in
+    it. Other databases keep the plain table.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp") FROM {TABLE}')
+        first = cursor.fetchone()[0] or datetime.now(timezone.utc)
+        first_month = date(first.year, first.month, 1)
+        today = datetime.now(timezone.utc).date()
+        last_month = add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS) "
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        month = first_month
+        while month <= last_month:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [bound(month), bound(add_months(month, 1))]
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY}")
+        cursor.execute(f"DROP TABLE {LEGACY}")
+        recreate_keys(schema_editor, cursor, 'id, "timestamp"')
+
+
+def unpartition_auditlog(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+        cursor.execute(f"CREATE TABLE {TABLE} (LIKE {LEGACY})")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY}")
+        cursor.execute(f"DROP TABLE {LEGACY} CASCADE")
+        recreate_keys(schema_editor, cursor, 'id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_alter_auditlog_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_auditlog, unpartition_auditlog),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='auditlog_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', '-timestamp'], name='auditlog_action_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(django.db.models.functions.text.Upper('model_name'), models.OrderBy(models.F('timestamp'), descending=True), name='auditlog_model_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', '-timestamp'], name='auditlog_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_partition_auditlog'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['tenant', '-date_joined', '-id'], name='user_tenant_joined_idx'),
+        ),
+    ]
@@ -1,10 +1,13 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager, Permission
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache
-from django.conf import settings
 # Create your models here.
 from tenants.models import Tenant
+from .permission_cache import bump_user_auth_versions, get_role_permissions
 
 
 class Role(models.Model):
@@ -28,7 +31,44 @@ class Role(models.Model):
         """Check if this role has a specific permission by codename."""
         return self.permissions.filter(codename=codename).exists()
 
-class UserManager(BaseUserManager):
+class PermissionContext:
+    """
+    Role name and permission codenames of an authenticated user, resolved
+    once per request. `lookups` counts the Redis/DB round trips spent
+    resolving it (0 for Super Admins or when served in-process).
+    """
+    __slots__ = ('role_name', 'codenames', 'lookups')
+
+    def __init__(self, role_name, codenames, lookups=0):
+        self.role_name = role_name
+        self.codenames = codenames
+        self.lookups = lookups
+
+    def __repr__(self):
+        return f"<PermissionContext {self.role_name} ({len(self.codenames)} perms, {self.lookups} lookups)>"
+
+
+# User fields carried by token claims (see tenants.authentication)
+AUTH_FIELDS = ('role_id', 'tenant_id', 'is_active', 'is_staff', 'is_superuser', 'email', 'username')
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """
+        Queryset updates send no post_save, so revoke the outstanding tokens
+        of the matched users here when a claimed field changes.
+        """
+        claimed = {name.removesuffix('_id') for name in AUTH_FIELDS}
+        if not claimed.intersection(name.removesuffix('_id') for name in kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        bump_user_auth_versions(user_ids)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
 
     def create_user(self, email, username, password=None, **extra_fields):
         if not email:
@@ -88,49 +128,96 @@ class User(AbstractBaseUser, PermissionsMixin):
         related_name='users'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', '-date_joined', '-id'], name='user_tenant_joined_idx'),
+            # Directory search and autocomplete (see accounts.search)
+            GinIndex(
+                OpClass(Upper('username'), name='gin_trgm_ops'),
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                OpClass(Upper('first_name'), name='gin_trgm_ops'),
+                OpClass(Upper('last_name'), name='gin_trgm_ops'),
+                name='user_search_trgm_idx',
+            ),
+        ]
+
     @property
     def role_name(self):
-        print(self.role.name)
-        return self.role.name if self.role else ''
+        context = self.__dict__.get('_permission_context')
+        if context is not None:
+            return context.role_name
+        return self.role.name if self.role_id else ''
+
+    @property
+    def permission_context(self):
+        """Role name and codenames, resolved on first use and then memoized."""
+        context = self.__dict__.get('_permission_context')
+        if context is None:
+            context = self.resolve_permission_context()
+        return context
+
+    def resolve_permission_context(self):
+        """
+        Resolve role name and permission codenames for this user in one pass.
+        Called once per request by TenantAwareJWTAuthentication; every later
+        role_name / has_role_perm call on this instance reads the result.
+        Codenames come from the role-keyed cache (see accounts.permission_cache).
+        """
+        lookups = 0
+        role_name = self.role.name if self.role_id else ''
+        codenames = frozenset()
+
+        # Super Admins bypass all checks, so their codenames are never needed
+        if role_name and role_name != 'SUPER_ADMIN':
+            _, codenames, lookups = get_role_permissions(self.role)
+
+        self._permission_context = PermissionContext(role_name, codenames, lookups)
+        return self._permission_context
 
     def has_role_perm(self, codename):
         """Check if user's role grants a specific permission codename.
         Super Admins bypass all checks.
-        Uses Redis cache to avoid repeated DB queries.
         """
-        if not self.role:
+        context = self.permission_context
+        if not context.role_name:
             return False
-        if self.role.name == 'SUPER_ADMIN':
+        if context.role_name == 'SUPER_ADMIN':
             return True
-        
-        cache_key = f'user_perms_{self.id}'
-        cached_perms = cache.get(cache_key)
-        
-        if cached_perms is None:
-            # Cache miss — fetch from DB and store in Redis
-            cached_perms = list(
-                self.role.permissions.values_list('codename', flat=True)
-            )
-            cache.set(
-                cache_key,
-                cached_perms,
-                timeout=getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600)
-            )
-        
-        return codename in cached_perms
+        return codename in context.codenames
 
     def invalidate_permissions_cache(self):
-        """Clear cached permissions for this user."""
-        cache.delete(f'user_perms_{self.id}')
+        """Forget the permissions memoized on this instance."""
+        self.__dict__.pop('_permission_context', None)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username'] 
 
+    # True for users built from JWT claims (see TenantAwareJWTAuthentication)
+    is_stateless = False
+
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Users loaded with a claimed field deferred are treated as changed
+        if all(name in field_names for name in AUTH_FIELDS):
+            instance._loaded_auth_state = instance.auth_state
+        return instance
+
+    @property
+    def auth_state(self):
+        """Fields baked into token claims; changing any makes tokens stale."""
+        return tuple(self.__dict__.get(name) for name in AUTH_FIELDS)
+
+    def save(self, *args, **kwargs):
+        if self.is_stateless:
+            raise RuntimeError("Users built from token claims are read-only; load the user from the database to save it.")
+        super().save(*args, **kwargs)
+
     @property
     def get_skills(self):
         return self.user_skills.all()
@@ -156,10 +243,20 @@ class AuditLog(models.Model):
     object_repr = models.CharField(max_length=255, blank=True)
     details = models.JSONField(null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is captured, not when the buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
+        # On PostgreSQL the table is range-partitioned by month on timestamp
+        # (see accounts.partitions); these indexes exist on every partition.
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_ts_id_idx'),
+            models.Index(fields=['action', '-timestamp'], name='auditlog_action_ts_idx'),
+            # Matches model_name__iexact, which compares UPPER(model_name)
+            models.Index(Upper('model_name'), F('timestamp').desc(), name='auditlog_model_ts_idx'),
+            models.Index(fields=['user', '-timestamp'], name='auditlog_user_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.action} - {self.model_name} - {self.timestamp}"
@@ -0,0 +1,9 @@
+from courses.pagination import KeysetPagination
+
+class AuditLogCursorPagination(KeysetPagination):
+    """
+    Keyset pagination over (timestamp, id): every page is an index range
+    scan, so deep pages cost the same as the first one.
+    """
+    page_size = 50
+    max_page_size = 200
@@ -0,0 +1,183 @@
+"""
+Monthly partitions and retention for the audit log.
+
+On PostgreSQL, accounts_auditlog is range-partitioned by month on
+`timestamp` (migration 0011) and rows outside every monthly range land in
+the DEFAULT partition. `ensure_partitions` keeps partitions created ahead of
+time; `archive_before` exports months past retention to gzipped JSON
+Lines, then detaches and drops them, which is far cheaper than DELETE.
+
+Other databases keep a plain table; there, archiving exports and deletes
+the old rows instead.
+"""
+import gzip
+import json
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+TABLE = AuditLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME = re.compile(rf'^{TABLE}_(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Return {month: partition table name} for the attached monthly partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+            [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month):
+    """
+    Create and attach the partition for `month`, first moving any of its
+    rows out of the DEFAULT partition (attaching fails while they are there).
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *'
+            f') INSERT INTO {name} SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+    return name
+
+
+def ensure_partitions(months_ahead=3):
+    """Create missing partitions from the current month to `months_ahead` months out."""
+    existing = list_partitions()
+    current = month_start(timezone.now().date())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(month))
+    return created
+
+
+def _export(lines, path):
+    """Write an iterable of JSON documents to a gzipped JSON Lines file."""
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as archive:
+        for line in lines:
+            archive.write(line)
+            archive.write('\n')
+            count += 1
+    return count
+
+
+def _export_query(sql, params, path):
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        return _export((row[0] for row in cursor), path)
+
+
+def archive_before(cutoff, archive_dir, drop=True):
+    """
+    Export and remove audit rows older than the month containing `cutoff`.
+    With `drop` false the rows are exported only and stay in place.
+    Returns a list of (archive path, row count).
+    """
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    cutoff_month = month_start(cutoff)
+
+    if not is_partitioned():
+        old = AuditLog.objects.filter(timestamp__lt=_bound(cutoff_month))
+        path = archive_dir / f'{TABLE}_before_{cutoff_month:%Y_%m}.jsonl.gz'
+        with transaction.atomic():
+            rows = old.order_by('timestamp').values().iterator()
+            count = _export((json.dumps(row, cls=DjangoJSONEncoder) for row in rows), path)
+            if drop:
+                old.delete()
+        return [(path, count)]
+
+    archived = []
+    for month, name in sorted(list_partitions().items()):
+        if month >= cutoff_month:
+            continue
+        path = archive_dir / f'{name}.jsonl.gz'
+        # The export reads the attached partition and the detach only runs
+        # once it has succeeded, in the same transaction: a failure leaves
+        # every row where it was. The lock keeps late writes out of the
+        # month until it is gone.
+        with transaction.atomic():
+            if drop:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {name} IN SHARE MODE')
+            count = _export_query(f'SELECT row_to_json(t)::text FROM {name} t ORDER BY "timestamp"', [], path)
+            if drop:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+                    cursor.execute(f'DROP TABLE {name}')
+        archived.append((path, count))
+
+    # Stragglers in the DEFAULT partition are archived row by row
+    cutoff_bound = _bound(cutoff_month)
+    path = archive_dir / f'{DEFAULT_PARTITION}_before_{cutoff_month:%Y_%m}.jsonl.gz'
+    with transaction.atomic():
+        count = _export_query(
+            f'SELECT row_to_json(t)::text FROM {DEFAULT_PARTITION} t WHERE "timestamp" < %s ORDER BY "timestamp"',
+            [cutoff_bound], path
+        )
+        if drop and count:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" < %s', [cutoff_bound])
+    if count:
+        archived.append((path, count))
+    else:
+        path.unlink()
+    return archived
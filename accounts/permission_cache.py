@@ -0,0 +1,152 @@
+"""
+Role-keyed permission cache.
+
+Permission codenames are cached once per role, not once per user, under a
+Redis key that embeds the role's version number. Editing a role bumps that
+version with a single INCR no matter how many users hold the role; entries
+for old versions are never read again and expire on their own.
+
+A small in-process LRU with a short TTL sits in front of Redis so hot
+permission checks never leave the worker. Other workers pick up a role edit
+within PERMISSION_LOCAL_CACHE_TIMEOUT seconds.
+
+Each user also has an auth version, stamped into their tokens and bumped
+when the fields their token claims carry change, so one user's outstanding
+tokens can be revoked without touching anyone else holding the role.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from observability.metrics import record_cache
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded in-process cache with per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(getattr(settings, 'PERMISSION_LOCAL_CACHE_SIZE', 256))
+
+
+def _version_key(role_id):
+    return f'role_perms_version_{role_id}'
+
+
+def _perms_key(role_id, version):
+    return f'role_perms_{role_id}_v{version}'
+
+
+def get_role_version(role_id):
+    """Return (version, redis_lookups) for a role."""
+    key = _version_key(role_id)
+    version = cache.get(key)
+    if version is not None:
+        return version, 1
+    # Seed from the clock so an evicted counter never reuses an old version
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key), 3
+
+
+def bump_role_version(role_id):
+    """Invalidate a role's cached permissions for every user holding it."""
+    key = _version_key(role_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+    local_cache.delete(role_id)
+
+
+def _user_version_key(user_id):
+    return f'user_auth_version_{user_id}'
+
+
+def get_user_auth_version(user_id):
+    """Return the auth version tokens issued now for `user_id` carry."""
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key)
+
+
+def bump_user_auth_versions(user_ids):
+    """Make the outstanding tokens of `user_ids` fall back to the DB."""
+    for user_id in user_ids:
+        key = _user_version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def get_role_permissions(role):
+    """
+    Return (version, frozenset of codenames, lookups) for `role`, where
+    `lookups` counts Redis/DB round trips (0 when served in-process).
+    """
+    local = local_cache.get(role.id)
+    record_cache('permission_local', local is not None)
+    if local is not None:
+        version, codenames = local
+        return version, codenames, 0
+
+    version, lookups = get_role_version(role.id)
+    perms_key = _perms_key(role.id, version)
+    cached_perms = cache.get(perms_key)
+    lookups += 1
+    record_cache('permission', cached_perms is not None)
+
+    if cached_perms is None:
+        # Cache miss — fetch from DB and store in Redis
+        cached_perms = list(role.permissions.values_list('codename', flat=True))
+        cache.set(
+            perms_key,
+            cached_perms,
+            timeout=getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600)
+        )
+        lookups += 2
+
+    codenames = frozenset(cached_perms)
+    local_cache.set(
+        role.id,
+        (version, codenames),
+        timeout=getattr(settings, 'PERMISSION_LOCAL_CACHE_TIMEOUT', 5)
+    )
+    return version, codenames, lookups
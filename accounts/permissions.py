@@ -45,17 +45,18 @@ class RolePermission(permissions.BasePermission):
             'partial_update': f'change_{model_name}',
             'destroy': f'delete_{model_name}',
         }
+        # Custom actions opt in with e.g. action_permissions = {'add_courses': 'change'}
+        for custom_action, permission in getattr(view, 'action_permissions', {}).items():
+            action_map[custom_action] = f'{permission}_{model_name}'
         return action_map.get(action)
 
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        print("authenticated")
 
         # Super Admin bypasses all permission checks
         if request.user.role_name == 'SUPER_ADMIN':
             return True
-        print ("not matched for issuper")
         # Safe methods (GET, HEAD, OPTIONS) — check view permission
         # Unsafe methods — check the specific action permission
         action = getattr(view, 'action', None)
@@ -103,6 +104,7 @@ class ManageUser(permissions.BasePermission):
         action = getattr(view, 'action', None)
         action_map = {
             'list': 'view_user',
+            'autocomplete': 'view_user',
             'create': 'add_user',
             'update': 'change_user',
             'partial_update': 'change_user',
@@ -0,0 +1,63 @@
+"""
+User directory search.
+
+username, email, first_name and last_name share one multi-column pg_trgm
+GIN index over UPPER(field), the expression Django's case-insensitive
+lookups compare, so substring, prefix and word-similarity matches on any
+of them are index scans. Search terms are split into words and every word
+has to match at least one field, so "jane smi" finds Jane Smith and typos
+within the similarity threshold still match. Results are ranked by how
+closely the words match, summed over the words.
+"""
+from functools import reduce
+from operator import add, and_, or_
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest, Upper
+from django.db.models.lookups import Contains, StartsWith
+
+FIELDS = ('username', 'email', 'first_name', 'last_name')
+MAX_WORDS = 5
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+AUTOCOMPLETE_MIN_LENGTH = 2
+
+
+def _any_field(word, *lookups):
+    """`word` matches at least one field with at least one of `lookups`."""
+    return reduce(or_, [Q(lookup(Upper(field), word.upper())) for field in FIELDS for lookup in lookups])
+
+
+def _rank(words):
+    return reduce(add, [Greatest(*[TrigramWordSimilarity(word, field) for field in FIELDS]) for word in words])
+
+
+def search(queryset, words):
+    """
+    Users of `queryset` matching every word, as a substring or a close
+    trigram match, best match first with search_rank annotated. The
+    queryset's own ordering breaks ties.
+    """
+    words = list(words)[:MAX_WORDS]
+    return queryset.filter(
+        reduce(and_, [_any_field(word, Contains, TrigramWordSimilar) for word in words])
+    ).annotate(
+        search_rank=_rank(words),
+    ).order_by('-search_rank', *queryset.query.order_by)
+
+
+def autocomplete(queryset, words, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Up to `limit` users with a field starting with every word, as dicts of
+    the searched fields. Prefix matches only, and no count or related rows,
+    so the lookup stays a single index scan plus `limit` row fetches.
+    """
+    words = list(words)[:MAX_WORDS]
+    return list(
+        queryset.filter(reduce(and_, [_any_field(word, StartsWith) for word in words]))
+        .annotate(search_rank=_rank(words))
+        .order_by('-search_rank', 'username')
+        .values('id', *FIELDS)[:limit]
+    )
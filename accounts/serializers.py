@@ -14,6 +14,10 @@ from django.utils.encoding import force_bytes, force_str
 from django.conf import settings
 from .tasks import send_invitation_email
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from tenants.authentication import add_tenant_claims
 
 class PermissionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -64,6 +68,14 @@ class UserSerializer(serializers.ModelSerializer):
             'tenant'
             ] 
 
+class UserAutocompleteSerializer(serializers.Serializer):
+    """Rows of accounts.search.autocomplete(), which are dicts."""
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    email = serializers.EmailField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     tenant = serializers.SlugRelatedField(
@@ -105,12 +117,12 @@ class UserCreateSerializer(serializers.ModelSerializer):
             return value
 
         # No one without a role can assign roles
-        if not user.role:
+        if not user.role_name:
             raise serializers.ValidationError("You do not have permission to assign roles.")
 
         # Prevent privilege escalation:
         # The target role's permissions must be a SUBSET of the assigner's role permissions
-        assigner_perms = set(user.role.permissions.values_list('codename', flat=True))
+        assigner_perms = user.permission_context.codenames
         target_perms = set(value.permissions.values_list('codename', flat=True))
 
         if not target_perms.issubset(assigner_perms):
@@ -333,4 +345,30 @@ class ActivateUserSerializer(serializers.Serializer):
     message = serializers.CharField(read_only=True)
 
 class LogoutSerializer(serializers.Serializer):
-    refresh = serializers.CharField(required=True)
\ No newline at end of file
+    refresh = serializers.CharField(required=True)
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login serializer that stamps tenant/role claims onto the tokens."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        return add_tenant_claims(token, user)
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-stamps the claims of each refreshed access token, so a token made
+    stale by a role edit recovers stateless reads on its next refresh.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.select_related('role', 'tenant').filter(
+            **{api_settings.USER_ID_FIELD: access.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is not None:
+            data['access'] = str(add_tenant_claims(access, user))
+        return data
@@ -1,3 +1,4 @@
+from django.core.signals import request_finished
 from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in, user_logged_out
@@ -6,15 +7,18 @@ from tenants.models import Tenant
 from courses.models import Course, Module, SubModule
 from catalogues.models import Catalogue
 from skills.models import Skill, CourseSkill, UserSkill
-from enrollments.models import Enrollment
+from enrollments.models import Enrollment, SubModuleProgress
 from payments.models import Payment
 import threading
 from django.dispatch import receiver
 from django.urls import reverse
 from .tasks import send_password_reset_email
 from .models import Role
+from .permission_cache import bump_role_version, bump_user_auth_versions
+from . import audit
 from django_rest_passwordreset.signals import reset_password_token_created
 from django.db.models import Q
+from courses import cache as course_cache
 
 def get_client_ip(request):
     if request is None:
@@ -51,12 +55,13 @@ def create_audit_log(action, model_name, instance, user=None):
     request = get_current_request()
     ip_address = get_client_ip(request) if request else None
     
-    AuditLog.objects.create(
-        user=user,
+    # Buffered and bulk-written after commit (see accounts.audit)
+    audit.capture(
         action=action,
         model_name=model_name,
-        object_id=str(instance.pk),
-        object_repr=str(instance),
+        object_id=instance.pk,
+        object_repr=audit.describe(model_name, instance),
+        user_id=user.pk if user else None,
         ip_address=ip_address
     )
 
@@ -64,28 +69,34 @@ def create_audit_log(action, model_name, instance, user=None):
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     if user.role_name in ['SUPER_ADMIN', 'TENANT_ADMIN']:
-        AuditLog.objects.create(
-            user=user,
+        audit.capture(
             action=AuditLog.Action.LOGIN,
             model_name='User',
-            object_id=str(user.pk),
+            object_id=user.pk,
             object_repr=str(user),
+            user_id=user.pk,
             ip_address=get_client_ip(request)
         )
 
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
     if user and user.role_name in ['SUPER_ADMIN', 'TENANT_ADMIN']:
-        AuditLog.objects.create(
-            user=user,
+        audit.capture(
             action=AuditLog.Action.LOGOUT,
             model_name='User',
-            object_id=str(user.pk),
+            object_id=user.pk,
             object_repr=str(user),
+            user_id=user.pk,
             ip_address=get_client_ip(request)
         )
 
 
+@receiver(request_finished)
+def flush_request_audit_log(sender, **kwargs):
+    # AuditLogMiddleware leaves a request's events for after the response
+    audit.flush()
+
+
 # Model signals for key models
 AUDITED_MODELS = [
     # Core
@@ -155,23 +166,105 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
 
 
 @receiver(m2m_changed, sender=Role.permissions.through)
-def invalidate_role_permissions_cache(sender, instance, action, **kwargs):
-    """When a Role's permissions change, invalidate cache for ALL users with that role."""
-    if action in ('post_add', 'post_remove', 'post_clear'):
-        for user in instance.users.all():
-            user.invalidate_permissions_cache()
+def invalidate_role_permissions_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """When a Role's permissions change, bump that role's cache version once."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_role_version(instance.pk)
+        return
+    # permission.roles.add(...) / .clear(): instance is the Permission
+    role_ids = pk_set if pk_set is not None else Role.objects.values_list('pk', flat=True)
+    for role_id in role_ids:
+        bump_role_version(role_id)
+
+
+@receiver(post_delete, sender=Role)
+def invalidate_deleted_role_cache(sender, instance, **kwargs):
+    bump_role_version(instance.pk)
 
 
 @receiver(post_save, sender=User)
 def invalidate_user_role_cache(sender, instance, **kwargs):
-    """When a User's role changes, invalidate their permission cache."""
+    """When a User's role changes, drop the permissions memoized on the instance."""
     if kwargs.get('update_fields') is None or 'role' in (kwargs.get('update_fields') or []):
         instance.invalidate_permissions_cache()
 
 
-@receiver(post_save,sender=Course)
-def invalidate_course_cache(sender,instance,**kwargs):
-    """When a Course is created or updated, invalidate the course cache."""
-    tenant_id = instance.tenant.id 
-    cache.delete_pattern(f"course_list_{tenant_id}_*")
-    cache.delete_pattern(f"course_list_system_*")
+@receiver(post_save, sender=User)
+def invalidate_stale_token_claims(sender, instance, created, **kwargs):
+    """
+    Tokens carry the user's claimed fields stamped with their auth version.
+    When any of them changes (or the loaded values are unknown), bump that
+    user's version so their outstanding tokens fall back to a DB lookup
+    instead of trusting stale claims. Queryset updates are handled by
+    UserQuerySet.update.
+    """
+    loaded = getattr(instance, '_loaded_auth_state', None)
+    current = instance.auth_state
+    if not created and loaded != current:
+        bump_user_auth_versions([instance.pk])
+    instance._loaded_auth_state = current
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    bump_user_auth_versions([instance.pk])
+
+
+# ==========================================
+# Course List Cache Invalidation Signals
+# ==========================================
+# Bumps generation counters (see courses.cache) instead of deleting keys.
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=SubModule)
+@receiver(post_delete, sender=SubModule)
+def invalidate_course_cache(sender, instance, **kwargs):
+    """Course structure changed: invalidate the tenant's course lists."""
+    course_cache.bump_tenant(instance.tenant_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=SubModule)
+@receiver(post_delete, sender=SubModule)
+def invalidate_course_tree(sender, instance, **kwargs):
+    """Outline changed: invalidate that course's tree."""
+    if sender is Course:
+        course_id = instance.pk
+    elif sender is Module:
+        course_id = instance.course_id
+    elif SubModule.module.is_cached(instance):
+        course_id = instance.module.course_id
+    else:
+        course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        course_cache.bump_course(course_id)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_course_cache(sender, instance, created=False, **kwargs):
+    """New or removed enrollments change total_enrollments for the tenant."""
+    if created or kwargs.get('signal') is post_delete:
+        course_cache.bump_tenant(instance.tenant_id)
+    course_cache.bump_user(instance.user_id)
+
+
+@receiver(post_save, sender=SubModuleProgress)
+@receiver(post_delete, sender=SubModuleProgress)
+def invalidate_progress_course_cache(sender, instance, **kwargs):
+    """Progress only affects the learner's own overlay."""
+    if SubModuleProgress.enrollment.is_cached(instance):
+        user_id = instance.enrollment.user_id
+    else:
+        user_id = Enrollment.objects.filter(pk=instance.enrollment_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        course_cache.bump_user(user_id)
@@ -6,6 +6,7 @@ from datetime import datetime
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.core.management import call_command
 
 @shared_task
 def print_every_minute():
@@ -140,3 +141,22 @@ def send_password_reset_email(user_email, context):
     msg.send()
     
     return f"Password reset email sent to {user_email}"
+
+
+@shared_task(queue="audit_queue")
+def write_audit_logs(events):
+    """
+    Task to persist a batch of buffered audit events.
+    """
+    from .audit import write_events
+
+    return f"Wrote {write_events(events)} audit log entries"
+
+
+@shared_task(queue="default_queue")
+def maintain_audit_partitions():
+    """
+    Task to create upcoming audit log partitions and apply retention.
+    """
+    call_command('manage_audit_partitions')
+    return "Audit log partitions maintained"
@@ -0,0 +1,39 @@
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from accounts import audit
+from accounts.middleware import AuditLogMiddleware
+from accounts.models import AuditLog
+
+
+class AuditLogMiddlewareTests(TestCase):
+
+    def capture(self, request):
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                audit.capture(AuditLog.Action.UPDATE, 'Course', index, f'Course {index}')
+        self.assertFalse(AuditLog.objects.exists())
+        return HttpResponse()
+
+    def test_events_are_written_after_the_response(self):
+        response = AuditLogMiddleware(self.capture)(RequestFactory().post('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AuditLog.objects.exists())
+
+        # As the test client does, keep the test's connection open
+        request_finished.disconnect(close_old_connections)
+        try:
+            request_finished.send(sender=self.__class__)
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('object_repr', flat=True)),
+            ['Course 0', 'Course 1', 'Course 2'],
+        )
+
+    def test_events_outside_a_request_are_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.capture(AuditLog.Action.DELETE, 'Course', 1, 'Course 1')
+        self.assertEqual(AuditLog.objects.count(), 1)
@@ -0,0 +1,64 @@
+import gzip
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from accounts import partitions
+from accounts.models import AuditLog
+
+OLD_MONTH = date(2020, 1, 1)
+CUTOFF = date(2020, 2, 1)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        if not partitions.is_partitioned():
+            self.skipTest('The audit log is only partitioned on PostgreSQL')
+        self.name = partitions.create_partition(OLD_MONTH)
+        for day in (3, 4):
+            AuditLog.objects.create(
+                action=AuditLog.Action.LOGIN, model_name='User',
+                timestamp=datetime(2020, 1, day, tzinfo=dt_timezone.utc),
+            )
+        # Rows committed before an archive run have no deferred FK checks
+        # left; in the test transaction they would block the DROP
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+
+    def old_rows(self):
+        return AuditLog.objects.filter(timestamp__lt=datetime(2020, 2, 1, tzinfo=dt_timezone.utc)).count()
+
+    def archived_lines(self, path):
+        with gzip.open(path, 'rt') as archive:
+            return archive.read().splitlines()
+
+    def test_export_only_keeps_the_partition_attached(self):
+        [(path, count)] = partitions.archive_before(CUTOFF, self.archive_dir, drop=False)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(self.archived_lines(path)), 2)
+        self.assertEqual(partitions.list_partitions().get(OLD_MONTH), self.name)
+        self.assertEqual(self.old_rows(), 2)
+
+    def test_drop_removes_the_partition_after_the_export(self):
+        [(path, count)] = partitions.archive_before(CUTOFF, self.archive_dir)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(self.archived_lines(path)), 2)
+        self.assertNotIn(OLD_MONTH, partitions.list_partitions())
+        self.assertEqual(self.old_rows(), 0)
+
+    def test_failed_export_leaves_the_rows_in_place(self):
+        with mock.patch.object(partitions, '_export_query', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                partitions.archive_before(CUTOFF, self.archive_dir)
+
+        self.assertEqual(partitions.list_partitions().get(OLD_MONTH), self.name)
+        self.assertEqual(self.old_rows(), 2)
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts import permission_cache, search
+from accounts.models import Role, User
+from accounts.serializers import TenantTokenObtainPairSerializer
+from benchmarks.fixtures import seed_role_permissions
+from tenants.models import Tenant
+
+
+def make_user(tenant, username, first_name='', last_name='', role='TENANT_USER'):
+    return User.objects.create_user(
+        f'{username}@example.test', username, 'pass', first_name=first_name, last_name=last_name,
+        tenant=tenant, role=Role.objects.get(name=role), is_active=True,
+    )
+
+
+class UserSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_role_permissions()
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.jane = make_user(cls.tenant, 'jsmith', 'Jane', 'Smith')
+        cls.john = make_user(cls.tenant, 'jdoe', 'John', 'Doe')
+        cls.janet = make_user(cls.tenant, 'janet', 'Janet', 'Smithers')
+        cls.admin = make_user(cls.tenant, 'admin', 'Ada', 'Admin', role='TENANT_ADMIN')
+        make_user(Tenant.objects.create(name='Globex'), 'jane2', 'Jane', 'Smith')
+
+    def setUp(self):
+        cache.clear()
+        permission_cache.local_cache.clear()
+        self.client = APIClient()
+        token = TenantTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def found(self, *words):
+        return [user.username for user in search.search(User.objects.filter(tenant=self.tenant), words)]
+
+    def test_every_word_has_to_match_a_field(self):
+        # "jane" is a substring of Janet too; the closer match ranks first
+        self.assertEqual(self.found('jane', 'smi'), ['jsmith', 'janet'])
+        self.assertEqual(self.found('john', 'smi'), [])
+        self.assertEqual(self.found('example.test', 'doe'), ['jdoe'])
+
+    def test_close_typos_match(self):
+        self.assertIn('jsmith', self.found('smiths'))
+        self.assertNotIn('jdoe', self.found('smiths'))
+
+    def test_autocomplete_matches_prefixes_only(self):
+        rows = search.autocomplete(User.objects.filter(tenant=self.tenant), ['jan'])
+        self.assertEqual({row['username'] for row in rows}, {'jsmith', 'janet'})
+        self.assertEqual(set(rows[0]), {'id', *search.FIELDS})
+        self.assertEqual(search.autocomplete(User.objects.filter(tenant=self.tenant), ['mith']), [])
+
+    def test_search_endpoint_is_scoped_to_the_tenant(self):
+        response = self.client.get('/api/users/', {'search': 'jane smith', 'page_size': 50})
+        self.assertEqual([row['username'] for row in response.data['results']], ['jsmith', 'janet'])
+
+    def test_autocomplete_endpoint(self):
+        response = self.client.get('/api/users/autocomplete/', {'q': 'jo', 'limit': 5})
+        self.assertEqual([row['username'] for row in response.data], ['jdoe'])
+        self.assertEqual(self.client.get('/api/users/autocomplete/', {'q': 'j'}).data, [])
@@ -8,13 +8,14 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework.exceptions import ValidationError
 from rest_framework.throttling import ScopedRateThrottle
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from .serializers import( UserSerializer, 
                             UserCreateSerializer, 
@@ -23,19 +24,22 @@ from .serializers import( UserSerializer,
                             PermissionSerializer, 
                             LogoutSerializer,
                             ChangePasswordSerializer,
-                            ActivateUserSerializer
+                            ActivateUserSerializer,
+                            UserAutocompleteSerializer
                         #  PasswordResetRequestSerializer,
                         #  PasswordResetConfirmSerializer
                         )
 from .tasks import send_password_reset_email
 from .models import AuditLog, Role
 from .permissions import ManageUser, IsSuperAdmin
-from .filters import UserFilter
+from .pagination import AuditLogCursorPagination
+from .filters import UserFilter, UserSearchFilter
+from . import search
 from tenants.models import Tenant
 from courses.models import Course
 from enrollments.models import Enrollment
 from payments.models import Payment
-from payments.models import Payment
+from analytics import reports
 from django.contrib.auth.models import Permission
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.encoding import force_str, force_bytes
@@ -51,7 +55,7 @@ class PermissionViewSet(viewsets.ModelViewSet):
 
 class RoleViewSet(viewsets.ModelViewSet):
     """CRUD for roles — Super Admins only."""
-    queryset = Role.objects.all()
+    queryset = Role.objects.prefetch_related('permissions')
     serializer_class = RoleSerializer
     permission_classes = [IsSuperAdmin]
     lookup_field = 'name'
@@ -62,9 +66,9 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [ManageUser]
     lookup_field = 'username'
     
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?search= is ranked trigram search over accounts.search.FIELDS
+    filter_backends = [DjangoFilterBackend, OrderingFilter, UserSearchFilter]
     filterset_class = UserFilter
-    search_fields = ['email', 'username', 'first_name', 'last_name']
     ordering_fields = ['date_joined','last_login']
     ordering = ['-date_joined']
 
@@ -85,14 +89,52 @@ class UserViewSet(viewsets.ModelViewSet):
 
         return queryset.select_related('role','tenant').prefetch_related('user_skills__skill')
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', str, description='Prefix of a username, email, first or last name; at least 2 characters.'),
+            OpenApiParameter('limit', int, description=f'At most {search.AUTOCOMPLETE_MAX_LIMIT} (default {search.AUTOCOMPLETE_LIMIT}).'),
+        ],
+        responses={200: UserAutocompleteSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Users with a field starting with every word of ?q=, best match first.
+        Unpaginated and unfiltered by the other query parameters.
+        """
+        words = request.query_params.get('q', '').split()
+        if sum(len(word) for word in words) < search.AUTOCOMPLETE_MIN_LENGTH:
+            return Response([])
+        try:
+            limit = int(request.query_params.get('limit', search.AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        limit = max(1, min(limit, search.AUTOCOMPLETE_MAX_LIMIT))
+        users = search.autocomplete(self.get_queryset().prefetch_related(None), words, limit)
+        return Response(UserAutocompleteSerializer(users, many=True).data)
+
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsSuperAdmin]
+    pagination_class = AuditLogCursorPagination
+    keyset_ordering = ['-timestamp', '-id']
 
     def get_queryset(self):
-        queryset = AuditLog.objects.all()
+        queryset = AuditLog.objects.select_related('user')
+
+        # Filter by date range (YYYY-MM-DD); lets PostgreSQL skip partitions
+        for param, lookup, end_of_day in (('start', 'timestamp__gte', False), ('end', 'timestamp__lt', True)):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    day = datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise ValidationError({param: 'Must be a date in YYYY-MM-DD format.'})
+                if end_of_day:
+                    day += timedelta(days=1)
+                queryset = queryset.filter(**{lookup: timezone.make_aware(day)})
         
         # Filter by action type
         action = self.request.query_params.get('action')
@@ -113,67 +155,37 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class PlatformMetricsView(APIView):
+    """
+    Platform metrics served from the daily rollup tables (see analytics).
+
+    Optional query params:
+    - start / end: YYYY-MM-DD, adds flow totals for that date range
+    - interval: day, week or month, adds a time series (within start/end)
+    """
     permission_classes = [IsSuperAdmin]
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = 'metrics'
 
     def get(self, request):
-        now = timezone.now()
-        last_7_days = now - timedelta(days=7)
-        last_30_days = now - timedelta(days=30)
-
-        # User metrics
-        total_users = User.objects.count()
-        active_users_7d = User.objects.filter(last_login__gte=last_7_days).count()
-        users_by_role = User.objects.values('role__name').annotate(count=Count('id'))
-
-        # Tenant metrics
-        total_tenants = Tenant.objects.count()
-        active_tenants = Tenant.objects.filter(is_active=True).count()
-
-        # Course metrics
-        total_courses = Course.objects.count()
-        published_courses = Course.objects.filter(status='PUBLISHED').count()
-
-        # Enrollment metrics
-        total_enrollments = Enrollment.objects.count()
-        enrollments_30d = Enrollment.objects.filter(enrolled_at__gte=last_30_days).count()
-        completed_enrollments = Enrollment.objects.filter(status='COMPLETED').count()
-
-        # Payment metrics
-        total_payments = Payment.objects.count()
-        completed_payments = Payment.objects.filter(status='COMPLETED')
-        total_revenue = completed_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-        revenue_30d = completed_payments.filter(
-            completed_at__gte=last_30_days
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        return Response({
-            'users': {
-                'total': total_users,
-                'active_last_7_days': active_users_7d,
-                'by_role': list(users_by_role),
-            },
-            'tenants': {
-                'total': total_tenants,
-                'active': active_tenants,
-            },
-            'courses': {
-                'total': total_courses,
-                'published': published_courses,
-            },
-            'enrollments': {
-                'total': total_enrollments,
-                'last_30_days': enrollments_30d,
-                'completed': completed_enrollments,
-            },
-            'payments': {
-                'total_transactions': total_payments,
-                'total_revenue': float(total_revenue),
-                'revenue_last_30_days': float(revenue_30d),
-            },
-            'generated_at': now.isoformat(),
-        })
+        try:
+            start, end = (
+                datetime.strptime(request.query_params[param], '%Y-%m-%d').date()
+                if request.query_params.get(param) else None
+                for param in ('start', 'end')
+            )
+        except ValueError:
+            return Response(
+                {'error': 'start and end must be dates in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        interval = request.query_params.get('interval')
+        if interval and interval not in reports.INTERVALS:
+            return Response(
+                {'error': f"interval must be one of: {', '.join(reports.INTERVALS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(reports.platform_metrics(start, end, interval))
 
 
 class LogoutView(APIView):
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DailyTenantMetrics
+
+
+@admin.register(DailyTenantMetrics)
+class DailyTenantMetricsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'tenant', 'new_users', 'active_users', 'new_enrollments', 'completed_enrollments', 'completed_revenue')
+    list_filter = ('tenant',)
+    date_hierarchy = 'date'
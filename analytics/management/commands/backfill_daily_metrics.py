@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.models import DailyTenantMetrics
+from analytics.rollups import first_day, rollup_active_users, rollup_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailyTenantMetrics rows from the source tables, by default from "
+        "the oldest user, course, enrollment or payment. All-time totals are sums "
+        "of these rows, so run it once after deploying the rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD).')
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Number of days to rebuild, ending today (ignored with --since).'
+        )
+        parser.add_argument(
+            '--if-missing',
+            action='store_true',
+            help='Do nothing when the oldest day already has rows (safe to run on every deploy).'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+        elif options['days']:
+            since = today - timedelta(days=options['days'] - 1)
+        else:
+            since = first_day() or today
+            if options['if_missing'] and DailyTenantMetrics.objects.filter(date=since).exists():
+                self.stdout.write(f"History from {since} is already rolled up.")
+                return
+
+        written = 0
+        day = since
+        while day <= today:
+            written += rollup_day(day)
+            day += timedelta(days=1)
+        rollup_active_users(min(since, today - timedelta(days=settings.METRICS_ACTIVE_USERS_WINDOW_DAYS)))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} row(s) for {since} to {today}."
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTenantMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0, help_text='Users whose last login falls on this day')),
+                ('new_courses', models.PositiveIntegerField(default=0)),
+                ('new_enrollments', models.PositiveIntegerField(default=0)),
+                ('completed_enrollments', models.PositiveIntegerField(default=0)),
+                ('new_payments', models.PositiveIntegerField(default=0)),
+                ('completed_payments', models.PositiveIntegerField(default=0)),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_payments', models.PositiveIntegerField(default=0, help_text='Payments created this day that are still pending')),
+                ('failed_payments', models.PositiveIntegerField(default=0)),
+                ('refunded_payments', models.PositiveIntegerField(default=0)),
+                ('published_courses', models.PositiveIntegerField(default=0)),
+                ('users_by_role', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily tenant metrics',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='analytics_daily_date_idx')],
+                'unique_together': {('tenant', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import models
+from tenants.models import AbstractTenantModel
+
+
+class DailyTenantMetrics(AbstractTenantModel):
+    """
+    One row per tenant per day, feeding PlatformMetricsView.
+
+    Flow columns count events that happened on `date` and can be summed over
+    any date range. Snapshot columns hold the state at the last rollup of
+    that day and are read from each tenant's latest row.
+    Kept current by signals and rebuilt by the rollup task (see analytics.rollups).
+    """
+    date = models.DateField()
+
+    # Flows
+    new_users = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(
+        default=0,
+        help_text="Users whose last login falls on this day"
+    )
+    new_courses = models.PositiveIntegerField(default=0)
+    new_enrollments = models.PositiveIntegerField(default=0)
+    completed_enrollments = models.PositiveIntegerField(default=0)
+    new_payments = models.PositiveIntegerField(default=0)
+    completed_payments = models.PositiveIntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_payments = models.PositiveIntegerField(
+        default=0,
+        help_text="Payments created this day that are still pending"
+    )
+    failed_payments = models.PositiveIntegerField(default=0)
+    refunded_payments = models.PositiveIntegerField(default=0)
+
+    # Snapshots
+    published_courses = models.PositiveIntegerField(default=0)
+    users_by_role = models.JSONField(default=dict, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['tenant', 'date']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='analytics_daily_date_idx'),
+        ]
+        verbose_name_plural = 'Daily tenant metrics'
+
+    def __str__(self):
+        return f"{self.tenant_id} - {self.date}"
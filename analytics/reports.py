@@ -0,0 +1,108 @@
+"""
+Platform metrics read from DailyTenantMetrics.
+
+Totals are sums of flow columns over all days, windowed figures sum a date
+range, and snapshot columns come from each tenant's latest row, so a report
+touches one row per tenant per day instead of the source tables. Totals
+are only complete once history has been rolled up (backfill_daily_metrics,
+run with --if-missing by the entrypoint).
+"""
+from datetime import timedelta
+
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from tenants.models import Tenant
+from .models import DailyTenantMetrics
+from .rollups import FLOW_FIELDS
+
+INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _sums(prefix=''):
+    return {f'{prefix}{field}': Sum(field, default=0) for field in FLOW_FIELDS}
+
+
+def _in_range(queryset, start, end):
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    return queryset
+
+
+def platform_metrics(start=None, end=None, interval=None):
+    """
+    Build the PlatformMetricsView payload. `start` / `end` are dates that add
+    a `range` block of flow totals; `interval` adds a time `series`.
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    rows = DailyTenantMetrics.objects.order_by()
+
+    totals = rows.aggregate(
+        **_sums(prefix='total_'),
+        active_last_7_days=Sum('active_users', filter=Q(date__gt=today - timedelta(days=7)), default=0),
+        enrollments_last_30_days=Sum('new_enrollments', filter=Q(date__gt=today - timedelta(days=30)), default=0),
+        revenue_last_30_days=Sum('completed_revenue', filter=Q(date__gt=today - timedelta(days=30)), default=0),
+    )
+
+    latest_date = DailyTenantMetrics.objects.filter(tenant=OuterRef('tenant')).order_by('-date').values('date')[:1]
+    latest = rows.filter(date=Subquery(latest_date)).values_list('published_courses', 'users_by_role')
+    published_courses = 0
+    by_role = {}
+    for published, roles in latest:
+        published_courses += published
+        for role, count in roles.items():
+            by_role[role] = by_role.get(role, 0) + count
+
+    tenants = Tenant.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+    )
+
+    data = {
+        'users': {
+            'total': totals['total_new_users'],
+            'active_last_7_days': totals['active_last_7_days'],
+            'by_role': [{'role__name': role or None, 'count': count} for role, count in sorted(by_role.items())],
+        },
+        'tenants': tenants,
+        'courses': {
+            'total': totals['total_new_courses'],
+            'published': published_courses,
+        },
+        'enrollments': {
+            'total': totals['total_new_enrollments'],
+            'last_30_days': totals['enrollments_last_30_days'],
+            'completed': totals['total_completed_enrollments'],
+        },
+        'payments': {
+            'total_transactions': totals['total_new_payments'],
+            'total_revenue': float(totals['total_completed_revenue']),
+            'revenue_last_30_days': float(totals['revenue_last_30_days']),
+        },
+        'generated_at': now.isoformat(),
+    }
+
+    if start is not None or end is not None:
+        data['range'] = {
+            'start': start,
+            'end': end,
+            **_in_range(rows, start, end).aggregate(**_sums()),
+        }
+
+    if interval:
+        data['series'] = list(
+            _in_range(rows, start, end)
+            .annotate(period=INTERVALS[interval]('date'))
+            .values('period')
+            .annotate(**_sums())
+            .order_by('period')
+        )
+    return data
@@ -0,0 +1,239 @@
+"""
+Daily per-tenant metric rollups.
+
+Rows in DailyTenantMetrics are written two ways:
+- `record` applies single-row deltas from signals as events happen, so the
+  current day stays close to live between rollups;
+- `rollup_day` / `rollup_active_users` rebuild rows from the source tables
+  with a few grouped queries. The `rollup_daily_metrics` beat task runs them
+  for today and yesterday, which also corrects anything the signals missed
+  (bulk writes, rows written without signals).
+
+Flow columns only count rows that still exist, so summing a column over all
+days gives the live total and deletions are applied as negative deltas.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from accounts.models import User
+from courses.models import Course
+from enrollments.models import Enrollment
+from payments.models import Payment
+from .models import DailyTenantMetrics
+
+FLOW_FIELDS = [
+    'new_users',
+    'active_users',
+    'new_courses',
+    'new_enrollments',
+    'completed_enrollments',
+    'new_payments',
+    'completed_payments',
+    'completed_revenue',
+    'pending_payments',
+    'failed_payments',
+    'refunded_payments',
+]
+SNAPSHOT_FIELDS = ['published_courses', 'users_by_role']
+
+# Payments created on a day are counted under their current status
+STATUS_FIELDS = {
+    Payment.Status.PENDING: 'pending_payments',
+    Payment.Status.FAILED: 'failed_payments',
+    Payment.Status.REFUNDED: 'refunded_payments',
+}
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+# ==========================================
+# Incremental updates
+# ==========================================
+
+def record(tenant_id, day, **deltas):
+    """Add `deltas` to the (tenant, day) row, creating it if needed."""
+    if not tenant_id:
+        return
+    updates = {
+        field: Greatest(
+            F(field) + delta, Value(0),
+            output_field=DailyTenantMetrics._meta.get_field(field)
+        )
+        for field, delta in deltas.items()
+    }
+    rows = DailyTenantMetrics.objects.filter(tenant_id=tenant_id, date=day)
+    # Pure decrements never create rows; a missing row already reads as 0,
+    # and creating one during a tenant's cascade delete would orphan it
+    if rows.update(**updates) or all(delta <= 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            DailyTenantMetrics.objects.create(
+                tenant_id=tenant_id,
+                date=day,
+                **{field: max(delta, 0) for field, delta in deltas.items()}
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(**updates)
+
+
+def record_payment(payment, old_status=None, sign=1):
+    """
+    Apply a payment's contribution (sign=1) or remove it (sign=-1). With
+    `old_status`, the payment's status field is taken to have been that.
+    """
+    status = old_status or payment.status
+    field = STATUS_FIELDS.get(status)
+    if field:
+        record(payment.tenant_id, timezone.localdate(payment.created_at), **{field: sign})
+    if status == Payment.Status.COMPLETED:
+        # Payments completed outside the webhook may have no completed_at
+        record(
+            payment.tenant_id,
+            timezone.localdate(payment.completed_at or payment.created_at),
+            completed_payments=sign,
+            completed_revenue=sign * payment.amount,
+        )
+
+
+# ==========================================
+# Rebuilds
+# ==========================================
+
+def _grouped(queryset, **aggregates):
+    return {
+        row.pop('tenant_id'): row
+        for row in queryset.order_by().values('tenant_id').annotate(**aggregates)
+    }
+
+
+def rollup_day(day):
+    """
+    Rebuild the flow columns of every tenant's row for `day`, plus the
+    snapshot columns when `day` is today. Returns the number of rows written.
+    """
+    start, end = day_bounds(day)
+
+    def on_day(field):
+        return Q(**{f'{field}__gte': start, f'{field}__lt': end})
+
+    users = _grouped(
+        User.objects.filter(tenant__isnull=False).filter(on_day('date_joined') | on_day('last_login')),
+        new_users=Count('id', filter=on_day('date_joined')),
+        active_users=Count('id', filter=on_day('last_login')),
+    )
+    courses = _grouped(
+        Course.objects.filter(on_day('created_at')),
+        new_courses=Count('id'),
+    )
+    enrollments = _grouped(
+        Enrollment.objects.filter(on_day('enrolled_at') | on_day('completed_at')),
+        new_enrollments=Count('id', filter=on_day('enrolled_at')),
+        completed_enrollments=Count('id', filter=on_day('completed_at') & Q(status=Enrollment.Status.COMPLETED)),
+    )
+    # Completed payments without completed_at count on the day they were
+    # created, as in record_payment; both days are already in the filter
+    completed = on_day('paid_at') & Q(status=Payment.Status.COMPLETED)
+    payments = _grouped(
+        Payment.objects.alias(paid_at=Coalesce('completed_at', 'created_at'))
+        .filter(on_day('created_at') | on_day('completed_at')),
+        new_payments=Count('id', filter=on_day('created_at')),
+        completed_payments=Count('id', filter=completed),
+        completed_revenue=Sum('amount', filter=completed, default=Value(0, output_field=DecimalField())),
+        **{
+            field: Count('id', filter=on_day('created_at') & Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        }
+    )
+
+    fields = list(FLOW_FIELDS)
+    sources = [users, courses, enrollments, payments]
+    if day == timezone.localdate():
+        fields += SNAPSHOT_FIELDS
+        sources.append(_grouped(
+            Course.objects.filter(status='PUBLISHED'),
+            published_courses=Count('id'),
+        ))
+        by_role = {}
+        role_rows = (
+            User.objects.filter(tenant__isnull=False).order_by()
+            .values('tenant_id', 'role__name').annotate(count=Count('id'))
+        )
+        for row in role_rows:
+            by_role.setdefault(row['tenant_id'], {})[row['role__name'] or ''] = row['count']
+        sources.append({tenant_id: {'users_by_role': roles} for tenant_id, roles in by_role.items()})
+
+    # Rows already written for the day are rebuilt too, so stale counts reset to 0
+    tenant_ids = set(DailyTenantMetrics.objects.filter(date=day).values_list('tenant_id', flat=True))
+    for source in sources:
+        tenant_ids.update(source)
+
+    rows = []
+    for tenant_id in sorted(tenant_ids):
+        values = {}
+        for source in sources:
+            values.update(source.get(tenant_id, {}))
+        rows.append(DailyTenantMetrics(tenant_id=tenant_id, date=day, **values))
+
+    if rows:
+        DailyTenantMetrics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['tenant', 'date'],
+            update_fields=fields + ['updated_at'],
+        )
+    return len(rows)
+
+
+def first_day():
+    """
+    Local date of the oldest row the rollups count, or None without data.
+    Totals are sums over all days, so history has to be rolled up from here.
+    """
+    earliest = [
+        User.objects.filter(tenant__isnull=False).aggregate(first=Min('date_joined'))['first'],
+        Course.objects.aggregate(first=Min('created_at'))['first'],
+        Enrollment.objects.aggregate(first=Min('enrolled_at'))['first'],
+        Payment.objects.aggregate(first=Min('created_at'))['first'],
+    ]
+    earliest = [moment for moment in earliest if moment is not None]
+    return timezone.localdate(min(earliest)) if earliest else None
+
+
+def rollup_active_users(since):
+    """
+    Rebuild active_users for every day from `since` to today. A later login
+    moves a user to a later day, so recent days are recounted as a window.
+    """
+    start, _ = day_bounds(since)
+    counts = (
+        User.objects.filter(tenant__isnull=False, last_login__gte=start)
+        .annotate(day=TruncDate('last_login'))
+        .order_by()
+        .values('tenant_id', 'day')
+        .annotate(active_users=Count('id'))
+    )
+    active = {(row['tenant_id'], row['day']): row['active_users'] for row in counts}
+    for key in DailyTenantMetrics.objects.filter(date__gte=since).values_list('tenant_id', 'date'):
+        active.setdefault(key, 0)
+
+    rows = [
+        DailyTenantMetrics(tenant_id=tenant_id, date=day, active_users=count)
+        for (tenant_id, day), count in active.items()
+    ]
+    if rows:
+        DailyTenantMetrics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['tenant', 'date'],
+            update_fields=['active_users', 'updated_at'],
+        )
+    return len(rows)
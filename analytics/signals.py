@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import User
+from courses.models import Course
+from enrollments.models import Enrollment
+from enrollments.services import enrollment_completed
+from payments.models import Payment
+from . import rollups
+
+
+# ==========================================
+# Incremental Daily Metrics Signals
+# ==========================================
+# Deltas keep today's rows current between rollups; the rollup task
+# rebuilds recent days from the source tables (see analytics.rollups).
+
+@receiver(post_save, sender=User)
+def record_new_user(sender, instance, created, **kwargs):
+    if created and instance.tenant_id:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.date_joined), new_users=1)
+
+
+@receiver(post_delete, sender=User)
+def record_deleted_user(sender, instance, **kwargs):
+    if instance.tenant_id:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.date_joined), new_users=-1)
+
+
+@receiver(post_save, sender=Course)
+def record_new_course(sender, instance, created, **kwargs):
+    if created:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.created_at), new_courses=1)
+
+
+@receiver(post_delete, sender=Course)
+def record_deleted_course(sender, instance, **kwargs):
+    rollups.record(instance.tenant_id, timezone.localdate(instance.created_at), new_courses=-1)
+
+
+@receiver(post_save, sender=Enrollment)
+def record_new_enrollment(sender, instance, created, **kwargs):
+    if created:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.enrolled_at), new_enrollments=1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def record_deleted_enrollment(sender, instance, **kwargs):
+    rollups.record(instance.tenant_id, timezone.localdate(instance.enrolled_at), new_enrollments=-1)
+    if instance.status == Enrollment.Status.COMPLETED and instance.completed_at:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.completed_at), completed_enrollments=-1)
+
+
+@receiver(enrollment_completed)
+def record_completed_enrollment(sender, enrollment, **kwargs):
+    rollups.record(enrollment.tenant_id, timezone.localdate(enrollment.completed_at), completed_enrollments=1)
+
+
+@receiver(post_save, sender=Payment)
+def record_payment(sender, instance, created, **kwargs):
+    if created:
+        rollups.record(instance.tenant_id, timezone.localdate(instance.created_at), new_payments=1)
+        rollups.record_payment(instance)
+    else:
+        old_status = getattr(instance, '_loaded_status', None)
+        if old_status is not None and old_status != instance.status:
+            rollups.record_payment(instance, old_status=old_status, sign=-1)
+            rollups.record_payment(instance)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Payment)
+def record_deleted_payment(sender, instance, **kwargs):
+    rollups.record(instance.tenant_id, timezone.localdate(instance.created_at), new_payments=-1)
+    rollups.record_payment(instance, sign=-1)
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .rollups import rollup_active_users, rollup_day
+
+
+@shared_task(queue="default_queue")
+def rollup_daily_metrics():
+    """
+    Rebuild today's and yesterday's DailyTenantMetrics rows and the
+    active-user window. Scheduled by Celery beat.
+    """
+    today = timezone.localdate()
+    written = rollup_day(today - timedelta(days=1)) + rollup_day(today)
+    rollup_active_users(today - timedelta(days=settings.METRICS_ACTIVE_USERS_WINDOW_DAYS))
+    return f"Rolled up {written} daily metric rows"
@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
 
 # Set default Django settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "b2b_course_platform.settings")
@@ -14,10 +15,27 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    # Per-worker Prometheus exporter (see observability.task_metrics)
+    from observability.task_metrics import start_exporter
+    start_exporter()
+
+
 app.conf.beat_schedule = {
     'print-every-minute': {
         'task': 'accounts.tasks.print_every_minute',
         'schedule': crontab(minute='*'),
         'options': {'queue': 'default_queue'},
     },
+    'maintain-audit-partitions': {
+        'task': 'accounts.tasks.maintain_audit_partitions',
+        'schedule': crontab(hour=2, minute=0),
+        'options': {'queue': 'default_queue'},
+    },
+    'rollup-daily-metrics': {
+        'task': 'analytics.tasks.rollup_daily_metrics',
+        'schedule': crontab(minute='*/15'),
+        'options': {'queue': 'default_queue'},
+    },
 }
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # ... Django apps
     'rest_framework',
@@ -58,6 +59,9 @@ INSTALLED_APPS = [
     'skills',
     'enrollments',
     'payments',
+    'analytics',
+    'benchmarks',
+    'observability',
 
     # 'celery',
 
@@ -92,8 +96,13 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.TenantTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TenantTokenRefreshSerializer",
 }
 
+# Authenticate safe (read) requests from token claims without loading the user
+STATELESS_JWT_AUTH = os.getenv('STATELESS_JWT_AUTH', 'False').lower() in ('true', '1', 'yes')
+
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'B2B Course Platform API',
@@ -114,6 +123,7 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    'observability.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -121,6 +131,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.AuditLogMiddleware',
+    'observability.middleware.SlowQueryMiddleware',
+    'observability.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'b2b_course_platform.urls'
@@ -216,6 +229,54 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Kolkata'
 
+# Enrollment status/completion side effects run on a worker, coalesced per
+# enrollment over ENROLLMENT_SYNC_DELAY seconds (see enrollments.services)
+ENROLLMENT_SYNC_ASYNC = os.getenv('ENROLLMENT_SYNC_ASYNC', 'True').lower() in ('true', '1', 'yes')
+ENROLLMENT_SYNC_DELAY = int(os.getenv('ENROLLMENT_SYNC_DELAY', 5))
+
+# Audit events are buffered per request and bulk-written after commit;
+# AUDIT_LOG_ASYNC hands each batch to a worker on audit_queue instead
+AUDIT_LOG_BUFFER_SIZE = 500
+AUDIT_LOG_ASYNC = os.getenv('AUDIT_LOG_ASYNC', 'False').lower() in ('true', '1', 'yes')
+
+# Monthly audit log partitions (PostgreSQL); months past retention are
+# exported to AUDIT_LOG_ARCHIVE_DIR as gzipped JSONL and dropped
+AUDIT_LOG_PARTITIONS_AHEAD = 3
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv('AUDIT_LOG_RETENTION_MONTHS')) if os.getenv('AUDIT_LOG_RETENTION_MONTHS') else None
+AUDIT_LOG_ARCHIVE_DIR = os.getenv('AUDIT_LOG_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'audit_logs'))
+
+# Days of last-login history the metrics rollup recounts for active users
+METRICS_ACTIVE_USERS_WINDOW_DAYS = 30
+
+# Recompute skill proficiency on a worker instead of in the completing request
+SKILL_RECOMPUTE_ASYNC = os.getenv('SKILL_RECOMPUTE_ASYNC', 'False').lower() in ('true', '1', 'yes')
+
+# Per-request Prometheus metrics, scraped from /metrics (see observability);
+# scrapes must send "Authorization: Bearer <METRICS_AUTH_TOKEN>" and are
+# refused while it is unset
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() in ('true', '1', 'yes')
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+# Port of the task metrics exporter each Celery worker starts (unset: none)
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT')) if os.getenv('CELERY_METRICS_PORT') else None
+
+# On-demand request profiles (see observability.profiling): super admins send
+# PROFILER_HEADER, and PROFILER_SAMPLE_RATE of API requests are sampled.
+# Stored for PROFILER_TTL seconds under PROFILER_DIR, or in the cache if unset
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False').lower() in ('true', '1', 'yes')
+PROFILER_HEADER = 'X-Profile'
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+PROFILER_TTL = 24 * 3600
+PROFILER_DIR = os.getenv('PROFILER_DIR', '')
+
+# Slow-query log (see observability.slow_queries): queries slower than the
+# threshold are logged and aggregated per fingerprint for SLOW_QUERY_TTL
+# seconds; each fingerprint's plan is sampled once per EXPLAIN_INTERVAL
+SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'False').lower() in ('true', '1', 'yes')
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'True').lower() in ('true', '1', 'yes')
+SLOW_QUERY_EXPLAIN_INTERVAL = 3600
+SLOW_QUERY_TTL = 7 * 24 * 3600
+
 
 # Cache (Redis)
 CACHES = {
@@ -230,6 +291,9 @@ CACHES = {
 }
 
 PERMISSION_CACHE_TIMEOUT = 3600  # 1 hour
+PERMISSION_LOCAL_CACHE_TIMEOUT = 5  # In-process LRU in front of Redis (seconds)
+PERMISSION_LOCAL_CACHE_SIZE = 256  # Max roles held in the in-process LRU
+REVENUE_ANALYTICS_CACHE_TIMEOUT = 60  # Revenue report is recomputed at most once a minute
 
 
 # Email
@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from observability.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
@@ -27,6 +29,7 @@ urlpatterns = [
     path('api/', include('skills.urls')),
     path('api/', include('enrollments.urls')),
     path('api/', include('payments.urls')),
+    path('api/', include('observability.urls')),
 
     #reset password 
     path('api/password_reset/', include('django_rest_passwordreset.urls', namespace='password_reset')),
@@ -34,4 +37,7 @@ urlpatterns = [
     # Swagger Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]
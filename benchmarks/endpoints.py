@@ -0,0 +1,88 @@
+"""
+Discovery of the router-registered GET endpoints to benchmark.
+
+Every URL pattern a DRF router generated for a viewset is found by walking
+the URL resolver, so new viewsets and @action routes are picked up without
+touching the benchmarks. Write methods are skipped; they would change the
+data later measurements read.
+"""
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from courses.models import Course, Module
+from tenants.managers import set_current_user
+
+# GET routes that call out to third parties (Stripe) on every request
+EXTERNAL_ROUTES = {'payment-verify-session'}
+
+# Parent lookups of nested routes: kwarg -> f(user, kwargs so far) -> value
+PARENT_LOOKUPS = {
+    'course_slug': lambda user, kwargs: (
+        Course.objects.for_tenant(user.tenant) if user.tenant_id else Course.objects.all()
+    ).filter(modules__submodules__isnull=False).values_list('slug', flat=True).first(),
+    'module_slug': lambda user, kwargs: Module.objects.filter(
+        course__slug=kwargs['course_slug'], submodules__isnull=False
+    ).values_list('slug', flat=True).first(),
+}
+
+
+def _walk(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def discover():
+    """Return (name, viewset class, action, URL kwarg names) for each GET route."""
+    endpoints = []
+    seen = set()
+    for pattern in _walk(get_resolver().url_patterns):
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None)
+        if not actions or 'get' not in actions or not pattern.name or pattern.name in EXTERNAL_ROUTES:
+            continue
+        kwargs = list(pattern.pattern.regex.groupindex)
+        # Routers add a `.json`-style format suffix twin of every route
+        if 'format' in kwargs or pattern.name in seen:
+            continue
+        seen.add(pattern.name)
+        endpoints.append((pattern.name, callback.cls, actions['get'], kwargs))
+    return endpoints
+
+
+def build_view(viewset, user, action, kwargs):
+    """Instantiate `viewset` for a GET by `user`, as the router would."""
+    set_current_user(user)
+    request = Request(APIRequestFactory().get('/'))
+    request.user = user
+    return viewset(request=request, args=(), kwargs=kwargs, format_kwarg=None, action=action)
+
+
+def resolve_path(name, viewset, action, kwarg_names, user):
+    """
+    Fill in the URL kwargs of a route with rows `user` can see. Returns the
+    path, or None when the data has nothing to look up. Tenant-scoped slug
+    lookups name the row's tenant, which a SuperAdmin's lookup needs when
+    several tenants share the slug (see tenants.mixins).
+    """
+    kwargs = {}
+    query = ''
+    for kwarg in kwarg_names:
+        if kwarg in PARENT_LOOKUPS:
+            value = PARENT_LOOKUPS[kwarg](user, kwargs)
+        else:
+            view = build_view(viewset, user, action, dict(kwargs))
+            # Plain ViewSets have no queryset to take a row from
+            if not hasattr(view, 'get_queryset'):
+                return None
+            row = view.get_queryset().first()
+            value = getattr(row, view.lookup_field) if row is not None else None
+            if row is not None and hasattr(view, 'tenant_query_param'):
+                query = f'?{view.tenant_query_param}={row.tenant.slug}'
+        if value is None:
+            return None
+        kwargs[kwarg] = value
+    return reverse(name, kwargs=kwargs) + query
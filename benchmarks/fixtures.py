@@ -0,0 +1,58 @@
+"""
+Synthetic tenants for the API benchmarks.
+
+`seed` builds a small, fixed-seed dataset with benchmarks.generator (bulk
+inserts plus rebuilt counters, skills and metrics) and picks the users to
+benchmark as. The same scale and seed always produce the same data.
+"""
+import importlib
+
+from django.apps import apps
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.models import User
+from analytics.rollups import rollup_day
+from . import generator
+
+DEFAULT_SCALE = {
+    'tenants': 2,
+    'courses': 6,
+    'modules': 3,
+    'submodules': 4,
+    'users': 20,
+    'enrollments': 3,
+}
+PASSWORD = 'benchmark'
+
+
+def seed_role_permissions():
+    """
+    Re-run the role permission data migration. On a fresh database it runs
+    before auth creates the permission rows, so the roles start out empty.
+    """
+    migration = importlib.import_module('accounts.migrations.0007_seed_role_permissions')
+    migration.seed_role_permissions(apps, None)
+
+
+def seed(scale=None, seed=0):
+    """
+    Create one dataset at `scale` (see DEFAULT_SCALE) and return the users
+    to benchmark as, keyed by role name.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    seed_role_permissions()
+    superadmin = User.objects.create_superuser(
+        email='superadmin@bench.test', username='bench-superadmin', password=PASSWORD
+    )
+    tenant = generator.generate(prefix='bench', seed=seed, paid_share=0.5, rollups=False, **scale)[0]
+    rollup_day(timezone.localdate())
+
+    users = User.objects.select_related('role', 'tenant').filter(tenant=tenant)
+    return {
+        'SUPER_ADMIN': User.objects.select_related('role', 'tenant').get(pk=superadmin.pk),
+        'TENANT_ADMIN': users.filter(role__name='TENANT_ADMIN').order_by('pk').first(),
+        # The busiest learner, so per-user lists and detail routes have rows
+        'TENANT_USER': users.filter(role__name='TENANT_USER')
+        .annotate(enrollment_count=Count('enrollments')).order_by('-enrollment_count', 'pk').first(),
+    }
@@ -0,0 +1,274 @@
+"""
+Bulk synthetic data for load testing.
+
+`generate` writes tenants with users, courses, modules, submodules,
+enrollments, progress, payments, skills and catalogues through chunked
+bulk_create calls, so millions of rows load in minutes instead of going
+through serializers and per-row signals. The signal-maintained state is
+then rebuilt in bulk: course / enrollment counters, UserSkill proficiency
+and the daily metrics rollups.
+
+Shapes are skewed the way production data is: course popularity follows a
+Zipf curve, enrollments per user are log-normal, progress is mostly partial
+and activity is spread over the last `days` days. Every random choice comes
+from a random.Random seeded per tenant, so the same arguments always produce
+the same data (timestamps are relative to now).
+"""
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Role, User
+from analytics.rollups import rollup_active_users, rollup_day
+from catalogues.models import Catalogue, CatalogueCourse
+from courses import counters
+from courses.search import update_search_vectors
+from courses.models import Course, Module, SubModule
+from enrollments.models import Enrollment, SubModuleProgress
+from payments.models import Payment
+from skills.models import CourseSkill, Skill
+from skills.proficiency import recompute_tenant_skills
+from tenants.models import Tenant
+
+PASSWORD = 'loadtest'
+DRAFT_SHARE = 0.15
+
+# Outcome shares for payments of paid courses
+PAYMENT_OUTCOMES = [
+    (Payment.Status.COMPLETED, 0.92),
+    (Payment.Status.FAILED, 0.04),
+    (Payment.Status.PENDING, 0.02),
+    (Payment.Status.REFUNDED, 0.02),
+]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the values given for auto_now_add fields."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in saved:
+            field.auto_now_add = auto_now_add
+
+
+class _Writer:
+    """
+    Buffers model instances and bulk-inserts them once any buffer is full.
+    Buffers flush in the order their models were first added, so rows are
+    written after the rows they point at (progress after its enrollment).
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.written = {}
+
+    def add(self, instance):
+        rows = self.pending.setdefault(type(instance), [])
+        rows.append(instance)
+        if len(rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, rows in self.pending.items():
+            if rows:
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+                self.written[model.__name__] = self.written.get(model.__name__, 0) + len(rows)
+        self.pending = {model: [] for model in self.pending}
+
+
+def _zipf_weights(count, skew):
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def _weighted_sample(rng, population, weights, k):
+    """Sample k distinct items, each draw weighted (Efraimidis-Spirakis)."""
+    keyed = sorted(
+        ((rng.random() ** (1 / weight), item) for item, weight in zip(population, weights)),
+        key=lambda pair: pair[0],
+        reverse=True,
+    )
+    return [item for _, item in keyed[:k]]
+
+
+def _moment(rng, start, end):
+    """A random datetime between start and end."""
+    span = max((end - start).total_seconds(), 0)
+    return start + timedelta(seconds=rng.random() * span)
+
+
+def generate(tenants=1, users=1000, courses=50, modules=5, submodules=6, enrollments=4,
+             days=365, skew=1.1, paid_share=0.3, prefix='load', seed=0, batch_size=5000, rollups=True, stdout=None):
+    """
+    Generate `tenants` tenants named "<prefix>-<n>". Per tenant: one tenant
+    admin and `users` learners, `courses` courses with `modules` modules of
+    `submodules` submodules each, and a median of `enrollments` enrollments
+    per learner; `paid_share` of the courses are paid. Returns the created
+    tenants.
+    """
+    now = timezone.now()
+    password = make_password(PASSWORD)
+    roles = {role.name: role for role in Role.objects.all()}
+    created = []
+
+    for t in range(tenants):
+        rng = random.Random(f'{seed}:{t}')
+        writer = _Writer(batch_size)
+        start = now - timedelta(days=days)
+        slug = f'{prefix}-{t}'
+
+        with transaction.atomic(), explicit_timestamps(
+            User._meta.get_field('date_joined'),
+            Course._meta.get_field('created_at'),
+            Enrollment._meta.get_field('enrolled_at'),
+            Payment._meta.get_field('created_at'),
+        ):
+            tenant = Tenant.objects.create(name=f'{prefix.title()} Tenant {t}', slug=slug)
+
+            # Join dates spread over the window; most users have logged in since
+            admin = User.objects.bulk_create([User(
+                email=f'admin@{slug}.test', username=f'{slug}-admin', password=password,
+                tenant=tenant, role=roles.get('TENANT_ADMIN'), is_active=True, date_joined=start,
+            )])[0]
+            learner_rows = []
+            for u in range(users):
+                joined = _moment(rng, start, now)
+                learner_rows.append(User(
+                    email=f'user{u}@{slug}.test', username=f'{slug}-user{u}', password=password,
+                    tenant=tenant, role=roles.get('TENANT_USER'), is_active=True, date_joined=joined,
+                    last_login=_moment(rng, joined, now) if rng.random() < 0.7 else None,
+                ))
+            learners = []
+            for offset in range(0, len(learner_rows), batch_size):
+                learners.extend(
+                    (user.pk, user.date_joined)
+                    for user in User.objects.bulk_create(learner_rows[offset:offset + batch_size])
+                )
+            del learner_rows
+
+            skills = Skill.objects.bulk_create([
+                Skill(tenant=tenant, name=f'Skill {s}', slug=f'skill-{s}')
+                for s in range(max(5, courses // 5))
+            ])
+
+            # Exact shares, so small datasets still have paid and draft courses
+            paid = set(rng.sample(range(courses), round(courses * paid_share)))
+            drafts = set(rng.sample(range(courses), round(courses * DRAFT_SHARE)))
+            course_rows = []
+            for c in range(courses):
+                course_rows.append(Course(
+                    tenant=tenant, name=f'{slug} course {c}', slug=f'{slug}-course-{c}',
+                    description=f'Load test course {c} of {slug}.', created_by=admin,
+                    is_free=c not in paid, price=Decimal(rng.choice([19, 49, 99, 199])) if c in paid else None,
+                    status=Course.Status.DRAFT if c in drafts else Course.Status.PUBLISHED,
+                    created_at=_moment(rng, start, start + (now - start) / 2),
+                ))
+            course_list = Course.objects.bulk_create(course_rows)
+
+            module_list = Module.objects.bulk_create([
+                Module(tenant=tenant, course=course, title=f'Module {m}', slug=f'module-{m}', order=m)
+                for course in course_list for m in range(modules)
+            ], batch_size=batch_size)
+            submodule_list = SubModule.objects.bulk_create([
+                SubModule(
+                    tenant=tenant, module=module, title=f'Submodule {s}', slug=f'submodule-{s}', order=s,
+                    type=SubModule.Type.ASSIGNMENT if s % 3 == 2 else SubModule.Type.VIDEO,
+                    content_url='https://example.com/video.mp4',
+                )
+                for module in module_list for s in range(submodules)
+            ], batch_size=batch_size)
+            course_submodules = {}
+            for submodule in submodule_list:
+                course_submodules.setdefault(submodule.module.course_id, []).append(submodule.pk)
+            del module_list, submodule_list
+
+            CourseSkill.objects.bulk_create([
+                CourseSkill(tenant=tenant, course=course, skill=skill, weight=Decimal(rng.choice(['0.50', '1.00'])))
+                for course in course_list
+                for skill in rng.sample(skills, min(len(skills), rng.randint(1, 3)))
+            ], batch_size=batch_size)
+
+            # Popularity: a few courses take most enrollments
+            published = [course for course in course_list if course.status == Course.Status.PUBLISHED]
+            rng.shuffle(published)
+            weights = _zipf_weights(len(published), skew)
+            mean = max(enrollments, 0.01)
+
+            for user_id, joined in learners:
+                count = min(len(published), int(rng.lognormvariate(math.log(mean), 0.75)))
+                for course in _weighted_sample(rng, published, weights, count):
+                    _enroll(rng, writer, tenant, user_id, course, course_submodules.get(course.pk, []),
+                            _moment(rng, max(joined, course.created_at), now), now)
+            writer.flush()
+
+            catalogues = Catalogue.objects.bulk_create([
+                Catalogue(tenant=tenant, name=f'Catalogue {k}', slug=f'catalogue-{k}')
+                for k in range(max(1, courses // 20))
+            ])
+            CatalogueCourse.objects.bulk_create([
+                CatalogueCourse(tenant=tenant, catalogue=catalogue, course=course, order=order)
+                for catalogue in catalogues
+                for order, course in enumerate(rng.sample(course_list, max(1, len(course_list) // 4)))
+            ], batch_size=batch_size)
+
+            # Derived state the signals would have maintained
+            counters.recount_courses(Course.objects.filter(tenant=tenant))
+            counters.recount_enrollments(Enrollment.objects.filter(tenant=tenant))
+            update_search_vectors(Course.objects.filter(tenant=tenant))
+            skill_rows = recompute_tenant_skills(tenant.pk, batch_size=batch_size)
+
+        created.append(tenant)
+        if stdout:
+            totals = ', '.join(f'{count} {name}' for name, count in sorted(writer.written.items()))
+            stdout.write(f'{slug}: {len(learners) + 1} User, {totals}, {skill_rows} UserSkill')
+
+    if rollups and created:
+        day = timezone.localdate(now) - timedelta(days=days)
+        while day <= timezone.localdate(now):
+            rollup_day(day)
+            day += timedelta(days=1)
+        rollup_active_users(timezone.localdate(now) - timedelta(days=days))
+    return created
+
+
+def _enroll(rng, writer, tenant, user_id, course, submodule_ids, enrolled_at, now):
+    """Queue one enrollment with its progress rows and payment."""
+    # Most learners stall part way; a minority finish
+    share = rng.betavariate(0.8, 1.1)
+    done = len(submodule_ids) if share > 0.9 else int(share * len(submodule_ids))
+    completed = bool(submodule_ids) and done == len(submodule_ids)
+    completed_at = _moment(rng, enrolled_at, now) if completed else None
+
+    enrollment = Enrollment(
+        tenant=tenant, user_id=user_id, course=course, enrolled_at=enrolled_at,
+        status=(
+            Enrollment.Status.COMPLETED if completed else
+            Enrollment.Status.IN_PROGRESS if done else
+            Enrollment.Status.NOT_STARTED
+        ),
+        completed_at=completed_at,
+    )
+    writer.add(enrollment)
+    for submodule_id in submodule_ids[:done]:
+        writer.add(SubModuleProgress(
+            tenant=tenant, enrollment=enrollment, submodule_id=submodule_id, is_completed=True,
+            completed_at=_moment(rng, enrolled_at, completed_at or now),
+        ))
+
+    if not course.is_free:
+        status = rng.choices(*zip(*PAYMENT_OUTCOMES))[0]
+        writer.add(Payment(
+            tenant=tenant, user_id=user_id, course=course, amount=course.price, status=status,
+            created_at=enrolled_at,
+            completed_at=enrolled_at if status in (Payment.Status.COMPLETED, Payment.Status.REFUNDED) else None,
+        ))
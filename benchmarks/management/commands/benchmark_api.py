@@ -0,0 +1,127 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.test.runner import DiscoverRunner
+
+from benchmarks import fixtures, runner
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic tenants, benchmark every "
+        "router-registered GET endpoint and compare against a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        for option, default in fixtures.DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{option}',
+                type=int,
+                default=default,
+                help=f'Number of {option} to seed (per tenant / course / module / user where nested).'
+            )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint and role.')
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear the cache before every timed request.'
+        )
+        parser.add_argument(
+            '--roles',
+            default='SUPER_ADMIN,TENANT_ADMIN,TENANT_USER',
+            help='Comma separated roles to request the endpoints as.'
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            default=[],
+            help='Only benchmark route names containing this text (repeatable).'
+        )
+        parser.add_argument(
+            '--baseline',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+            help='Baseline JSON file to compare against.'
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results to the baseline file instead of comparing.'
+        )
+        parser.add_argument(
+            '--report-only',
+            action='store_true',
+            help='Print the results without comparing them to a baseline.'
+        )
+        parser.add_argument('--query-slack', type=int, default=0, help='Extra queries allowed per endpoint.')
+        parser.add_argument(
+            '--latency-tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed p50/p95 slowdown as a fraction of the baseline (0.5 = 50%%).'
+        )
+        parser.add_argument(
+            '--latency-floor',
+            type=float,
+            default=5.0,
+            help='Slowdowns smaller than this many milliseconds are never violations.'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+
+    def handle(self, *args, **options):
+        scale = {option: options[option] for option in fixtures.DEFAULT_SCALE}
+        baseline_path = Path(options['baseline'])
+        baseline = None
+        if not (options['update_baseline'] or options['report_only']):
+            if not baseline_path.exists():
+                raise CommandError(
+                    f"No baseline at {baseline_path}. Record one with --update-baseline "
+                    f"or pass --report-only to skip the comparison."
+                )
+            baseline = runner.load_baseline(baseline_path)
+            if baseline['scale'] != scale:
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline was recorded at scale {baseline['scale']}; query counts may differ."
+                ))
+
+        setup_test_environment()
+        test_runner = DiscoverRunner(verbosity=0, keepdb=options['keepdb'], interactive=False)
+        old_config = test_runner.setup_databases()
+        try:
+            actors = fixtures.seed(scale, seed=options['seed'])
+            roles = [role.strip() for role in options['roles'].split(',')]
+            missing = [role for role in roles if role not in actors]
+            if missing:
+                raise CommandError(f"Unknown role(s): {', '.join(missing)}")
+            results = runner.run(
+                {role: actors[role] for role in roles},
+                repeat=options['repeat'],
+                cold=options['cold'],
+                only=options['endpoint'],
+                stdout=self.stdout,
+            )
+        finally:
+            test_runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options['update_baseline']:
+            runner.save_baseline(baseline_path, scale, options['repeat'], results)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} result(s) to {baseline_path}."))
+            return
+        if baseline is None:
+            return
+
+        failures = runner.compare(
+            results,
+            baseline['results'],
+            query_slack=options['query_slack'],
+            latency_tolerance=options['latency_tolerance'],
+            latency_floor_ms=options['latency_floor'],
+        )
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f"{len(failures)} endpoint(s) over budget.")
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} endpoint(s) within budget."))
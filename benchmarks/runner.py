@@ -0,0 +1,155 @@
+"""
+Measure endpoints and compare them against a stored baseline.
+
+Each endpoint is requested once with an empty cache to count the queries of
+the uncached path (where N+1 regressions show up), then `repeat` more times
+to time it the way it is normally served. Results are keyed by
+"<role> <route name>" so the baseline diff reads like a report.
+
+The committed benchmarks/baseline.json holds query counts, status codes and
+p50/p95 timings. Timings depend on the machine they were recorded on, so
+re-record the baseline with --update-baseline on the machine that enforces
+it, or widen --latency-tolerance.
+"""
+import json
+import math
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from accounts import permission_cache
+from accounts.serializers import TenantTokenObtainPairSerializer
+from .endpoints import discover, resolve_path
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def client_for(user):
+    # A failing endpoint is recorded by its status code rather than aborting the run
+    client = APIClient(raise_request_exception=False)
+    token = TenantTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def clear_caches():
+    # The in-process permission LRU would otherwise keep a role's codenames
+    # warm for a few seconds and make the cold query count timing-dependent
+    cache.clear()
+    permission_cache.local_cache.clear()
+
+
+def measure(client, user, path, repeat=20, cold=False):
+    # Benchmarks would trip the per-user rate limit long before they finish
+    throttle_key = UserRateThrottle.cache_format % {'scope': UserRateThrottle.scope, 'ident': user.pk}
+
+    clear_caches()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(path)
+    # captured_queries slices connection.queries lazily, and every later
+    # request resets that log
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        cache.delete(throttle_key)
+        started = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+    cache.delete(throttle_key)
+    with CaptureQueriesContext(connection) as warm_queries:
+        client.get(path)
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'queries': query_count,
+        'warm_queries': len(warm_queries),
+        'p50_ms': round(percentile(timings, 50), 2) if timings else None,
+        'p95_ms': round(percentile(timings, 95), 2) if timings else None,
+    }
+
+
+def run(actors, repeat=20, cold=False, only=None, stdout=None):
+    """
+    Benchmark every discovered GET endpoint as each of `actors`
+    ({role name: user}). `only` restricts the run to route names containing
+    one of its substrings.
+    """
+    results = {}
+    for name, viewset, action, kwarg_names in discover():
+        if only and not any(part in name for part in only):
+            continue
+        for role, user in actors.items():
+            key = f'{role} {name}'
+            path = resolve_path(name, viewset, action, kwarg_names, user)
+            if path is None:
+                if stdout:
+                    stdout.write(f'{key}: skipped, no row to look up')
+                continue
+            results[key] = measure(client_for(user), user, path, repeat=repeat, cold=cold)
+            if stdout:
+                row = results[key]
+                stdout.write(
+                    f"{key}: {row['status']} {row['queries']}q/{row['warm_queries']}q "
+                    f"p50 {row['p50_ms']}ms p95 {row['p95_ms']}ms"
+                )
+    return results
+
+
+def compare(results, baseline, query_slack=0, latency_tolerance=0.5, latency_floor_ms=5.0):
+    """
+    Return budget violations of `results` against `baseline` results: more
+    queries than the baseline plus `query_slack`, a p95 and p50 both more
+    than `latency_tolerance` (a fraction) slower and at least
+    `latency_floor_ms` slower, or a different status code. A server error
+    is a violation even when the baseline recorded it or the endpoint is new.
+    """
+    failures = []
+    for key, row in sorted(results.items()):
+        if row['status'] >= 500:
+            failures.append(f"{key}: status {row['status']}")
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if row['status'] != expected['status']:
+            failures.append(f"{key}: status {expected['status']} -> {row['status']}")
+        if row['queries'] > expected['queries'] + query_slack:
+            failures.append(f"{key}: {expected['queries']} -> {row['queries']} queries")
+        if row['warm_queries'] > expected['warm_queries'] + query_slack:
+            failures.append(f"{key}: {expected['warm_queries']} -> {row['warm_queries']} cached queries")
+        # A regression slows every request; a p95 the median does not share
+        # is a scheduling hiccup of the machine, not of the endpoint
+        if all(
+            _over_budget(row, expected, field, latency_tolerance, latency_floor_ms)
+            for field in ('p50_ms', 'p95_ms')
+        ):
+            failures.append(f"{key}: p95 {expected['p95_ms']}ms -> {row['p95_ms']}ms")
+    return failures
+
+
+def _over_budget(row, expected, field, tolerance, floor_ms):
+    if row[field] is None or expected.get(field) is None:
+        return False
+    return row[field] - expected[field] > floor_ms and row[field] > expected[field] * (1 + tolerance)
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baseline(path, scale, repeat, results):
+    with open(path, 'w') as handle:
+        json.dump({'scale': scale, 'repeat': repeat, 'results': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
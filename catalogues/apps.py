@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CataloguesConfig(AppConfig):
     name = 'catalogues'
+
+    def ready(self):
+        import catalogues.signals  # noqa
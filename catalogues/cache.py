@@ -0,0 +1,63 @@
+"""
+Version-stamped catalogue list cache.
+
+The catalogue list of a tenant is cached per role and query string under the
+tenant's 'catalogue_list' generation counter (see courses.cache). Catalogue,
+CatalogueCourse and Course changes bump the counter of their tenant and of
+the 'system' scope Super Admins read from, after the transaction commits.
+Inside `coalesced()` each tenant is bumped once, when the block exits.
+Bulk writes send no signals, so catalogues.membership bumps explicitly.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+
+from courses.cache import SYSTEM_SCOPE, bump_version, get_version, tenant_scope
+
+NAMESPACE = 'catalogue_list'
+
+_state = threading.local()
+
+
+def _bump(tenant_id):
+    bump_version(NAMESPACE, tenant_id)
+    bump_version(NAMESPACE, SYSTEM_SCOPE)
+
+
+def bump_tenant(tenant_id):
+    """
+    Invalidate the tenant's lists once the current transaction commits, so
+    a concurrent reader cannot re-cache the old rows under the new version.
+    """
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.add(tenant_id)
+        return
+    transaction.on_commit(partial(_bump, tenant_id))
+
+
+@contextmanager
+def coalesced():
+    """Collect the bumps of a bulk operation and apply each once at the end."""
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = set()
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+        for tenant_id in pending:
+            bump_tenant(tenant_id)
+
+
+def catalogue_list_key(user, query_string):
+    # Inactive catalogues are listed to roles with change_catalogue only,
+    # so the payload is shared per role, as in courses.cache
+    scope = tenant_scope(user)
+    version = get_version(NAMESPACE, scope)
+    query_hash = hashlib.md5(query_string.encode()).hexdigest()
+    return f'{NAMESPACE}_{scope}_v{version}_{user.role_name}_{query_hash}'
@@ -0,0 +1,140 @@
+"""
+Bulk catalogue membership.
+
+Courses are addressed by slug within the catalogue's tenant and resolved in
+one query. Rows are written with bulk_create / bulk_update and a gapped
+`order` is renumbered 1..n by a single UPDATE, so rebuilding a catalogue of
+hundreds of courses costs a handful of statements. bulk_create, bulk_update
+and raw UPDATEs send no signals, so every helper that changes rows bumps
+the catalogue list cache itself. Callers wrap the calls in a transaction
+and in catalogues.cache.coalesced(), so the cache is invalidated once,
+after the commit, rather than once per row.
+"""
+from django.db import connection
+from django.db.models import Max
+
+from courses.models import Course
+from . import cache as catalogue_cache
+from .models import CatalogueCourse
+
+BATCH_SIZE = 500
+
+
+def resolve_courses(catalogue, slugs):
+    """
+    Return (course ids in the order of `slugs`, unknown slugs) for courses
+    of the catalogue's tenant. Repeated slugs are kept once.
+    """
+    slugs = list(dict.fromkeys(slugs))
+    found = dict(
+        Course.objects.filter(tenant_id=catalogue.tenant_id, slug__in=slugs).values_list('slug', 'id')
+    )
+    return [found[slug] for slug in slugs if slug in found], [slug for slug in slugs if slug not in found]
+
+
+def add_courses(catalogue, course_ids, order=None):
+    """
+    Append the courses not yet in the catalogue after its last position
+    (or from `order` on). Returns the number added.
+    """
+    existing = set(
+        CatalogueCourse.objects.filter(catalogue=catalogue, course_id__in=course_ids)
+        .values_list('course_id', flat=True)
+    )
+    new_ids = [course_id for course_id in course_ids if course_id not in existing]
+    if not new_ids:
+        return 0
+    if order is None:
+        order = (catalogue.cataloguecourse_set.aggregate(Max('order'))['order__max'] or 0) + 1
+    CatalogueCourse.objects.bulk_create(
+        [
+            CatalogueCourse(tenant_id=catalogue.tenant_id, catalogue=catalogue, course_id=course_id, order=position)
+            for position, course_id in enumerate(new_ids, start=order)
+        ],
+        batch_size=BATCH_SIZE,
+        # A concurrent request may have added the same course
+        ignore_conflicts=True,
+    )
+    catalogue_cache.bump_tenant(catalogue.tenant_id)
+    return len(new_ids)
+
+
+def remove_courses(catalogue, course_ids):
+    """Remove the courses and close the gaps they leave. Returns the number removed."""
+    removed, _ = CatalogueCourse.objects.filter(catalogue=catalogue, course_id__in=course_ids).delete()
+    if removed:
+        compact_order(catalogue)
+        catalogue_cache.bump_tenant(catalogue.tenant_id)
+    return removed
+
+
+def reorder_courses(catalogue, course_ids):
+    """
+    Put the given courses first, in the given order, followed by the rest
+    in their current order. Returns the ids that are not in the catalogue.
+    """
+    rows = list(CatalogueCourse.objects.filter(catalogue=catalogue).order_by('order', 'id'))
+    by_course = {row.course_id: row for row in rows}
+    listed = [by_course[course_id] for course_id in course_ids if course_id in by_course]
+    listed_ids = {row.pk for row in listed}
+    _renumber(listed + [row for row in rows if row.pk not in listed_ids])
+    return [course_id for course_id in course_ids if course_id not in by_course]
+
+
+def set_courses(catalogue, course_ids):
+    """
+    Make the catalogue hold exactly `course_ids`, in that order.
+    Returns (added, removed).
+    """
+    rows = {row.course_id: row for row in CatalogueCourse.objects.filter(catalogue=catalogue)}
+    removed = 0
+    wanted = set(course_ids)
+    stale = [course_id for course_id in rows if course_id not in wanted]
+    if stale:
+        removed, _ = CatalogueCourse.objects.filter(catalogue=catalogue, course_id__in=stale).delete()
+
+    kept, new_rows = [], []
+    for position, course_id in enumerate(course_ids, start=1):
+        row = rows.get(course_id)
+        if row is None:
+            new_rows.append(CatalogueCourse(
+                tenant_id=catalogue.tenant_id, catalogue=catalogue, course_id=course_id, order=position
+            ))
+        elif row.order != position:
+            row.order = position
+            kept.append(row)
+    if kept:
+        CatalogueCourse.objects.bulk_update(kept, ['order'], batch_size=BATCH_SIZE)
+    if new_rows:
+        CatalogueCourse.objects.bulk_create(new_rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    if removed or kept or new_rows:
+        catalogue_cache.bump_tenant(catalogue.tenant_id)
+    return len(new_rows), removed
+
+
+def _renumber(rows):
+    changed = []
+    for position, row in enumerate(rows, start=1):
+        if row.order != position:
+            row.order = position
+            changed.append(row)
+    if changed:
+        CatalogueCourse.objects.bulk_update(changed, ['order'], batch_size=BATCH_SIZE)
+        catalogue_cache.bump_tenant(rows[0].tenant_id)
+
+
+def compact_order(catalogue):
+    """Renumber the catalogue's `order` to 1..n, keeping its sequence, in one UPDATE."""
+    table = connection.ops.quote_name(CatalogueCourse._meta.db_table)
+    order = connection.ops.quote_name('order')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET {order} = ranked.position FROM ('
+            f'SELECT id, ROW_NUMBER() OVER (ORDER BY {order}, id) AS position '
+            f'FROM {table} WHERE catalogue_id = %s'
+            f') AS ranked WHERE {table}.id = ranked.id AND {table}.{order} <> ranked.position',
+            [catalogue.pk]
+        )
+        if cursor.rowcount:
+            catalogue_cache.bump_tenant(catalogue.tenant_id)
+        return cursor.rowcount
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogues', '0001_initial'),
+        ('courses', '0004_query_indexes'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogue',
+            index=models.Index(fields=['tenant', 'slug'], name='catalogue_tenant_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogue',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['tenant'], name='catalogue_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cataloguecourse',
+            index=models.Index(fields=['catalogue', 'order'], name='cataloguecourse_order_idx'),
+        ),
+    ]
@@ -24,6 +24,12 @@ class Catalogue(AbstractTenantModel):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'slug'], name='catalogue_tenant_slug_idx'),
+            models.Index(fields=['tenant'], condition=models.Q(is_active=True), name='catalogue_active_idx'),
+        ]
+
 
 class CatalogueCourse(AbstractTenantModel):
     catalogue = models.ForeignKey(Catalogue, on_delete=models.CASCADE)
@@ -33,6 +39,9 @@ class CatalogueCourse(AbstractTenantModel):
     class Meta:
         ordering = ['order']
         unique_together = ['catalogue', 'course']
+        indexes = [
+            models.Index(fields=['catalogue', 'order'], name='cataloguecourse_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.catalogue.name} - {self.course.name}"
@@ -5,18 +5,44 @@ from courses.models import Course
 from courses.serializers import CourseSerializer
 
 
+class CataloguePreviewSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='course_id')
+    name = serializers.CharField(source='course.name')
+    slug = serializers.CharField(source='course.slug')
+
+    class Meta:
+        model = CatalogueCourse
+        fields = ['id', 'name', 'slug', 'order']
+
+
 class CatalogueSerializer(serializers.ModelSerializer):
     courses = serializers.SerializerMethodField()
+    published_courses = serializers.SerializerMethodField()
     tenant = serializers.SlugRelatedField(queryset=Tenant.objects.all(), slug_field='slug', required=False)
  
     class Meta:
         model = Catalogue
-        fields = ['id', 'name', 'slug', 'description', 'is_active', 'courses', 'tenant']
+        fields = ['id', 'name', 'slug', 'description', 'is_active', 'courses', 'published_courses', 'tenant']
         read_only_fields = ['id', 'tenant']
 
+    # Counts are annotated by CatalogueViewSet.get_queryset; a freshly
+    # created catalogue is counted directly
     def get_courses(self, obj):
-        published_courses = obj.courses.all().count()
-        return published_courses
+        if hasattr(obj, 'total_courses'):
+            return obj.total_courses
+        return obj.courses.count()
+
+    def get_published_courses(self, obj):
+        if hasattr(obj, 'published_course_count'):
+            return obj.published_course_count
+        return obj.courses.filter(status=Course.Status.PUBLISHED).count()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only present when the view prefetched it (?preview=N)
+        if hasattr(instance, 'preview_entries'):
+            data['preview'] = CataloguePreviewSerializer(instance.preview_entries, many=True).data
+        return data
 
     def validate_name(self, value):
         request = self.context.get('request')
@@ -43,3 +69,11 @@ class CatalogueCourseSerializer(serializers.ModelSerializer):
 class CatalogueAddRemoveSerializer(serializers.Serializer):
     course = serializers.CharField(help_text="Name of the course")
     order = serializers.IntegerField(required=False, help_text="Order in the catalogue (for adding)")
+
+
+class CatalogueCoursesSerializer(serializers.Serializer):
+    courses = serializers.ListField(
+        child=serializers.SlugField(),
+        max_length=1000,
+        help_text="Course slugs, in catalogue order"
+    )
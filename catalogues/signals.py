@@ -0,0 +1,30 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Course
+from . import cache as catalogue_cache
+from .models import Catalogue, CatalogueCourse
+
+
+# ==========================================
+# Catalogue List Cache Invalidation Signals
+# ==========================================
+# Bumps generation counters (see catalogues.cache) instead of deleting keys.
+
+
+@receiver(post_save, sender=Catalogue)
+@receiver(post_delete, sender=Catalogue)
+@receiver(post_save, sender=CatalogueCourse)
+@receiver(post_delete, sender=CatalogueCourse)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_catalogue_cache(sender, instance, **kwargs):
+    """Catalogue contents, or the name / status of a listed course, changed."""
+    catalogue_cache.bump_tenant(instance.tenant_id)
+
+
+@receiver(m2m_changed, sender=Catalogue.courses.through)
+def invalidate_catalogue_cache_m2m(sender, instance, action, **kwargs):
+    """catalogue.courses.add() / remove() / clear() bypass the post_save signals."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        catalogue_cache.bump_tenant(instance.tenant_id)
@@ -1,3 +1,186 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts import permission_cache
+from accounts.models import Role, User
+from accounts.serializers import TenantTokenObtainPairSerializer
+from benchmarks.fixtures import seed_role_permissions
+from courses.models import Course
+from tenants.models import Tenant
+from . import cache as catalogue_cache
+from . import membership
+from .models import Catalogue, CatalogueCourse
+
+LIST_URL = '/api/catalogues/?page_size=50'
+
+
+def make_client(tenant, username, role):
+    user = User.objects.create_user(
+        f'{username}@example.test', username, 'pass',
+        tenant=tenant, role=Role.objects.get(name=role), is_active=True,
+    )
+    client = APIClient()
+    token = TenantTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+class CatalogueTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_role_permissions()
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.courses = [
+            Course.objects.create(tenant=cls.tenant, name=f'Course {i}', description='', status=status)
+            for i, status in enumerate(['PUBLISHED', 'PUBLISHED', 'PUBLISHED', 'DRAFT'])
+        ]
+
+    def setUp(self):
+        self.clear_caches()
+
+    def clear_caches(self):
+        cache.clear()
+        permission_cache.local_cache.clear()
+
+    def make_catalogue(self, name, courses=()):
+        catalogue = Catalogue.objects.create(tenant=self.tenant, name=name)
+        for order, course in enumerate(courses, start=1):
+            CatalogueCourse.objects.create(tenant=self.tenant, catalogue=catalogue, course=course, order=order)
+        return catalogue
+
+    def listed(self, client):
+        return {row['slug']: row for row in client.get(LIST_URL).data['results']}
+
+
+class CatalogueListTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = make_client(self.tenant, 'admin', 'TENANT_ADMIN')
+
+    def test_counts_are_annotated(self):
+        self.make_catalogue('Mixed', self.courses)
+        row = self.listed(self.client)['mixed']
+        self.assertEqual((row['courses'], row['published_courses']), (4, 3))
+
+    def test_query_count_does_not_grow_with_catalogues(self):
+        self.make_catalogue('First', self.courses[:2])
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(LIST_URL + '&preview=2')
+
+        for index in range(4):
+            self.make_catalogue(f'More {index}', self.courses)
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as five:
+            response = self.client.get(LIST_URL + '&preview=2')
+
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(five), len(one))
+        self.assertTrue(all(len(row['preview']) == 2 for row in response.data['results']))
+
+    def test_list_is_invalidated_after_commit(self):
+        catalogue = self.make_catalogue('Python', self.courses[:1])
+        self.assertEqual(self.listed(self.client)['python']['courses'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogueCourse.objects.create(tenant=self.tenant, catalogue=catalogue, course=self.courses[1], order=2)
+        self.assertEqual(self.listed(self.client)['python']['courses'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(pk=self.courses[1].pk).get().delete()
+        self.assertEqual(self.listed(self.client)['python']['courses'], 1)
+
+    def test_learners_see_active_catalogues_only(self):
+        self.make_catalogue('Open')
+        Catalogue.objects.create(tenant=self.tenant, name='Hidden', is_active=False)
+        learner = make_client(self.tenant, 'learner', 'TENANT_USER')
+        self.assertEqual(set(self.listed(learner)), {'open'})
+
+    def test_admin_lists_are_not_served_to_learners(self):
+        self.make_catalogue('Open')
+        Catalogue.objects.create(tenant=self.tenant, name='Hidden', is_active=False)
+        self.assertEqual(set(self.listed(self.client)), {'open', 'hidden'})
+
+        learner = make_client(self.tenant, 'learner', 'TENANT_USER')
+        self.assertEqual(set(self.listed(learner)), {'open'})
+
+    def test_super_admins_name_the_tenant_of_a_shared_slug(self):
+        self.make_catalogue('Python')
+        Catalogue.objects.create(tenant=Tenant.objects.create(name='Globex'), name='Python')
+        client = make_client(None, 'root', 'SUPER_ADMIN')
+
+        self.assertEqual(client.get('/api/catalogues/python/').status_code, 400)
+        response = client.get('/api/catalogues/python/?tenant=globex')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tenant'], 'globex')
+        self.assertEqual(self.client.get('/api/catalogues/python/?tenant=globex').status_code, 404)
+
+
+class MembershipTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.catalogue = self.make_catalogue('Bundle')
+        self.slugs = [course.slug for course in self.courses]
+
+    def order(self):
+        rows = CatalogueCourse.objects.filter(catalogue=self.catalogue).order_by('order')
+        return [(row.order, row.course.slug) for row in rows.select_related('course')]
+
+    def test_resolve_courses_keeps_slug_order(self):
+        other = Course.objects.create(tenant=Tenant.objects.create(name='Globex'), name='Elsewhere', description='')
+        ids, missing = membership.resolve_courses(
+            self.catalogue, [self.slugs[2], self.slugs[0], self.slugs[2], other.slug, 'nope']
+        )
+        self.assertEqual(ids, [self.courses[2].id, self.courses[0].id])
+        self.assertEqual(missing, [other.slug, 'nope'])
+
+    def test_add_appends_new_courses_only(self):
+        self.assertEqual(membership.add_courses(self.catalogue, [self.courses[1].id, self.courses[0].id]), 2)
+        self.assertEqual(membership.add_courses(self.catalogue, [self.courses[0].id, self.courses[2].id]), 1)
+        self.assertEqual(self.order(), [(1, self.slugs[1]), (2, self.slugs[0]), (3, self.slugs[2])])
+
+    def test_remove_closes_the_gaps(self):
+        membership.add_courses(self.catalogue, [course.id for course in self.courses])
+        self.assertEqual(membership.remove_courses(self.catalogue, [self.courses[0].id, self.courses[2].id]), 2)
+        self.assertEqual(self.order(), [(1, self.slugs[1]), (2, self.slugs[3])])
+
+    def test_reorder_moves_listed_courses_first(self):
+        membership.add_courses(self.catalogue, [course.id for course in self.courses[:3]])
+        missing = membership.reorder_courses(self.catalogue, [self.courses[2].id, self.courses[3].id])
+        self.assertEqual(missing, [self.courses[3].id])
+        self.assertEqual(self.order(), [(1, self.slugs[2]), (2, self.slugs[0]), (3, self.slugs[1])])
+
+    def test_set_makes_the_catalogue_hold_exactly_the_courses(self):
+        membership.add_courses(self.catalogue, [course.id for course in self.courses[:3]])
+        added, removed = membership.set_courses(self.catalogue, [self.courses[3].id, self.courses[1].id])
+        self.assertEqual((added, removed), (1, 2))
+        self.assertEqual(self.order(), [(1, self.slugs[3]), (2, self.slugs[1])])
+
+    def test_bulk_writes_bump_the_list_once_after_commit(self):
+        version = catalogue_cache.get_version(catalogue_cache.NAMESPACE, self.tenant.id)
+        with self.captureOnCommitCallbacks() as callbacks, catalogue_cache.coalesced():
+            membership.add_courses(self.catalogue, [course.id for course in self.courses])
+            membership.remove_courses(self.catalogue, [self.courses[0].id])
+        self.assertEqual(catalogue_cache.get_version(catalogue_cache.NAMESPACE, self.tenant.id), version)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(catalogue_cache.get_version(catalogue_cache.NAMESPACE, self.tenant.id), version + 1)
+
+    def test_bulk_endpoint_refreshes_the_list(self):
+        client = make_client(self.tenant, 'admin', 'TENANT_ADMIN')
+        self.assertEqual(self.listed(client)['bundle']['courses'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/catalogues/bundle/add_courses/', {'courses': self.slugs}, format='json')
+        self.assertEqual(response.data, {'added': 4})
+        self.assertEqual(self.listed(client)['bundle']['courses'], 4)
+
+        response = client.post('/api/catalogues/bundle/add_courses/', {'courses': ['nope']}, format='json')
+        self.assertEqual(response.status_code, 400)
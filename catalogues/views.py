@@ -1,20 +1,28 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from .models import Catalogue, Course
-from .serializers import CatalogueSerializer, CourseSerializer, CatalogueAddRemoveSerializer
+from .models import Catalogue, CatalogueCourse, Course
+from .serializers import CatalogueSerializer, CourseSerializer, CatalogueAddRemoveSerializer, CatalogueCoursesSerializer
 from accounts.permissions import RolePermission 
-from django.db.models import Max
+from tenants.mixins import TenantSlugLookupMixin
+from django.db import transaction
+from django.db.models import Count, Q, Prefetch
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from . import cache as catalogue_cache
+from . import membership
+from observability.metrics import record_cache
 
 User = get_user_model()
 
 # Create your views here.
 
 # TenantAdmin manages catalogues
-class CatalogueViewSet(viewsets.ModelViewSet):
+class CatalogueViewSet(TenantSlugLookupMixin, viewsets.ModelViewSet):
     queryset = Catalogue.objects.all()
     serializer_class = CatalogueSerializer
     lookup_field = 'slug'
@@ -23,8 +31,60 @@ class CatalogueViewSet(viewsets.ModelViewSet):
         permission_classes = [RolePermission]
         return [permission() for permission in permission_classes]
 
+    # Largest ?preview=N accepted
+    max_preview = 10
+    # Membership changes need change_catalogue (see RolePermission)
+    action_permissions = {
+        'add_course': 'change',
+        'remove_course': 'change',
+        'add_courses': 'change',
+        'remove_courses': 'change',
+        'reorder_courses': 'change',
+        'set_courses': 'change',
+    }
+
     def get_queryset(self):
-        return Catalogue.objects.for_current_user().select_related('tenant')
+        """
+        Course counts are annotated and the ?preview=N first published
+        courses come from one prefetch, so a page costs the same number of
+        queries however many catalogues and courses it has.
+        """
+        queryset = Catalogue.objects.for_current_user().select_related('tenant')
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        queryset = queryset.annotate(
+            total_courses=Count('cataloguecourse'),
+            published_course_count=Count(
+                'cataloguecourse',
+                filter=Q(cataloguecourse__course__status=Course.Status.PUBLISHED)
+            ),
+        )
+        preview = self.get_preview_size()
+        if preview:
+            entries = CatalogueCourse.objects.filter(
+                course__status=Course.Status.PUBLISHED
+            ).select_related('course').order_by('order', 'id')
+            queryset = queryset.prefetch_related(
+                Prefetch('cataloguecourse_set', queryset=entries[:preview], to_attr='preview_entries')
+            )
+        return queryset
+
+    def get_preview_size(self):
+        try:
+            size = int(self.request.query_params.get('preview', 0))
+        except ValueError:
+            return 0
+        return max(0, min(size, self.max_preview))
+
+    def list(self, request, *args, **kwargs):
+        key = catalogue_cache.catalogue_list_key(request.user, request.META.get('QUERY_STRING', ''))
+        data = cache.get(key)
+        record_cache('catalogue_list', data is not None)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+        return Response(data)
 
 
     def perform_create(self, serializer):
@@ -44,18 +104,17 @@ class CatalogueViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def add_course(self, request, slug=None):
         catalogue = self.get_object()
-        try:
-            course_name = request.data.get('course')
-            course = Course.objects.get(name=course_name)
-        except Course.DoesNotExist:
+        serializer = CatalogueAddRemoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course = Course.objects.filter(
+            tenant_id=catalogue.tenant_id,
+            name=serializer.validated_data['course']
+        ).first()
+        if course is None:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-        order = request.data.get('order')
-        if order is None:
-             current_max = catalogue.cataloguecourse_set.aggregate(Max('order'))['order__max']
-             order = (current_max or 0) + 1
-    
-        catalogue.courses.add(course, through_defaults={'order': order, 'tenant': catalogue.tenant})
+
+        with transaction.atomic(), catalogue_cache.coalesced():
+            membership.add_courses(catalogue, [course.id], order=serializer.validated_data.get('order'))
         return Response({'message': 'Course added successfully'} , status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -72,14 +131,71 @@ class CatalogueViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['delete'])
     def remove_course(self, request, slug=None):
         catalogue = self.get_object()
-        try:
-            course_slug = request.data.get('course_slug')
-            course = Course.objects.get(slug=course_slug)
-        except Course.DoesNotExist:
+        course_ids, _ = membership.resolve_courses(catalogue, [request.data.get('course_slug')])
+        if not course_ids:
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        if not catalogue.courses.filter(id=course.id).exists():
+
+        with transaction.atomic(), catalogue_cache.coalesced():
+            removed = membership.remove_courses(catalogue, course_ids)
+        if not removed:
              return Response({'error': 'Course is not in this catalogue'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Course removed successfully'})
+
+    # ==========================================
+    # Bulk membership
+    # ==========================================
+    # Each takes {"courses": [course slugs]} and resolves every slug in one
+    # query; an unknown slug rejects the whole request.
 
-        catalogue.courses.remove(course)
-        return Response({'message': 'Course removed successfully'})
\ No newline at end of file
+    def _resolve_bulk(self, request):
+        catalogue = self.get_object()
+        serializer = CatalogueCoursesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course_ids, missing = membership.resolve_courses(catalogue, serializer.validated_data['courses'])
+        if missing:
+            raise ValidationError({'courses': [f"Unknown course slug(s): {', '.join(missing)}"]})
+        return catalogue, course_ids
+
+    @extend_schema(
+        request=CatalogueCoursesSerializer,
+        responses={200: {'description': 'Courses appended in the given order'}}
+    )
+    @action(detail=True, methods=['post'])
+    def add_courses(self, request, slug=None):
+        catalogue, course_ids = self._resolve_bulk(request)
+        with transaction.atomic(), catalogue_cache.coalesced():
+            added = membership.add_courses(catalogue, course_ids)
+        return Response({'added': added})
+
+    @extend_schema(
+        request=CatalogueCoursesSerializer,
+        responses={200: {'description': 'Courses removed and order compacted'}}
+    )
+    @action(detail=True, methods=['post'])
+    def remove_courses(self, request, slug=None):
+        catalogue, course_ids = self._resolve_bulk(request)
+        with transaction.atomic(), catalogue_cache.coalesced():
+            removed = membership.remove_courses(catalogue, course_ids)
+        return Response({'removed': removed})
+
+    @extend_schema(
+        request=CatalogueCoursesSerializer,
+        responses={200: {'description': 'Listed courses moved to the front, in the given order'}}
+    )
+    @action(detail=True, methods=['post'])
+    def reorder_courses(self, request, slug=None):
+        catalogue, course_ids = self._resolve_bulk(request)
+        with transaction.atomic(), catalogue_cache.coalesced():
+            not_listed = membership.reorder_courses(catalogue, course_ids)
+        return Response({'reordered': len(course_ids) - len(not_listed)})
+
+    @extend_schema(
+        request=CatalogueCoursesSerializer,
+        responses={200: {'description': 'Catalogue now holds exactly these courses, in this order'}}
+    )
+    @action(detail=True, methods=['put'])
+    def set_courses(self, request, slug=None):
+        catalogue, course_ids = self._resolve_bulk(request)
+        with transaction.atomic(), catalogue_cache.coalesced():
+            added, removed = membership.set_courses(catalogue, course_ids)
+        return Response({'added': added, 'removed': removed, 'courses': len(course_ids)})
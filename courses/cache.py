@@ -0,0 +1,147 @@
+"""
+Version-stamped caching for course data.
+
+Cache keys embed generation counters instead of being deleted on write: a
+write bumps the tenant (or user) counter, so every key built from the old
+value simply stops being read and ages out via its TTL. Invalidation is a
+single INCR and never needs a keyspace scan.
+
+The course list is cached in two layers:
+- a shared payload per tenant scope, role and query string, and
+- a per-user overlay with the `enrolled` / `progress` fields.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from enrollments.models import Enrollment
+from observability.metrics import record_cache
+
+SYSTEM_SCOPE = 'system'
+
+
+def _version_key(namespace, scope):
+    return f'{namespace}_version_{scope}'
+
+
+def _initial_version():
+    # Seed missing counters from the clock so a counter that was evicted can
+    # never restart at a value whose old keys are still cached.
+    return int(time.time() * 1000)
+
+
+def get_versions(namespace, scopes):
+    """Fetch several generation counters in one round trip."""
+    keys = {_version_key(namespace, scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, scope in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _initial_version(), timeout=None)
+            version = cache.get(key)
+        versions[scope] = version
+    return versions
+
+
+def get_version(namespace, scope):
+    return get_versions(namespace, [scope])[scope]
+
+
+def bump_version(namespace, scope):
+    """Invalidate everything cached under `scope` in O(1)."""
+    key = _version_key(namespace, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+# ==========================================
+# Course list
+# ==========================================
+
+def tenant_scope(user):
+    """Super Admins see every tenant, so they share the 'system' scope."""
+    if user.role_name == 'SUPER_ADMIN' or not user.tenant_id:
+        return SYSTEM_SCOPE
+    return user.tenant_id
+
+
+def user_scope(user):
+    return f'user_{user.id}'
+
+
+def bump_tenant(tenant_id):
+    """Course-structure change: invalidate the tenant and the system scope."""
+    bump_version('course_list', tenant_id)
+    bump_version('course_list', SYSTEM_SCOPE)
+
+
+def bump_user(user_id):
+    """Enrollment/progress change: invalidate one user's overlay."""
+    bump_version('course_list', f'user_{user_id}')
+
+
+def course_list_keys(user, query_string, per_user=False):
+    """
+    Return (shared_key, overlay_key) for a course list request.
+    `per_user` scopes the shared payload to the user for user-dependent
+    filters such as ?enrolled=true.
+    """
+    scope = tenant_scope(user)
+    versions = get_versions('course_list', [scope, user_scope(user)])
+    tenant_version = versions[scope]
+    query_hash = hashlib.md5(query_string.encode()).hexdigest()
+
+    audience = f'user{user.id}' if per_user else user.role_name
+    shared_key = f'course_list_{scope}_v{tenant_version}_{audience}_{query_hash}'
+    overlay_key = f'course_progress_{user.id}_v{versions[user_scope(user)]}_t{tenant_version}'
+    return shared_key, overlay_key
+
+
+def get_progress_overlay(user, overlay_key):
+    """Map course_id -> progress percentage for the user's enrollments."""
+    overlay = cache.get(overlay_key)
+    record_cache('course_progress', overlay is not None)
+    if overlay is None:
+        overlay = {}
+        rows = Enrollment.objects.filter(user=user.id).values_list(
+            'course_id', 'completed_submodules', 'course__total_submodules'
+        )
+        for course_id, completed, total in rows:
+            overlay[course_id] = (completed / total * 100) if total else 0.0
+        cache.set(overlay_key, overlay, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+    return overlay
+
+
+def apply_progress_overlay(data, overlay):
+    """Overwrite the per-user fields of a (possibly shared) list payload."""
+    results = data['results'] if isinstance(data, dict) else data
+    for item in results:
+        item['enrolled'] = item['id'] in overlay
+        item['progress'] = overlay.get(item['id'], 0.0)
+    return data
+
+
+# ==========================================
+# Course tree
+# ==========================================
+# The outline is shared per course version; completion is a per-user overlay
+# versioned with the user's course-list overlay (bump_user).
+
+def bump_course(course_id):
+    """Course, module or submodule change: invalidate the course's tree."""
+    bump_version('course_tree', course_id)
+
+
+def course_tree_keys(user, course_id):
+    """Return (tree_key, overlay_key) for a course tree request."""
+    tree_version = get_version('course_tree', course_id)
+    user_version = get_version('course_list', user_scope(user))
+    return (
+        f'course_tree_{course_id}_v{tree_version}',
+        f'course_tree_progress_{user.id}_{course_id}_v{user_version}',
+    )
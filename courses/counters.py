@@ -0,0 +1,101 @@
+"""
+Denormalized progress counters.
+
+Course.total_submodules, Course.total_enrollments and
+Enrollment.completed_submodules replace the COUNT(DISTINCT) joins the course
+list used to run on every request. Signals apply single-row deltas as rows
+are written; the recount helpers rebuild the counters from scratch and back
+the `reconcile_course_counters` management command.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Course, SubModule
+from enrollments.models import Enrollment, SubModuleProgress
+
+
+def _adjust(queryset, field, delta):
+    """Apply `delta` to a counter column without letting it drop below zero."""
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def adjust_course_submodules(module_id, delta):
+    """Adjust total_submodules on the course owning `module_id`."""
+    return _adjust(Course.objects.filter(modules=module_id), 'total_submodules', delta)
+
+
+def adjust_course_enrollments(course_id, delta):
+    return _adjust(Course.objects.filter(pk=course_id), 'total_enrollments', delta)
+
+
+def adjust_enrollment_completed(enrollment_id, delta):
+    return _adjust(Enrollment.objects.filter(pk=enrollment_id), 'completed_submodules', delta)
+
+
+def _count_subquery(queryset, group_field):
+    """Correlated COUNT(*) subquery for use in annotate()/update()."""
+    counted = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def submodule_count():
+    return _count_subquery(
+        SubModule.objects.filter(module__course=OuterRef('pk')), 'module__course'
+    )
+
+
+def enrollment_count():
+    return _count_subquery(
+        Enrollment.objects.filter(course=OuterRef('pk')), 'course'
+    )
+
+
+def completed_count():
+    return _count_subquery(
+        SubModuleProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True),
+        'enrollment'
+    )
+
+
+def recount_courses(queryset=None):
+    """Rebuild course counters in a single UPDATE. Returns rows touched."""
+    if queryset is None:
+        queryset = Course.objects.all()
+    return queryset.update(
+        total_submodules=submodule_count(),
+        total_enrollments=enrollment_count(),
+    )
+
+
+def recount_enrollments(queryset=None):
+    """Rebuild enrollment counters in a single UPDATE. Returns rows touched."""
+    if queryset is None:
+        queryset = Enrollment.objects.all()
+    return queryset.update(completed_submodules=completed_count())
+
+
+def drifted_courses(queryset=None):
+    """Courses whose stored counters disagree with the source tables."""
+    if queryset is None:
+        queryset = Course.objects.all()
+    return queryset.annotate(
+        actual_submodules=submodule_count(),
+        actual_enrollments=enrollment_count(),
+    ).filter(
+        ~Q(total_submodules=F('actual_submodules')) |
+        ~Q(total_enrollments=F('actual_enrollments'))
+    )
+
+
+def drifted_enrollments(queryset=None):
+    """Enrollments whose stored completed count disagrees with progress rows."""
+    if queryset is None:
+        queryset = Enrollment.objects.all()
+    return queryset.annotate(
+        actual_completed=completed_count(),
+    ).exclude(completed_submodules=F('actual_completed'))
@@ -1,5 +1,8 @@
 import django_filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 from .models import Course
+from . import search
 
 
 class CourseFilter(django_filters.FilterSet):
@@ -29,5 +32,34 @@ class CourseFilter(django_filters.FilterSet):
 
     class Meta:
         model = Course
-        fields = [] 
+        fields = []
 
+
+class CourseSearchFilter(BaseFilterBackend):
+    """
+    Full-text search (see courses.search):
+    - /api/courses/?q=python basics
+    - /api/courses/?q="machine learning" -beginner
+
+    Results come best match first unless ?ordering= is given, so this
+    backend must come after OrderingFilter.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        results = search.search(queryset, terms)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return results.order_by(*queryset.query.order_by)
+        return results
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search over name, skills, module titles and description, ranked by relevance.',
+            'schema': {'type': 'string'},
+        }]
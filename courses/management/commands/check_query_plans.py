@@ -0,0 +1,151 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from accounts.views import UserViewSet
+from catalogues.views import CatalogueViewSet
+from courses.models import Course, Module
+from courses.views import CourseViewSet, ModuleViewSet, SubModuleViewSet
+from enrollments.models import Enrollment, SubModuleProgress
+from enrollments.views import EnrollmentViewSet, SubModuleProgressViewSet
+from payments.models import Payment
+from payments.views import PaymentViewSet
+from skills.views import UserSkillViewSet
+from tenants.managers import get_current_user, set_current_user
+from tenants.models import Tenant
+
+# Small reference tables where a sequential scan is the right plan
+ALLOWED_SEQ_SCANS = {'accounts_role', 'tenants_tenant', 'django_content_type', 'auth_permission'}
+
+SEQ_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)'),
+}
+
+# (label, viewset, URL kwargs built from the sample rows, extra filter)
+VIEWSET_QUERIES = [
+    ('courses:list', CourseViewSet, lambda s: {}, None),
+    ('courses:detail', CourseViewSet, lambda s: {}, lambda s: {'slug': s['course'].slug}),
+    ('modules:list', ModuleViewSet, lambda s: {'course_slug': s['course'].slug}, None),
+    ('submodules:list', SubModuleViewSet,
+     lambda s: {'course_slug': s['course'].slug, 'module_slug': s['module'].slug}, None),
+    ('enrollments:list', EnrollmentViewSet, lambda s: {}, None),
+    ('progress:list', SubModuleProgressViewSet, lambda s: {}, None),
+    ('payments:list', PaymentViewSet, lambda s: {}, None),
+    ('catalogues:list', CatalogueViewSet, lambda s: {}, None),
+    ('users:list', UserViewSet, lambda s: {}, None),
+    ('user-skills:list', UserSkillViewSet, lambda s: {}, None),
+]
+
+# Hot lookups made outside the list endpoints
+EXTRA_QUERIES = [
+    ('payments:checkout-pending', lambda s: Payment.objects.filter(
+        user=s['user'], course=s['course'], status=Payment.Status.PENDING)[:1]),
+    ('payments:webhook-intent', lambda s: Payment.objects.filter(stripe_payment_intent_id='pi_check')[:1]),
+    ('progress:completed-count', lambda s: SubModuleProgress.objects.filter(
+        enrollment=s['enrollment'], is_completed=True).order_by().values('enrollment').annotate(n=Count('id'))),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the canonical query of each list endpoint for a tenant admin "
+        "and a tenant user, and fail if any plan sequentially scans a table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Tenant slug to take sample users and rows from.')
+        parser.add_argument(
+            '--allow',
+            action='append',
+            default=[],
+            help='Table allowed to be sequentially scanned (repeatable).'
+        )
+        parser.add_argument(
+            '--roles',
+            default='TENANT_ADMIN,TENANT_USER',
+            help='Comma separated roles to check the queries as.'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        pattern = SEQ_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Plan checks are not supported on {connection.vendor}.")
+        allowed = ALLOWED_SEQ_SCANS | set(options['allow'])
+
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+        tenant = tenants.filter(users__isnull=False).order_by('pk').first()
+        if tenant is None:
+            raise CommandError("No tenant with users to sample queries from.")
+
+        failures = []
+        previous_user = get_current_user()
+        try:
+            for role in options['roles'].split(','):
+                user = (
+                    User.objects.filter(tenant=tenant, role__name=role.strip(), is_active=True)
+                    .select_related('role', 'tenant').order_by('pk').first()
+                )
+                if user is None:
+                    self.stdout.write(self.style.WARNING(f"No active {role} in {tenant.slug}; skipped."))
+                    continue
+                sample = self._sample(tenant, user)
+                for label, queryset in self._queries(user, sample):
+                    scans = self._seq_scans(queryset, pattern) - allowed
+                    if scans:
+                        failures.append(f"{role} {label}: {', '.join(sorted(scans))}")
+                        self.stdout.write(self.style.ERROR(f"{role} {label}: seq scan on {', '.join(sorted(scans))}"))
+                    else:
+                        self.stdout.write(f"{role} {label}: ok")
+        finally:
+            set_current_user(previous_user)
+
+        if failures:
+            raise CommandError(f"{len(failures)} query plan(s) use sequential scans.")
+        self.stdout.write(self.style.SUCCESS("All query plans use indexes."))
+
+    def _sample(self, tenant, user):
+        course = Course.objects.filter(tenant=tenant).order_by('pk').first()
+        return {
+            'user': user,
+            'course': course or Course(slug='missing', tenant=tenant),
+            'module': Module.objects.filter(course=course).order_by('pk').first() or Module(slug='missing'),
+            'enrollment': Enrollment.objects.filter(tenant=tenant).order_by('pk').first() or Enrollment(pk=0),
+        }
+
+    def _queries(self, user, sample):
+        factory = APIRequestFactory()
+        set_current_user(user)
+        for label, viewset, url_kwargs, lookup in VIEWSET_QUERIES:
+            request = Request(factory.get('/'))
+            request.user = user
+            view = viewset(request=request, args=(), kwargs=url_kwargs(sample), format_kwarg=None)
+            view.action = 'retrieve' if lookup else 'list'
+            queryset = view.filter_queryset(view.get_queryset())
+            if lookup:
+                queryset = queryset.filter(**lookup(sample))[:1]
+            elif view.paginator is not None:
+                queryset = queryset[:view.paginator.page_size]
+            yield label, queryset
+        for label, build in EXTRA_QUERIES:
+            yield label, build(sample)
+
+    def _seq_scans(self, queryset, pattern):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Tiny sample tables make any plan look best as a seq scan;
+                # with seq scans priced out, one only remains if no index fits
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        if self.verbosity > 1:
+            self.stdout.write(plan)
+        return set(pattern.findall(plan))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses import counters
+from courses.models import Course
+from enrollments.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized course and enrollment progress counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only reconcile courses of this tenant slug.')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without writing.'
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        enrollments = Enrollment.objects.all()
+        if options['tenant']:
+            courses = courses.filter(tenant__slug=options['tenant'])
+            enrollments = enrollments.filter(tenant__slug=options['tenant'])
+
+        drifted_course_ids = list(counters.drifted_courses(courses).values_list('pk', flat=True))
+        drifted_enrollment_ids = list(counters.drifted_enrollments(enrollments).values_list('pk', flat=True))
+
+        self.stdout.write(
+            f"{len(drifted_course_ids)} course(s) and "
+            f"{len(drifted_enrollment_ids)} enrollment(s) out of date."
+        )
+        if options['dry_run']:
+            return
+
+        with transaction.atomic():
+            counters.recount_courses(Course.objects.filter(pk__in=drifted_course_ids))
+            counters.recount_enrollments(Enrollment.objects.filter(pk__in=drifted_enrollment_ids))
+
+        self.stdout.write(self.style.SUCCESS("Counters reconciled."))
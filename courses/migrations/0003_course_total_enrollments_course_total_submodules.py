@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_content_picture_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='total_enrollments',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_submodules',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_total_enrollments_course_total_submodules'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='course_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['tenant', '-created_at', '-id'], name='course_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['slug', 'tenant'], name='course_slug_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['course', 'order'], name='module_course_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['course', 'slug'], name='module_course_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submodule',
+            index=models.Index(fields=['module', 'order'], name='submodule_module_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submodule',
+            index=models.Index(fields=['module', 'slug'], name='submodule_module_slug_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Func, OuterRef, TextField, Value
+
+
+def fill_search_vectors(apps, schema_editor):
+    # Frozen copy of courses.search.document() as of this migration
+    Course = apps.get_model('courses', 'Course')
+    Module = apps.get_model('courses', 'Module')
+    CourseSkill = apps.get_model('skills', 'CourseSkill')
+
+    def joined(model, field):
+        return Func(
+            ArraySubquery(model._base_manager.filter(course=OuterRef('pk')).order_by().values(field)),
+            Value(' '),
+            function='array_to_string',
+            output_field=TextField(),
+        )
+
+    Course._base_manager.update(search_vector=(
+        SearchVector('name', weight='A', config='english')
+        + SearchVector(joined(CourseSkill, 'skill__name'), joined(Module, 'title'), weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_query_indexes'),
+        ('skills', '0001_initial'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='course_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from django.utils.translation import gettext_lazy as _
@@ -29,8 +31,28 @@ class Course(AbstractTenantModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized counters kept current by signals (see courses.counters).
+    total_submodules = models.PositiveIntegerField(default=0, editable=False)
+    total_enrollments = models.PositiveIntegerField(default=0, editable=False)
+
+    # Weighted name/skills/modules/description document (see courses.search).
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Tenant admins list every status; students only see published
+            models.Index(fields=['tenant', '-created_at', '-id'], name='course_tenant_created_idx'),
+            models.Index(
+                fields=['tenant', '-created_at', '-id'],
+                condition=models.Q(status='PUBLISHED'),
+                name='course_published_idx'
+            ),
+            models.Index(fields=['slug', 'tenant'], name='course_slug_tenant_idx'),
+            GinIndex(fields=['search_vector'], name='course_search_idx'),
+            # Typo-tolerant fallback for ?q= (pg_trgm)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='course_name_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -50,6 +72,10 @@ class Module(AbstractTenantModel):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['course', 'order'], name='module_course_order_idx'),
+            models.Index(fields=['course', 'slug'], name='module_course_slug_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.name} - {self.title}"
@@ -75,6 +101,10 @@ class SubModule(AbstractTenantModel):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['module', 'order'], name='submodule_module_order_idx'),
+            models.Index(fields=['module', 'slug'], name='submodule_module_slug_idx'),
+        ]
 
     def __str__(self):
         return f"{self.module.title} - {self.title}"
@@ -1,6 +1,250 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder rounds datetimes to milliseconds; cursors need them exact."""
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the queryset's ordering tuple, e.g.
+    (created_at, id). Each page is a range scan from the last row of the
+    previous one - `WHERE (created_at, id) < (...)` - so deep pages cost the
+    same as the first and no COUNT(*) runs unless `?count=true` asks for it.
+
+    The ordering comes from, in order: the queryset's order_by() (so
+    OrderingFilter's ?ordering= keeps working), `view.keyset_ordering`, the
+    model's Meta.ordering, else `-pk`. Expression orderings are skipped
+    (`-pk` is used when nothing else is left) and the primary key is
+    appended as a tie-breaker when missing; NULLs sort last.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset, view):
+        ordering = (
+            queryset.query.order_by or
+            getattr(view, 'keyset_ordering', None) or
+            queryset.model._meta.ordering or
+            ['-pk']
+        )
+        # Expression orderings can't be keyed; fall back to -pk if none are left
+        ordering = [field for field in ordering if isinstance(field, str)] or ['-pk']
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', 'id', queryset.model._meta.pk.name}:
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        return ordering
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'v': values, 'r': reverse}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return payload['v'], bool(payload.get('r'))
+        except (ValueError, TypeError, KeyError):
+            raise NotFound('Invalid cursor.')
+
+    def _after(self, ordering, values, nulls_last=True):
+        """
+        Rows strictly after `values` in `ordering` (lexicographic tuple
+        compare), with NULLs sorted after (or before) every other value.
+        """
+        condition = Q()
+        equal = Q()
+        for index, (field, value) in enumerate(zip(ordering, values)):
+            name = f'_keyset_{index}'
+            if value is None:
+                if not nulls_last:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            after = Q(**{f'{name}__{lookup}': value})
+            if nulls_last:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def _order_by(self, ordering, nulls_last=True):
+        nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+        return [
+            OrderBy(F(f'_keyset_{index}'), descending=field.startswith('-'), **nulls)
+            for index, field in enumerate(ordering)
+        ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset, view)
+        self.ordering = ordering
+
+        annotations = {f'_keyset_{index}': F(field.lstrip('-')) for index, field in enumerate(ordering)}
+        keyed = queryset.annotate(**annotations)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('true', '1', 'yes'):
+            self.count = queryset.count()
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        values, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+        if reverse:
+            # Walk backwards: flip every direction, then restore the order
+            flipped = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+            keyed = keyed.filter(self._after(flipped, values, nulls_last=False))
+            keyed = keyed.order_by(*self._order_by(flipped, nulls_last=False))
+        else:
+            if values is not None:
+                keyed = keyed.filter(self._after(ordering, values))
+            keyed = keyed.order_by(*self._order_by(ordering))
+
+        rows = list(keyed[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        def key_of(row):
+            return [getattr(row, f'_keyset_{index}') for index in range(len(ordering))]
+
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows:
+            # Going backwards, the page we came from is always next; going
+            # forwards, any cursor means an earlier page exists
+            if reverse or has_more:
+                self.next_cursor = self.encode_cursor(key_of(rows[-1]))
+            if (has_more if reverse else values is not None):
+                self.previous_cursor = self.encode_cursor(key_of(rows[0]), reverse=True)
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to KeysetPagination when the
+    request carries `?cursor=` (empty for the first page) or the view sets
+    `pagination_mode = 'cursor'`. `?count=false` skips the COUNT(*) in
+    page-number mode too.
+    """
     page_size = 3
     page_size_query_param = 'page_size'
     max_page_size = 100
+    count_query_param = 'count'
+
+    def _use_cursor(self, request, view):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return True
+        return getattr(view, 'pagination_mode', 'page') == 'cursor' and self.page_query_param not in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self._use_cursor(request, view):
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0', 'no'):
+            return self._paginate_without_count(queryset, request)
+        self.uncounted = False
+        return super().paginate_queryset(queryset, request, view)
+
+    def _paginate_without_count(self, queryset, request):
+        """OFFSET page that detects a next page by fetching one extra row."""
+        self.request = request
+        self.uncounted = True
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except ValueError:
+            raise NotFound('Invalid page.')
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        if not self.uncounted:
+            return super().get_paginated_response(data)
+
+        url = self.request.build_absolute_uri()
+        next_link = replace_query_param(url, self.page_query_param, self.page_number + 1) if self.has_next else None
+        previous_link = None
+        if self.page_number > 1:
+            previous_link = (
+                replace_query_param(url, self.page_query_param, self.page_number - 1)
+                if self.page_number > 2 else remove_query_param(url, self.page_query_param)
+            )
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', next_link),
+            ('previous', previous_link),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
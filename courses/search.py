@@ -0,0 +1,88 @@
+"""
+Course full-text search.
+
+Course.search_vector holds a weighted tsvector of the course name (A), its
+skill names and module titles (B) and its description (C). Signals rebuild
+it with one UPDATE whenever one of those changes (see courses.signals), and
+a GIN index serves the match, so ?q= never parses course text at query time.
+
+Matches are ranked with ts_rank. Courses whose name is only trigram-similar
+to the terms (typos, partial words the stemmer does not reduce) are matched
+too and rank below every full-text match.
+"""
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Func, OuterRef, Q, TextField, Value
+from django.db.models.functions import Replace
+
+CONFIG = 'english'
+MAX_TERMS_LENGTH = 200
+
+
+def _joined(related_model, field):
+    """A course's related `field` values joined by spaces, as a correlated subquery."""
+    return Func(
+        ArraySubquery(related_model._base_manager.filter(course=OuterRef('pk')).order_by().values(field)),
+        Value(' '),
+        function='array_to_string',
+        output_field=TextField(),
+    )
+
+
+# django.utils.html.escape's replacements; '&' has to go first
+HTML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;'))
+
+
+def _escaped(field):
+    """`field` HTML-escaped in SQL, so the headline markup is the only markup."""
+    expression = F(field)
+    for char, entity in HTML_ESCAPES:
+        expression = Replace(expression, Value(char), Value(entity))
+    return expression
+
+
+def document(course_model):
+    """
+    The search_vector expression. Migration 0005 filled the column with a
+    frozen copy; changing this needs a migration that refills it.
+    """
+    opts = course_model._meta
+    modules = opts.get_field('modules').related_model
+    course_skills = opts.get_field('course_skills').related_model
+    return (
+        SearchVector('name', weight='A', config=CONFIG)
+        + SearchVector(_joined(course_skills, 'skill__name'), _joined(modules, 'title'), weight='B', config=CONFIG)
+        + SearchVector('description', weight='C', config=CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Rebuild search_vector for every course in `queryset` in one UPDATE."""
+    if connection.vendor != 'postgresql':
+        return 0
+    return queryset.update(search_vector=document(queryset.model))
+
+
+def search(queryset, terms):
+    """
+    Courses of `queryset` matching `terms` (web search syntax: quoted
+    phrases, "or", -exclusion), best match first, with search_rank,
+    search_similarity and a highlighted description `headline` annotated.
+    The headline is safe HTML: the description is escaped first, so the
+    <mark> tags around matches are its only markup. The queryset's own
+    ordering breaks ties.
+    """
+    terms = terms[:MAX_TERMS_LENGTH]
+    query = SearchQuery(terms, config=CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=query) | Q(name__trigram_word_similar=terms)
+    ).annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+        search_similarity=TrigramWordSimilarity(terms, 'name'),
+        headline=SearchHeadline(
+            _escaped('description'), query, config=CONFIG, start_sel='<mark>', stop_sel='</mark>', max_fragments=2
+        ),
+    ).order_by('-search_rank', '-search_similarity', *queryset.query.order_by)
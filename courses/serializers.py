@@ -129,3 +129,39 @@ class CourseSerializer(serializers.ModelSerializer):
         course = Course.objects.create(tenant=tenant, **validated_data)
         return course
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Annotated by courses.search when the list is searched with ?q=
+        if hasattr(instance, 'search_rank'):
+            data['headline'] = instance.headline
+            data['rank'] = round(instance.search_rank, 4)
+        return data
+
+
+
+# ==================== Course Tree (Outline) Serializers ====================
+# Read-only; see courses.tree. Per-user completion fields are added later.
+
+class SubModuleOutlineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubModule
+        fields = ['id', 'slug', 'title', 'type', 'order']
+        read_only_fields = fields
+
+
+class ModuleOutlineSerializer(serializers.ModelSerializer):
+    submodules = SubModuleOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Module
+        fields = ['id', 'slug', 'title', 'description', 'order', 'submodules']
+        read_only_fields = fields
+
+
+class CourseTreeSerializer(serializers.ModelSerializer):
+    modules = ModuleOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'slug', 'name', 'description', 'status', 'total_submodules', 'modules']
+        read_only_fields = fields
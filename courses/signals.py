@@ -0,0 +1,67 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Course, Module, SubModule
+from . import cache as course_cache
+from . import counters
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=SubModule)
+def increment_course_submodules(sender, instance, created, **kwargs):
+    """Keep Course.total_submodules current as submodules are added."""
+    if created:
+        counters.adjust_course_submodules(instance.module_id, 1)
+
+
+@receiver(post_delete, sender=SubModule)
+def decrement_course_submodules(sender, instance, **kwargs):
+    """
+    Cascaded deletes send post_delete for submodules before their module row
+    is removed, so the course is still reachable through module_id here.
+    """
+    counters.adjust_course_submodules(instance.module_id, -1)
+
+
+# ==========================================
+# Search vectors
+# ==========================================
+# Course.search_vector covers the name, description, module titles and skill
+# names (see courses.search); each receiver rebuilds only the courses touched.
+
+SEARCHED_COURSE_FIELDS = {'name', 'description'}
+
+
+def _course_deleted(origin):
+    """True while a course (or a queryset of courses) is being cascade-deleted."""
+    return isinstance(origin, Course) or getattr(origin, 'model', None) is Course
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHED_COURSE_FIELDS & set(update_fields):
+        return
+    # A queryset UPDATE sends no signal, so this cannot recurse
+    update_search_vectors(Course.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender='skills.CourseSkill')
+@receiver(post_delete, sender='skills.CourseSkill')
+def update_related_search_vector(sender, instance, origin=None, **kwargs):
+    """A module or skill link was added, renamed or removed."""
+    if _course_deleted(origin):
+        return
+    update_search_vectors(Course.objects.filter(pk=instance.course_id))
+    if sender is not Module:
+        # Skill links are not course structure, but ?q= results depend on them
+        course_cache.bump_tenant(instance.tenant_id)
+
+
+@receiver(post_save, sender='skills.Skill')
+def update_skill_search_vectors(sender, instance, created, update_fields=None, **kwargs):
+    """A renamed skill changes the document of every course it is linked to."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    if update_search_vectors(Course.objects.filter(course_skills__skill=instance)):
+        course_cache.bump_tenant(instance.tenant_id)
@@ -1,3 +1,377 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+from accounts import permission_cache
+from accounts.models import Role, User
+from accounts.serializers import TenantTokenObtainPairSerializer
+from benchmarks.fixtures import seed_role_permissions
+from enrollments.models import Enrollment, SubModuleProgress
+from skills.models import CourseSkill, Skill
+from tenants.models import Tenant
+from . import cache as course_cache
+from . import counters
+from . import search
+from . import tree as course_tree
+from .models import Course, Module, SubModule
+from .pagination import KeysetPagination
+
+factory = APIRequestFactory()
+
+
+def make_user(tenant, username, role='TENANT_USER'):
+    return User.objects.create_user(
+        f'{username}@example.test', username, 'pass',
+        tenant=tenant, role=Role.objects.get(name=role), is_active=True,
+    )
+
+
+def make_course(tenant, name='Course', submodules=2, **fields):
+    """A published course with one module holding `submodules` videos."""
+    course = Course.objects.create(tenant=tenant, name=name, description=fields.pop('description', ''),
+                                   status='PUBLISHED', **fields)
+    module = Module.objects.create(tenant=tenant, course=course, title=f'{name} basics')
+    for order in range(submodules):
+        SubModule.objects.create(tenant=tenant, module=module, title=f'Lesson {order}', type='VIDEO', order=order)
+    return course
+
+
+def clear_caches():
+    cache.clear()
+    permission_cache.local_cache.clear()
+
+
+def client_for(user):
+    client = APIClient()
+    token = TenantTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+class CounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.user = make_user(cls.tenant, 'learner')
+        cls.course = make_course(cls.tenant, submodules=3)
+        cls.submodules = list(SubModule.objects.filter(module__course=cls.course).order_by('order'))
+
+    def enroll(self):
+        return Enrollment.objects.create(tenant=self.tenant, user=self.user, course=self.course)
+
+    def complete(self, enrollment, submodule, is_completed=True):
+        return SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=enrollment, submodule=submodule, is_completed=is_completed
+        )
+
+    def test_submodule_writes_adjust_course_total(self):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_submodules, 3)
+
+        self.submodules[0].delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_submodules, 2)
+
+    def test_enrollment_writes_adjust_course_total(self):
+        enrollment = self.enroll()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_enrollments, 1)
+
+        enrollment.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_enrollments, 0)
+
+    def test_progress_writes_adjust_completed_count(self):
+        enrollment = self.enroll()
+        self.complete(enrollment, self.submodules[0])
+        pending = self.complete(enrollment, self.submodules[1], is_completed=False)
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.completed_submodules, 1)
+
+        pending.is_completed = True
+        pending.save()
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.completed_submodules, 2)
+
+        pending.delete()
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.completed_submodules, 1)
+
+    def test_saving_an_unloaded_row_recounts(self):
+        enrollment = self.enroll()
+        row = self.complete(enrollment, self.submodules[0])
+        # A second instance for the same row, built without loading it
+        SubModuleProgress(pk=row.pk, tenant=self.tenant, enrollment=enrollment,
+                          submodule=self.submodules[0], is_completed=True).save()
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.completed_submodules, 1)
+
+    def test_drift_is_found_and_recounted(self):
+        enrollment = self.enroll()
+        self.complete(enrollment, self.submodules[0])
+        Course.objects.filter(pk=self.course.pk).update(total_submodules=9)
+        Enrollment.objects.filter(pk=enrollment.pk).update(completed_submodules=5)
+
+        self.assertEqual(list(counters.drifted_courses()), [self.course])
+        self.assertEqual(list(counters.drifted_enrollments()), [enrollment])
+
+        counters.recount_courses()
+        counters.recount_enrollments()
+        self.assertFalse(counters.drifted_courses().exists())
+        self.assertFalse(counters.drifted_enrollments().exists())
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.total_submodules, self.course.total_enrollments), (3, 1))
+
+
+class CourseListCacheTests(TestCase):
+    url = '/api/courses/?page_size=50'
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_role_permissions()
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.other_tenant = Tenant.objects.create(name='Globex')
+        cls.user = make_user(cls.tenant, 'learner')
+        cls.course = make_course(cls.tenant, 'Python', submodules=2)
+
+    def setUp(self):
+        clear_caches()
+        self.client = client_for(self.user)
+
+    def listed(self):
+        return {row['id']: row for row in self.client.get(self.url).data['results']}
+
+    def test_course_writes_invalidate_the_tenant_list(self):
+        self.assertEqual(set(self.listed()), {self.course.id})
+
+        added = make_course(self.tenant, 'Django')
+        self.assertEqual(set(self.listed()), {self.course.id, added.id})
+
+        Course.objects.filter(pk=added.pk).delete()
+        self.assertEqual(set(self.listed()), {self.course.id})
+
+    def test_list_is_served_from_cache_until_a_bump(self):
+        self.listed()
+        # A queryset update sends no signal, so the cached payload stays
+        Course.objects.filter(pk=self.course.pk).update(name='Renamed')
+        self.assertEqual(self.listed()[self.course.id]['name'], 'Python')
+
+        course_cache.bump_tenant(self.tenant.id)
+        self.assertEqual(self.listed()[self.course.id]['name'], 'Renamed')
+
+    def test_other_tenants_keep_their_version(self):
+        version = course_cache.get_version('course_list', self.tenant.id)
+        make_course(self.other_tenant, 'Elsewhere')
+        self.assertEqual(course_cache.get_version('course_list', self.tenant.id), version)
+
+    def test_progress_overlay_follows_the_user(self):
+        self.assertFalse(self.listed()[self.course.id]['enrolled'])
+
+        enrollment = Enrollment.objects.create(tenant=self.tenant, user=self.user, course=self.course)
+        row = self.listed()[self.course.id]
+        self.assertTrue(row['enrolled'])
+        self.assertEqual(row['progress'], 0.0)
+
+        SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=enrollment, submodule=SubModule.objects.filter(module__course=self.course).first(),
+            is_completed=True,
+        )
+        self.assertEqual(self.listed()[self.course.id]['progress'], 50.0)
+
+    def test_overlay_is_per_user(self):
+        other = make_user(self.tenant, 'other')
+        Enrollment.objects.create(tenant=self.tenant, user=other, course=self.course)
+        self.listed()
+
+        rows = {row['id']: row for row in client_for(other).get(self.url).data['results']}
+        self.assertTrue(rows[self.course.id]['enrolled'])
+        self.assertFalse(self.listed()[self.course.id]['enrolled'])
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Few distinct is_active values, so the pk tie-breaker decides most of the order
+        cls.tenants = [Tenant.objects.create(name=f'Tenant {i}', slug=f'tenant-{i}') for i in range(7)]
+        Tenant.objects.filter(pk__in=[t.pk for t in cls.tenants[::2]]).update(is_active=False)
+
+    def paginate(self, queryset, **params):
+        paginator = KeysetPagination()
+        paginator.page_size = 3
+        rows = paginator.paginate_queryset(queryset, Request(factory.get('/', params)))
+        return paginator, rows
+
+    def walk(self, queryset):
+        pages = []
+        paginator, rows = self.paginate(queryset)
+        pages.append(rows)
+        while paginator.next_cursor:
+            paginator, rows = self.paginate(queryset, cursor=paginator.next_cursor)
+            pages.append(rows)
+        return paginator, pages
+
+    def test_ordering_appends_pk_tie_breaker(self):
+        ordering = KeysetPagination().get_ordering(Tenant.objects.order_by('-is_active'), None)
+        self.assertEqual(ordering, ['-is_active', '-pk'])
+
+    def test_expression_only_ordering_falls_back_to_pk(self):
+        ordering = KeysetPagination().get_ordering(Tenant.objects.order_by(F('name').desc()), None)
+        self.assertEqual(ordering, ['-pk'])
+
+    def test_forward_pages_match_offset_order(self):
+        queryset = Tenant.objects.order_by('is_active', '-pk')
+        _, pages = self.walk(queryset)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([row.pk for page in pages for row in page], list(queryset.values_list('pk', flat=True)))
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        queryset = Tenant.objects.order_by('is_active', '-pk')
+        first_paginator, first = self.paginate(queryset)
+        paginator, _ = self.paginate(queryset, cursor=first_paginator.next_cursor)
+        self.assertIsNone(first_paginator.previous_cursor)
+
+        paginator, rows = self.paginate(queryset, cursor=paginator.previous_cursor)
+        self.assertEqual([row.pk for row in rows], [row.pk for row in first])
+        self.assertIsNone(paginator.previous_cursor)
+        self.assertIsNotNone(paginator.next_cursor)
+
+    def test_count_only_on_request(self):
+        paginator, _ = self.paginate(Tenant.objects.all())
+        self.assertIsNone(paginator.count)
+        paginator, _ = self.paginate(Tenant.objects.all(), count='true')
+        self.assertEqual(paginator.count, 7)
+
+
+class CourseSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.named = make_course(cls.tenant, 'Python Basics', description='Variables and loops.')
+        cls.described = make_course(cls.tenant, 'Programming 101', description='Examples are written in python.')
+        cls.unrelated = make_course(cls.tenant, 'Watercolours', description='Brushes and paper.')
+
+    def found(self, terms):
+        return [course.pk for course in search.search(Course.objects.order_by('pk'), terms)]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.found('python'), [self.named.pk, self.described.pk])
+
+    def test_web_search_syntax(self):
+        self.assertEqual(self.found('python -loops'), [self.described.pk])
+        self.assertEqual(self.found('"written in python"'), [self.described.pk])
+
+    def test_vector_follows_related_rows(self):
+        self.assertEqual(self.found('pigments'), [])
+
+        Module.objects.create(tenant=self.tenant, course=self.unrelated, title='Pigments')
+        self.assertEqual(self.found('pigments'), [self.unrelated.pk])
+
+        skill = Skill.objects.create(tenant=self.tenant, name='Colour theory')
+        CourseSkill.objects.create(tenant=self.tenant, course=self.unrelated, skill=skill)
+        self.assertEqual(self.found('colour theory'), [self.unrelated.pk])
+
+        skill.name = 'Glazing'
+        skill.save()
+        self.assertEqual(self.found('glazing'), [self.unrelated.pk])
+
+    def test_course_edits_update_the_vector(self):
+        self.unrelated.description = 'Now with python.'
+        self.unrelated.save()
+        self.assertIn(self.unrelated.pk, self.found('python'))
+
+    def test_headline_marks_matches_in_escaped_html(self):
+        Course.objects.filter(pk=self.described.pk).update(description='<b onclick="x()">python</b> & more')
+        course = search.search(Course.objects.filter(pk=self.described.pk), 'python').get()
+        self.assertIn('&quot;x()&quot;&gt;<mark>python</mark>&lt;/b&gt; &amp; more', course.headline)
+        # The <mark> tags are the only markup left
+        self.assertNotRegex(course.headline.replace('<mark>', '').replace('</mark>', ''), '[<>"]')
+
+    def test_search_endpoint_returns_rank_and_headline(self):
+        seed_role_permissions()
+        clear_caches()
+        user = make_user(self.tenant, 'learner')
+        response = client_for(user).get('/api/courses/', {'q': 'python', 'page_size': 50})
+
+        self.assertEqual([row['id'] for row in response.data['results']], [self.named.pk, self.described.pk])
+        self.assertIn('<mark>python</mark>', response.data['results'][1]['headline'])
+
+
+class CourseTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_role_permissions()
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.user = make_user(cls.tenant, 'learner')
+        cls.course = make_course(cls.tenant, 'Python', submodules=4)
+        cls.submodules = list(SubModule.objects.filter(module__course=cls.course).order_by('order'))
+        cls.enrollment = Enrollment.objects.create(tenant=cls.tenant, user=cls.user, course=cls.course)
+        SubModuleProgress.objects.create(
+            tenant=cls.tenant, enrollment=cls.enrollment, submodule=cls.submodules[0], is_completed=True
+        )
+        cls.url = f'/api/courses/{cls.course.slug}/tree/'
+
+    def setUp(self):
+        clear_caches()
+        self.client = client_for(self.user)
+
+    def completed(self, data):
+        return [sub['id'] for module in data['modules'] for sub in module['submodules'] if sub['completed']]
+
+    def test_overlay_is_merged_into_the_outline(self):
+        data = self.client.get(self.url).data
+        self.assertTrue(data['enrolled'])
+        self.assertEqual(self.completed(data), [self.submodules[0].id])
+        self.assertEqual(data['completed_submodules'], 1)
+        self.assertEqual(data['progress'], 25.0)
+        self.assertEqual(data['modules'][0]['completed_submodules'], 1)
+
+    def test_shared_outline_carries_no_completion_between_users(self):
+        outline = course_tree.build_tree(self.course)
+        course_tree.apply_progress_overlay(outline, course_tree.progress_overlay(self.user, self.course.pk))
+
+        stranger = make_user(self.tenant, 'stranger')
+        data = course_tree.apply_progress_overlay(outline, course_tree.progress_overlay(stranger, self.course.pk))
+        self.assertFalse(data['enrolled'])
+        self.assertEqual(self.completed(data), [])
+        self.assertEqual(data['progress'], 0.0)
+
+    def test_progress_writes_refresh_the_overlay_only(self):
+        self.client.get(self.url)
+        SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=self.enrollment, submodule=self.submodules[1], is_completed=True
+        )
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url).data
+        self.assertEqual(len(self.completed(data)), 2)
+        self.assertFalse(any('courses_submodule' in query['sql'] for query in queries.captured_queries))
+
+    def test_outline_changes_refresh_the_tree(self):
+        self.client.get(self.url)
+        module = Module.objects.create(tenant=self.tenant, course=self.course, title='Advanced', order=1)
+        SubModule.objects.create(tenant=self.tenant, module=module, title='Generators', type='VIDEO')
+
+        data = self.client.get(self.url).data
+        self.assertEqual([module['title'] for module in data['modules']], ['Python basics', 'Advanced'])
+        self.assertEqual(data['progress'], 20.0)
+
+    def test_query_count_does_not_grow_with_the_outline(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        for index in range(3):
+            module = Module.objects.create(tenant=self.tenant, course=self.course, title=f'Extra {index}', order=index + 1)
+            for order in range(3):
+                SubModule.objects.create(tenant=self.tenant, module=module, title=f'Part {order}', type='VIDEO', order=order)
+        clear_caches()
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+        self.assertEqual(len(large), len(small))
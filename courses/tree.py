@@ -0,0 +1,63 @@
+"""
+Course outline for the course player.
+
+build_tree() loads a course's modules and submodules with two Prefetch
+queries limited to the outline columns. The result is plain data, cached
+per course version (see courses.cache) and shared by every user; the
+user's completion is read separately as a small overlay and merged into the
+outline on the way out.
+"""
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Prefetch, Q, prefetch_related_objects
+
+from enrollments.models import Enrollment
+from .models import Module, SubModule
+from .serializers import CourseTreeSerializer
+
+
+def build_tree(course):
+    """Course -> modules -> submodules as serializable data, in two queries."""
+    submodules = SubModule.objects.only('id', 'module', 'slug', 'title', 'type', 'order').order_by('order', 'id')
+    modules = (
+        Module.objects.only('id', 'course', 'slug', 'title', 'description', 'order')
+        .order_by('order', 'id')
+        .prefetch_related(Prefetch('submodules', queryset=submodules))
+    )
+    # Prefetch onto the course already loaded instead of fetching it again
+    prefetch_related_objects([course], Prefetch('modules', queryset=modules))
+    return CourseTreeSerializer(course).data
+
+
+def progress_overlay(user, course_id):
+    """The user's enrollment in the course and the submodules completed, in one query."""
+    enrollment = (
+        Enrollment.objects.filter(user=user.id, course=course_id)
+        .annotate(completed_ids=ArrayAgg(
+            'submodule_progress__submodule_id',
+            filter=Q(submodule_progress__is_completed=True),
+            default=[],
+        ))
+        .values('completed_ids')
+        .first()
+    )
+    if enrollment is None:
+        return {'enrolled': False, 'completed': []}
+    return {'enrolled': True, 'completed': enrollment['completed_ids']}
+
+
+def apply_progress_overlay(tree, overlay):
+    """Add the per-user completion fields to a (possibly shared) tree."""
+    completed = set(overlay['completed'])
+    total = done = 0
+    for module in tree['modules']:
+        module_done = 0
+        for submodule in module['submodules']:
+            submodule['completed'] = submodule['id'] in completed
+            module_done += submodule['completed']
+        module['completed_submodules'] = module_done
+        total += len(module['submodules'])
+        done += module_done
+    tree['enrolled'] = overlay['enrolled']
+    tree['completed_submodules'] = done
+    tree['progress'] = done / total * 100 if total else 0.0
+    return tree
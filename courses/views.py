@@ -7,17 +7,21 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Course, Module, SubModule
-from django.db.models import Exists, OuterRef, Count, Q, Case, When, Value, F
-from django.db.models.functions import Cast
+from django.db.models import Exists, OuterRef, Subquery, Count, Q, Case, When, Value, F
+from django.db.models.functions import Cast, Coalesce
 from django.db.models import FloatField
 from .serializers import CourseSerializer, ModuleSerializer, SubModuleSerializer
 from accounts.permissions import RolePermission 
+from tenants.mixins import TenantSlugLookupMixin
 from enrollments.models import Enrollment
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from .pagination import StandardResultsSetPagination
-from .filters import CourseFilter
+from .filters import CourseFilter, CourseSearchFilter
 from django.conf import settings
 from django.core.cache import cache
+from . import cache as course_cache
+from . import tree as course_tree
+from observability.metrics import record_cache
 
 # Create your views here.
 
@@ -28,36 +32,39 @@ from django.core.cache import cache
 # TenantAdmin: Full CRUD for their tenant's courses
 # TenantUser: View published courses only
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(TenantSlugLookupMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     pagination_class = StandardResultsSetPagination
     lookup_field = 'slug'
     
     # Search, Filter, and Ordering
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?q= is ranked full-text search and must follow OrderingFilter
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, CourseSearchFilter]
     filterset_class = CourseFilter
     search_fields = ['name', 'description']  # ?search=python
     ordering_fields = ['name', 'created_at', 'price']  # ?ordering=-created_at
     ordering = ['-created_at']  # Default ordering
+    action_permissions = {'tree': 'view'}
 
     def get_permissions(self):
         permission_classes = [RolePermission]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
+        if self.action == 'tree':
+            # The outline needs none of the list annotations; the tenant is
+            # compared by RolePermission.has_object_permission
+            return Course.objects.for_current_user().select_related('tenant')
         queryset = Course.objects.for_current_user().select_related('created_by', 'tenant')
+        # total_enrollments / total_submodules are denormalized columns and the
+        # user's completed count lives on their enrollment (see courses.counters)
+        user_enrollment = Enrollment.objects.filter(user=self.request.user.id, course=OuterRef('pk'))
         queryset = queryset.annotate(
-            enrolled=Exists(Enrollment.objects.filter(user=self.request.user.id, course=OuterRef('pk'))),
-            total_enrollments=Count('enrollments', distinct=True),
-            total_submodules=Count('modules__submodules', distinct=True),
-            completed_submodules=Count(
-                'modules__submodules',
-                filter=Q(
-                    modules__submodules__user_progress__is_completed=True,
-                    modules__submodules__user_progress__enrollment__user=self.request.user
-                ),
-                distinct=True
+            enrolled=Exists(user_enrollment),
+            completed_submodules=Coalesce(
+                Subquery(user_enrollment.values('completed_submodules')[:1]),
+                Value(0)
             )
         ).annotate(
             progress=Case(
@@ -74,22 +81,48 @@ class CourseViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
     def list(self, request, *args, **kwargs):
-        query_string = request.META.get('QUERY_STRING', '') 
-        tenant_id = request.user.tenant.id if request.user.tenant else 'system'
-        cache_key = f'course_list_{tenant_id}_{request.user.role.name}_{request.user.id}_{query_string}'
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            return Response(cached_response)
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=settings.PERMISSION_CACHE_TIMEOUT)
-        return response
+        query_string = request.META.get('QUERY_STRING', '')
+        shared_key, overlay_key = course_cache.course_list_keys(
+            request.user,
+            query_string,
+            per_user='enrolled' in request.query_params
+        )
+        data = cache.get(shared_key)
+        record_cache('course_list', data is not None)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(shared_key, data, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+
+        overlay = course_cache.get_progress_overlay(request.user, overlay_key)
+        return Response(course_cache.apply_progress_overlay(data, overlay))
+
+    @action(detail=True, methods=['get'])
+    def tree(self, request, slug=None):
+        """
+        The whole Course -> Module -> SubModule outline with the user's
+        completion per submodule, in a constant number of queries.
+        """
+        course = self.get_object()
+        tree_key, overlay_key = course_cache.course_tree_keys(request.user, course.pk)
+        data = cache.get(tree_key)
+        record_cache('course_tree', data is not None)
+        if data is None:
+            data = course_tree.build_tree(course)
+            cache.set(tree_key, data, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+
+        overlay = cache.get(overlay_key)
+        record_cache('course_tree_progress', overlay is not None)
+        if overlay is None:
+            overlay = course_tree.progress_overlay(request.user, course.pk)
+            cache.set(overlay_key, overlay, timeout=settings.PERMISSION_CACHE_TIMEOUT)
+        return Response(course_tree.apply_progress_overlay(data, overlay))
     
     
 
 
 
 # TenantAdmin can manage modules within their courses
-class ModuleViewSet(viewsets.ModelViewSet):
+class ModuleViewSet(TenantSlugLookupMixin, viewsets.ModelViewSet):
     serializer_class = ModuleSerializer
     pagination_class = StandardResultsSetPagination
     lookup_field = 'slug'
@@ -101,13 +134,13 @@ class ModuleViewSet(viewsets.ModelViewSet):
         if self.request.user.is_superuser:
             return Module.objects.filter(
                 course__slug=self.kwargs['course_slug'], # Matches lookup='course' in urls.py
-            ).annotate(submodule_count=Count('submodules'),submodule_completed=Count('submodules__user_progress',filter=Q(submodules__user_progress__is_completed=True,
+            ).select_related('tenant', 'course').annotate(submodule_count=Count('submodules'),submodule_completed=Count('submodules__user_progress',filter=Q(submodules__user_progress__is_completed=True,
             submodules__user_progress__enrollment__user=self.request.user)) or 0)
         return Module.objects.filter(
             course__slug=self.kwargs['course_slug'], # Matches lookup='course' in urls.py
             course__tenant=self.request.user.tenant,
             tenant=self.request.user.tenant 
-        ).annotate(submodule_count=Count('submodules'),submodule_completed=Count('submodules__user_progress',filter=Q(submodules__user_progress__is_completed=True,
+        ).select_related('tenant', 'course').annotate(submodule_count=Count('submodules'),submodule_completed=Count('submodules__user_progress',filter=Q(submodules__user_progress__is_completed=True,
             submodules__user_progress__enrollment__user=self.request.user)) or 0)
 
     def perform_create(self, serializer):
@@ -115,7 +148,7 @@ class ModuleViewSet(viewsets.ModelViewSet):
 
 
 # TenantAdmin can manage submodules within their modules
-class SubModuleViewSet(viewsets.ModelViewSet):
+class SubModuleViewSet(TenantSlugLookupMixin, viewsets.ModelViewSet):
     queryset = SubModule.objects.all()
     serializer_class = SubModuleSerializer
     pagination_class = StandardResultsSetPagination
@@ -130,13 +163,13 @@ class SubModuleViewSet(viewsets.ModelViewSet):
             return SubModule.objects.filter(
                 module__course__slug=self.kwargs['course_slug'],
                 module__slug=self.kwargs['module_slug'],
-            )
+            ).select_related('tenant')
         return SubModule.objects.filter(
             module__course__slug=self.kwargs['course_slug'],
             module__course__tenant=self.request.user.tenant,
             module__slug=self.kwargs['module_slug'], 
             tenant=self.request.user.tenant 
-        )
+        ).select_related('tenant')
 
     def perform_create(self, serializer):
         serializer.save()
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:15
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    counted = queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    """Populate the denormalized progress counters from existing rows."""
+    Course = apps.get_model('courses', 'Course')
+    SubModule = apps.get_model('courses', 'SubModule')
+    Enrollment = apps.get_model('enrollments', 'Enrollment')
+    SubModuleProgress = apps.get_model('enrollments', 'SubModuleProgress')
+
+    Course.objects.update(
+        total_submodules=_count(SubModule.objects.filter(module__course=OuterRef('pk')), 'module__course'),
+        total_enrollments=_count(Enrollment.objects.filter(course=OuterRef('pk')), 'course'),
+    )
+    Enrollment.objects.update(
+        completed_submodules=_count(
+            SubModuleProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True),
+            'enrollment'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_total_enrollments_course_total_submodules'),
+        ('enrollments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_submodules',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
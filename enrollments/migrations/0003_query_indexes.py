@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_query_indexes'),
+        ('enrollments', '0002_enrollment_completed_submodules'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['tenant', '-enrolled_at', '-id'], name='enrollment_tenant_enrolled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-enrolled_at'], name='enrollment_user_enrolled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'COMPLETED')), fields=['course', 'completed_at'], name='enrollment_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submoduleprogress',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['enrollment', 'submodule'], name='progress_completed_idx'),
+        ),
+    ]
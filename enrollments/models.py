@@ -37,23 +37,31 @@ class Enrollment(AbstractTenantModel):
         related_name='assigned_enrollments',
         help_text="Admin who assigned this course (null for self-enrollment)"
     )
-   
+    # Denormalized counter kept current by signals (see courses.counters).
+    completed_submodules = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         unique_together = ['user', 'course']
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['tenant', '-enrolled_at', '-id'], name='enrollment_tenant_enrolled_idx'),
+            models.Index(fields=['user', '-enrolled_at'], name='enrollment_user_enrolled_idx'),
+            models.Index(
+                fields=['course', 'completed_at'],
+                condition=models.Q(status='COMPLETED'),
+                name='enrollment_completed_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.course.name} ({self.status})"
 
     @property
     def progress_percentage(self):
-        total_submodules = SubModule.objects.filter(
-            module__course=self.course
-        ).count()
+        total_submodules = self.course.total_submodules
         if total_submodules == 0:
             return 0
-        completed = self.submodule_progress.filter(is_completed=True).count()
-        return round((completed / total_submodules) * 100, 2)
+        return round((self.completed_submodules / total_submodules) * 100, 2)
 
 class SubModuleProgress(AbstractTenantModel):
     enrollment = models.ForeignKey(
@@ -85,6 +93,23 @@ class SubModuleProgress(AbstractTenantModel):
     class Meta:
         unique_together = ['enrollment', 'submodule']
         ordering = ['submodule__order']
+        indexes = [
+            # Completed counts per enrollment (courses.counters, progress overlay)
+            models.Index(
+                fields=['enrollment', 'submodule'],
+                condition=models.Q(is_completed=True),
+                name='progress_completed_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the progress signals turn a save into a +1/-1 counter delta;
+        # rows loaded with is_completed deferred are recounted instead
+        if 'is_completed' in field_names:
+            instance._loaded_is_completed = instance.is_completed
+        return instance
 
     def __str__(self):
         status = "✓" if self.is_completed else "❌"
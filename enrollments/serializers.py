@@ -212,3 +212,19 @@ class MarkCompleteSerializer(serializers.Serializer):
         allow_null=True,
         help_text="Time spent in seconds"
     )
+
+
+class BatchCompletionSerializer(MarkCompleteSerializer):
+    """One completion inside a batch mark-complete request."""
+    enrollment_id = serializers.IntegerField()
+    submodule_id = serializers.IntegerField()
+
+
+class BatchMarkCompleteSerializer(serializers.Serializer):
+    """Serializer for marking many submodules complete in one request."""
+    completions = BatchCompletionSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=500,
+        help_text="Up to 500 completions; duplicates keep the last entry"
+    )
@@ -0,0 +1,100 @@
+"""
+Enrollment state engine.
+
+Progress writes only apply an O(1) delta to Enrollment.completed_submodules
+(see enrollments.signals). Everything that follows from the counters - the
+status transition, skill recomputation and completion hooks - runs in
+`sync_enrollment_state`, which is scheduled per enrollment and coalesced:
+while a sync is pending for an enrollment, further progress writes do not
+queue another one, so a learner clicking through ten submodules triggers a
+single recompute. The sync recounts completed submodules under the row
+lock before deciding, so deltas double-applied by concurrent saves of the
+same progress row cannot complete an enrollment early.
+
+Completion hooks (certificates, emails, ...) connect to `enrollment_completed`.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Enrollment, SubModuleProgress
+from skills.proficiency import schedule_user_skills_recompute
+
+# Sent once when an enrollment transitions to COMPLETED; kwargs: enrollment
+enrollment_completed = Signal()
+
+
+def _pending_key(enrollment_id):
+    return f'enrollment_sync_pending_{enrollment_id}'
+
+
+def schedule_enrollment_sync(enrollment_id):
+    """
+    Queue a state sync for `enrollment_id` once the current transaction
+    commits, unless one is already pending. Runs inline when
+    ENROLLMENT_SYNC_ASYNC is off.
+    """
+    if not getattr(settings, 'ENROLLMENT_SYNC_ASYNC', True):
+        sync_enrollment_state(enrollment_id)
+        return
+
+    def enqueue():
+        from .tasks import sync_enrollment_state_task
+
+        delay = getattr(settings, 'ENROLLMENT_SYNC_DELAY', 5)
+        # The TTL only matters if the task is lost; it then frees the slot
+        if cache.add(_pending_key(enrollment_id), 1, timeout=delay + 60):
+            sync_enrollment_state_task.apply_async(args=[enrollment_id], countdown=delay)
+
+    transaction.on_commit(enqueue)
+
+
+def release_enrollment_sync(enrollment_id):
+    """Called by the task before syncing, so later writes schedule a new sync."""
+    cache.delete(_pending_key(enrollment_id))
+
+
+def sync_enrollment_state(enrollment_id):
+    """
+    Bring an enrollment's status in line with its counters and run the
+    completion side effects if it just finished. Returns the new status,
+    or None if the enrollment no longer exists.
+    """
+    with transaction.atomic():
+        enrollment = (
+            Enrollment.objects.select_for_update(of=('self',))
+            .select_related('course')
+            .filter(pk=enrollment_id)
+            .first()
+        )
+        if enrollment is None:
+            return None
+
+        # The signal deltas come from in-memory instances; two requests saving
+        # the same loaded row as completed both apply +1, so trust the table
+        completed = SubModuleProgress.objects.filter(enrollment=enrollment, is_completed=True).count()
+        if completed != enrollment.completed_submodules:
+            Enrollment.objects.filter(pk=enrollment.pk).update(completed_submodules=completed)
+            enrollment.completed_submodules = completed
+
+        total = enrollment.course.total_submodules
+        if total == 0:
+            return enrollment.status
+
+        just_completed = False
+        if completed >= total:
+            if enrollment.status != Enrollment.Status.COMPLETED:
+                enrollment.status = Enrollment.Status.COMPLETED
+                enrollment.completed_at = timezone.now()
+                enrollment.save(update_fields=['status', 'completed_at'])
+                just_completed = True
+        elif completed > 0 and enrollment.status == Enrollment.Status.NOT_STARTED:
+            enrollment.status = Enrollment.Status.IN_PROGRESS
+            enrollment.save(update_fields=['status'])
+
+    if just_completed:
+        schedule_user_skills_recompute(enrollment)
+        enrollment_completed.send(sender=Enrollment, enrollment=enrollment)
+    return enrollment.status
@@ -1,132 +1,58 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from .models import SubModuleProgress, Enrollment
-from courses.models import SubModule
-from skills.models import CourseSkill, UserSkill
+from courses import counters
+from skills.proficiency import create_missing_user_skills
+from .services import schedule_enrollment_sync
 
 
-@receiver(post_save, sender=SubModuleProgress)
-def update_enrollment_status(sender, instance, **kwargs):
-    """
-    When a submodule is marked complete, check if all submodules are done.
-    If so, mark the enrollment as COMPLETED and trigger skill updates.
-    """
-    if not instance.is_completed:
-        return
+# ==========================================
+# Denormalized Counter Signals
+# ==========================================
 
-    enrollment = instance.enrollment
-    course = enrollment.course
-
-    # Get total submodules in the course
-    total_submodules = SubModule.objects.filter(module__course=course).count()
-    if total_submodules == 0:
-        return
+@receiver(post_save, sender=Enrollment)
+def increment_course_enrollments(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_course_enrollments(instance.course_id, 1)
 
-    # Get completed submodules for this enrollment
-    completed_count = enrollment.submodule_progress.filter(is_completed=True).count()
 
-    # Update enrollment status
-    if completed_count == total_submodules:
-        # Course is complete
-        if enrollment.status != Enrollment.Status.COMPLETED:
-            enrollment.status = Enrollment.Status.COMPLETED
-            enrollment.completed_at = timezone.now()
-            enrollment.save()
-            # Trigger skill proficiency update
-            update_user_skills(enrollment)
-    elif completed_count > 0:
-        # Course is in progress
-        if enrollment.status == Enrollment.Status.NOT_STARTED:
-            enrollment.status = Enrollment.Status.IN_PROGRESS
-            enrollment.save()
+@receiver(post_delete, sender=Enrollment)
+def decrement_course_enrollments(sender, instance, **kwargs):
+    counters.adjust_course_enrollments(instance.course_id, -1)
 
 
-def update_user_skills(enrollment):
+@receiver(post_save, sender=SubModuleProgress)
+def update_enrollment_progress(sender, instance, created, **kwargs):
     """
-    Update user skill proficiency when a course is completed.
-    Proficiency is calculated based on all completed courses for each skill.
+    Apply the +1/-1 change in completed submodules for this write, then let
+    the state engine (see enrollments.services) handle status and skills.
     """
-    user = enrollment.user
-    course = enrollment.course
-    tenant = enrollment.tenant
-
-    # Get all skills associated with this course
-    course_skills = CourseSkill.objects.filter(course=course)
-
-    for course_skill in course_skills:
-        skill = course_skill.skill
-        weight = float(course_skill.weight)
-
-        # Get or create UserSkill record
-        user_skill, created = UserSkill.objects.get_or_create(
-            user=user,
-            skill=skill,
-            tenant=tenant,
-            defaults={'proficiency': 0, 'courses_completed': 0}
-        )
+    if created:
+        delta = 1 if instance.is_completed else 0
+    elif hasattr(instance, '_loaded_is_completed'):
+        delta = int(instance.is_completed) - int(instance._loaded_is_completed)
+    else:
+        # Saved without being loaded first, or loaded with is_completed
+        # deferred; the old value is unknown
+        counters.recount_enrollments(Enrollment.objects.filter(pk=instance.enrollment_id))
+        delta = None
 
-        # no. of completed courses for this skill
-        completed_courses_for_skill = Enrollment.objects.filter(
-            user=user,
-            status=Enrollment.Status.COMPLETED,
-            course__course_skills__skill=skill
-        ).distinct().count()
+    if delta:
+        counters.adjust_enrollment_completed(instance.enrollment_id, delta)
+    instance._loaded_is_completed = instance.is_completed
 
-        # Get total courses that teach this skill in the tenant
-        total_courses_for_skill = CourseSkill.objects.filter(
-            skill=skill,
-            tenant=tenant
-        ).count()
+    if delta is None or delta > 0:
+        schedule_enrollment_sync(instance.enrollment_id)
 
-        # Calculate proficiency as weighted percentage
-        if total_courses_for_skill > 0:
-            completed_weights = sum(
-                float(cs.weight) for cs in CourseSkill.objects.filter(
-                    skill=skill,
-                    tenant=tenant,
-                    course__enrollments__user=user,
-                    course__enrollments__status=Enrollment.Status.COMPLETED
-                ).distinct()
-            )
-            total_weights = sum(
-                float(cs.weight) for cs in CourseSkill.objects.filter(
-                    skill=skill,
-                    tenant=tenant
-                )
-            )
-            proficiency = (completed_weights / total_weights) * 100 if total_weights > 0 else 0
-        else:
-            proficiency = 0
 
-        # Update UserSkill
-        user_skill.proficiency = min(proficiency, 100)  # Cap at 100%
-        user_skill.courses_completed = completed_courses_for_skill
-        user_skill.save()
+@receiver(post_delete, sender=SubModuleProgress)
+def decrement_enrollment_completed_count(sender, instance, **kwargs):
+    if instance.is_completed:
+        counters.adjust_enrollment_completed(instance.enrollment_id, -1)
 
 
 @receiver(post_save, sender=Enrollment)
 def create_user_skills_on_enrollment(sender, instance, created, **kwargs):
     if not created:
         return
-
-    user = instance.user
-    course = instance.course
-    tenant = instance.tenant
-
-    # Get all skills associated with this course
-    course_skills = CourseSkill.objects.filter(course=course)
-
-    for course_skill in course_skills:
-        skill = course_skill.skill
-        
-        # Create UserSkill record if it doesn't exist
-        UserSkill.objects.get_or_create(
-            user=user,
-            skill=skill,
-            tenant=tenant,
-            defaults={
-                'proficiency': 0.00,
-                'courses_completed': 0
-            }
-        )
+    create_missing_user_skills(instance)
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .services import release_enrollment_sync, sync_enrollment_state
+
+
+@shared_task(queue="default_queue")
+def sync_enrollment_state_task(enrollment_id):
+    """
+    Apply the status transition and completion side effects for one
+    enrollment. Scheduled (and coalesced) by schedule_enrollment_sync.
+    """
+    release_enrollment_sync(enrollment_id)
+    status = sync_enrollment_state(enrollment_id)
+    return f"Enrollment {enrollment_id} synced: {status}"
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from accounts.serializers import TenantTokenObtainPairSerializer
+from courses.models import Course, Module, SubModule
+from tenants.models import Tenant
+from .models import Enrollment, SubModuleProgress
+from .services import enrollment_completed, schedule_enrollment_sync, sync_enrollment_state
+
+BATCH_URL = '/api/progress/mark-complete/batch/'
+
+
+class MarkCompleteBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Acme')
+        role = Role.objects.get(name='TENANT_USER')
+        cls.user = User.objects.create_user(
+            'learner@acme.test', 'learner', 'pass', tenant=cls.tenant, role=role, is_active=True
+        )
+        cls.other = User.objects.create_user(
+            'other@acme.test', 'other', 'pass', tenant=cls.tenant, role=role, is_active=True
+        )
+        cls.course = Course.objects.create(tenant=cls.tenant, name='Course', description='', status='PUBLISHED')
+        module = Module.objects.create(tenant=cls.tenant, course=cls.course, title='Module')
+        cls.submodules = [
+            SubModule.objects.create(tenant=cls.tenant, module=module, title=f'Lesson {i}', type='VIDEO', order=i)
+            for i in range(3)
+        ]
+        cls.enrollment = Enrollment.objects.create(tenant=cls.tenant, user=cls.user, course=cls.course)
+        cls.other_enrollment = Enrollment.objects.create(tenant=cls.tenant, user=cls.other, course=cls.course)
+
+    def setUp(self):
+        self.client = APIClient()
+        token = TenantTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def completion(self, submodule, enrollment=None):
+        return {'enrollment_id': (enrollment or self.enrollment).id, 'submodule_id': submodule.id}
+
+    def test_marks_every_submodule_and_updates_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(BATCH_URL, {
+                'completions': [self.completion(submodule) for submodule in self.submodules[:2]]
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(SubModuleProgress.objects.filter(enrollment=self.enrollment, is_completed=True).count(), 2)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 2)
+        self.assertEqual(self.enrollment.status, Enrollment.Status.IN_PROGRESS)
+
+    def test_completing_every_submodule_completes_the_enrollment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(BATCH_URL, {
+                'completions': [self.completion(submodule) for submodule in self.submodules]
+            }, format='json')
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 3)
+        self.assertEqual(self.enrollment.status, Enrollment.Status.COMPLETED)
+
+    def test_duplicates_are_written_once(self):
+        first = self.completion(self.submodules[0])
+        response = self.client.post(BATCH_URL, {'completions': [first, first, first]}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(SubModuleProgress.objects.filter(enrollment=self.enrollment).count(), 1)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 1)
+
+    def test_errors_are_keyed_by_request_position(self):
+        first = self.completion(self.submodules[0])
+        response = self.client.post(BATCH_URL, {'completions': [
+            first,
+            first,
+            self.completion(self.submodules[1], self.other_enrollment),
+            {'enrollment_id': self.enrollment.id, 'submodule_id': 0},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {2, 3})
+        self.assertFalse(SubModuleProgress.objects.exists())
+
+
+class EnrollmentStateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Acme')
+        user = User.objects.create_user(
+            'learner@acme.test', 'learner', 'pass',
+            tenant=cls.tenant, role=Role.objects.get(name='TENANT_USER'), is_active=True,
+        )
+        course = Course.objects.create(tenant=cls.tenant, name='Course', description='', status='PUBLISHED')
+        module = Module.objects.create(tenant=cls.tenant, course=course, title='Module')
+        cls.submodules = [
+            SubModule.objects.create(tenant=cls.tenant, module=module, title=f'Lesson {i}', type='VIDEO', order=i)
+            for i in range(3)
+        ]
+        cls.enrollment = Enrollment.objects.create(tenant=cls.tenant, user=user, course=course)
+
+    def setUp(self):
+        cache.clear()
+
+    def complete(self, submodule):
+        return SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=self.enrollment, submodule=submodule, is_completed=True
+        )
+
+    def test_status_follows_completed_submodules(self):
+        self.complete(self.submodules[0])
+        self.assertEqual(sync_enrollment_state(self.enrollment.pk), Enrollment.Status.IN_PROGRESS)
+
+        received = []
+        enrollment_completed.connect(
+            lambda sender, enrollment, **kwargs: received.append(enrollment.pk), weak=False, dispatch_uid='test'
+        )
+        self.addCleanup(enrollment_completed.disconnect, dispatch_uid='test')
+        for submodule in self.submodules[1:]:
+            self.complete(submodule)
+        self.assertEqual(sync_enrollment_state(self.enrollment.pk), Enrollment.Status.COMPLETED)
+        self.assertEqual(sync_enrollment_state(self.enrollment.pk), Enrollment.Status.COMPLETED)
+        self.assertEqual(received, [self.enrollment.pk])
+
+        self.enrollment.refresh_from_db()
+        self.assertIsNotNone(self.enrollment.completed_at)
+
+    def test_double_applied_deltas_do_not_complete_early(self):
+        self.complete(self.submodules[0])
+        pending = self.complete(self.submodules[1])
+        pending.is_completed = False
+        pending.save()
+        # Two requests saving the same loaded row as completed both apply +1
+        for _ in range(2):
+            copy = SubModuleProgress.objects.get(pk=pending.pk)
+            copy.is_completed = True
+            copy._loaded_is_completed = False
+            copy.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 3)
+
+        self.assertEqual(sync_enrollment_state(self.enrollment.pk), Enrollment.Status.IN_PROGRESS)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 2)
+
+    def test_saving_a_deferred_row_recounts(self):
+        pending = SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=self.enrollment, submodule=self.submodules[0]
+        )
+        copy = SubModuleProgress.objects.defer('is_completed').get(pk=pending.pk)
+        copy.is_completed = True
+        copy.save()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 1)
+
+        copy = SubModuleProgress.objects.only('id', 'enrollment').get(pk=pending.pk)
+        copy.score = 80
+        copy.save(update_fields=['score'])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_submodules, 1)
+
+    @override_settings(ENROLLMENT_SYNC_ASYNC=True)
+    def test_pending_syncs_are_coalesced(self):
+        with mock.patch('enrollments.tasks.sync_enrollment_state_task.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(3):
+                    schedule_enrollment_sync(self.enrollment.pk)
+        apply_async.assert_called_once()
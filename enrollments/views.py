@@ -10,10 +10,14 @@ from .serializers import (
     EnrollmentCreateSerializer,
     AdminAssignCourseSerializer,
     SubModuleProgressSerializer,
-    MarkCompleteSerializer
+    MarkCompleteSerializer,
+    BatchMarkCompleteSerializer
 )
 from accounts.permissions import IsTenantAdmin, RolePermission 
 from courses.models import SubModule
+from courses import cache as course_cache
+from courses import counters
+from .services import schedule_enrollment_sync
 
 class EnrollmentViewSet(viewsets.ModelViewSet):
     """
@@ -38,23 +42,9 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         return [RolePermission()]
 
     def get_queryset(self):
-        return Enrollment.objects.for_current_user().select_related('course','user','assigned_by').prefetch_related('submodule_progress__submodule').annotate(
-            completed_submodules=Count('submodule_progress',filter=Q(
-                submodule_progress__is_completed=True,
-                submodule_progress__tenant=self.request.tenant,
-                submodule_progress__user=self.request.user,
-               ),distinct=True),
-            total_submodules=Count('course__modules__submodules',filter=Q(
-                course__tenant=self.request.tenant,
-                ),distinct=True)
-
-        ).annotate(
-            progress_percentage=Case(
-                When(total_submodules=0, then=Value(0.0)),
-                default=Cast(F('completed_submodules'), FloatField()) / Cast(F('total_submodules'), FloatField()) * 100,
-                output_field=FloatField()
-            )
-        )
+        # progress_percentage is derived from the denormalized counters on
+        # Enrollment and Course, so no aggregate joins are needed here
+        return Enrollment.objects.for_current_user().select_related('course','user','assigned_by').prefetch_related('submodule_progress__submodule')
 
     @action(detail=False, methods=['post'])
     def assign_course(self, request):
@@ -104,7 +94,7 @@ class SubModuleProgressViewSet(viewsets.ReadOnlyModelViewSet):
         return [RolePermission()]
 
     def get_queryset(self):
-        return SubModuleProgress.objects.for_current_user()
+        return SubModuleProgress.objects.for_current_user().select_related('submodule')
 
     @action(detail=False, methods=['post'], url_path='mark-complete')
     def mark_complete(self, request):
@@ -175,3 +165,108 @@ class SubModuleProgressViewSet(viewsets.ReadOnlyModelViewSet):
             progress.save()
 
         return Response(SubModuleProgressSerializer(progress).data)
+
+    @action(detail=False, methods=['post'], url_path='mark-complete/batch')
+    def mark_complete_batch(self, request):
+        """
+        Mark many submodules complete in one request (offline sync, SCORM/xAPI
+        imports). Validation runs a fixed number of queries, progress rows are
+        upserted in one statement, and counters and the enrollment state
+        engine run once per affected enrollment.
+        """
+        batch_serializer = BatchMarkCompleteSerializer(data=request.data)
+        batch_serializer.is_valid(raise_exception=True)
+
+        items = batch_serializer.validated_data['completions']
+        enrollment_ids = {item['enrollment_id'] for item in items}
+        submodule_ids = {item['submodule_id'] for item in items}
+
+        user = request.user
+        enrollments = Enrollment.objects.for_current_user().filter(id__in=enrollment_ids).in_bulk()
+        submodules = {
+            row[0]: row[1:]
+            for row in SubModule.objects.filter(id__in=submodule_ids).values_list('id', 'module__course_id', 'type')
+        }
+
+        # Error keys are positions in the request's list, duplicates included
+        errors = {}
+        for index, item in enumerate(items):
+            enrollment = enrollments.get(item['enrollment_id'])
+            if enrollment is None:
+                errors[index] = 'Enrollment not found'
+            elif user.role_name == 'TENANT_USER' and enrollment.user_id != user.id:
+                errors[index] = 'You can only update your own progress'
+            elif submodules.get(item['submodule_id'], (None,))[0] != enrollment.course_id:
+                errors[index] = 'Submodule not found or does not belong to this course'
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Later entries for the same pair win
+        completions = {(item['enrollment_id'], item['submodule_id']): item for item in items}
+
+        existing = {
+            (row.enrollment_id, row.submodule_id): row
+            for row in SubModuleProgress.objects.filter(
+                enrollment_id__in=enrollment_ids,
+                submodule_id__in=submodule_ids
+            ).only('enrollment_id', 'submodule_id', 'is_completed', 'score', 'time_spent')
+        }
+
+        now = timezone.now()
+        rows = []
+        skipped = 0
+        for (enrollment_id, submodule_id), item in completions.items():
+            current = existing.get((enrollment_id, submodule_id))
+            if current is not None and current.is_completed:
+                skipped += 1
+                continue
+
+            score = item.get('score')
+            seconds = item.get('time_spent_seconds')
+            time_spent = timedelta(seconds=seconds) if seconds is not None else None
+            if current is None:
+                # New rows only record score/time for assignments, as in mark_complete
+                is_assignment = submodules[submodule_id][1] == 'assignment'
+                score = score if is_assignment else None
+                time_spent = time_spent if is_assignment else None
+            else:
+                score = score if score is not None else current.score
+                time_spent = time_spent if time_spent is not None else current.time_spent
+
+            rows.append(SubModuleProgress(
+                enrollment_id=enrollment_id,
+                submodule_id=submodule_id,
+                tenant_id=enrollments[enrollment_id].tenant_id,
+                is_completed=True,
+                completed_at=now,
+                score=score,
+                time_spent=time_spent,
+            ))
+
+        if rows:
+            SubModuleProgress.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['enrollment', 'submodule'],
+                update_fields=['is_completed', 'completed_at', 'score', 'time_spent'],
+            )
+            # bulk_create skips post_save, so do the signal work once per enrollment
+            affected = {row.enrollment_id for row in rows}
+            counters.recount_enrollments(Enrollment.objects.filter(pk__in=affected))
+            for user_id in {enrollments[enrollment_id].user_id for enrollment_id in affected}:
+                course_cache.bump_user(user_id)
+            for enrollment_id in affected:
+                schedule_enrollment_sync(enrollment_id)
+
+        written = SubModuleProgress.objects.filter(
+            enrollment_id__in=enrollment_ids,
+            submodule_id__in=submodule_ids
+        ).select_related('submodule')
+        return Response({
+            'updated': len(rows),
+            'skipped': skipped,
+            'results': SubModuleProgressSerializer(
+                [progress for progress in written if (progress.enrollment_id, progress.submodule_id) in completions],
+                many=True
+            ).data,
+        })
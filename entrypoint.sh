@@ -14,6 +14,9 @@ fi
 # Run migrations
 python manage.py migrate
 
+# Roll up metric history once; platform totals are sums of the daily rows
+python manage.py backfill_daily_metrics --if-missing
+
 # Collect static files
 # python manage.py collectstatic --no-input --clear
 
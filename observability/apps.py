@@ -0,0 +1,28 @@
+from django.apps import AppConfig
+
+
+class ObservabilityConfig(AppConfig):
+    name = 'observability'
+
+    def ready(self):
+        from django.conf import settings
+        from . import metrics, slow_queries, task_metrics
+        if metrics.enabled():
+            self._time_serializers(metrics)
+            task_metrics.connect()
+        if settings.SLOW_QUERY_LOG_ENABLED:
+            slow_queries.connect()
+
+    @staticmethod
+    def _time_serializers(metrics):
+        from rest_framework import serializers
+
+        def timed(fget):
+            def data(self):
+                with metrics.timed_serialization():
+                    return fget(self)
+            return data
+
+        for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+            prop = serializer_class.__dict__['data']
+            serializer_class.data = property(timed(prop.fget))
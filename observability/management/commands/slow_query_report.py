@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from observability import slow_queries
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'count': 'count',
+    'mean': 'mean_ms',
+    'max': 'max_ms',
+}
+
+
+class Command(BaseCommand):
+    help = "Print the slowest query fingerprints recorded by the slow-query log."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Number of fingerprints to show.')
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Rank by total time (default), count, mean or max duration.'
+        )
+        parser.add_argument('--origin', help='Only fingerprints seen from origins containing this text.')
+        parser.add_argument('--explain', action='store_true', help='Include the sampled query plans.')
+        parser.add_argument('--reset', action='store_true', help='Discard every recorded fingerprint.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            cleared = slow_queries.reset()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {cleared} fingerprint(s)."))
+            return
+
+        rows = slow_queries.report()
+        if options['origin']:
+            rows = [row for row in rows if any(options['origin'] in origin for origin in row['origins'])]
+        rows.sort(key=lambda row: row[SORT_KEYS[options['sort']]], reverse=True)
+        if not rows:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        self.stdout.write(f"{len(rows)} fingerprint(s), top {min(options['limit'], len(rows))} by {options['sort']}:")
+        for rank, row in enumerate(rows[:options['limit']], start=1):
+            origins = ', '.join(
+                f'{origin} ({count})'
+                for origin, count in sorted(row['origins'].items(), key=lambda item: item[1], reverse=True)
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n#{rank} {row['fingerprint']}: {row['count']}x, total {row['total_ms']:.1f} ms, "
+                f"mean {row['mean_ms']:.1f} ms, max {row['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"  last seen {datetime.fromtimestamp(row['last_seen']):%Y-%m-%d %H:%M:%S}")
+            self.stdout.write(f"  from {origins}")
+            self.stdout.write(f"  {row['sql']}")
+            if options['explain'] and row.get('explain'):
+                self.stdout.write(f"  plan ({row['explained_ms']:.1f} ms run):")
+                for line in row['explain'].splitlines():
+                    self.stdout.write(f"    {line}")
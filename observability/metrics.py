@@ -0,0 +1,124 @@
+"""
+Prometheus metrics for the API.
+
+Metrics live in prometheus_client's default registry. Under gunicorn with
+several workers, set PROMETHEUS_MULTIPROC_DIR so every worker writes its
+samples to a shared directory and /metrics aggregates them.
+
+Request metrics are labelled by `view` ("CourseViewSet.list",
+"PlatformMetricsView.get", ...) and `tier`, a coarse tenant size bucket:
+labelling by tenant would give every tenant its own time series.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds',
+    'Time to build the response, by view.',
+    ['view', 'method', 'status', 'tier'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'api_request_db_queries',
+    'Database queries per request, by view.',
+    ['view', 'tier'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'api_request_db_seconds',
+    'Time spent in database queries per request, by view.',
+    ['view', 'tier'],
+    buckets=LATENCY_BUCKETS,
+)
+SERIALIZER_TIME = Histogram(
+    'api_serializer_seconds',
+    'Time spent producing serializer.data per request, by view.',
+    ['view', 'tier'],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'api_cache_requests_total',
+    'Application cache lookups by cache and result.',
+    ['cache', 'result'],
+)
+
+
+_state = threading.local()
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+def record_cache(name, hit):
+    """Count a lookup in one of the application caches (course_list, permission, ...)."""
+    CACHE_REQUESTS.labels(cache=name, result='hit' if hit else 'miss').inc()
+
+
+# ==========================================
+# Serializer time
+# ==========================================
+# ObservabilityConfig.ready wraps Serializer.data / ListSerializer.data with
+# `timed_serialization`. Nested serializers run inside the outer .data call,
+# so only the outermost call is added to the request total.
+
+def start_request():
+    _state.serializer_seconds = 0.0
+    _state.depth = 0
+
+
+def finish_request():
+    seconds = getattr(_state, 'serializer_seconds', 0.0)
+    _state.serializer_seconds = None
+    return seconds
+
+
+@contextmanager
+def timed_serialization():
+    if getattr(_state, 'serializer_seconds', None) is None or _state.depth:
+        yield
+        return
+    _state.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        _state.serializer_seconds += time.perf_counter() - started
+
+
+# ==========================================
+# Tenant tiers
+# ==========================================
+# Tier = bucket of the tenant's user count, looked up at most once per
+# TIER_TTL seconds per process.
+
+TIER_THRESHOLDS = ((100, 'small'), (1000, 'medium'))
+TIER_TTL = 3600
+_tiers = {}
+
+
+def tenant_tier(user):
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    tenant_id = user.tenant_id
+    if not tenant_id:
+        return 'platform'
+
+    cached = _tiers.get(tenant_id)
+    now = time.monotonic()
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    from accounts.models import User
+    users = User.objects.filter(tenant_id=tenant_id).count()
+    tier = next((name for limit, name in TIER_THRESHOLDS if users < limit), 'large')
+    _tiers[tenant_id] = (now + TIER_TTL, tier)
+    return tier
@@ -0,0 +1,166 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.exceptions import APIException
+
+from . import metrics, profiling, slow_queries
+
+
+class MetricsMiddleware:
+    """
+    Record latency, database queries / time and serializer time of every
+    request (see observability.metrics). Removed from the stack at startup
+    unless METRICS_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._metrics_view = 'unmatched'
+        queries = QueryTimer()
+        metrics.start_request()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            serializer_seconds = metrics.finish_request()
+        elapsed = time.perf_counter() - started
+
+        # DRF copies the token-authenticated user onto the Django request
+        tier = metrics.tenant_tier(getattr(request, 'user', None))
+        view = request._metrics_view
+        metrics.REQUEST_LATENCY.labels(view, request.method, response.status_code, tier).observe(elapsed)
+        metrics.REQUEST_QUERIES.labels(view, tier).observe(queries.count)
+        metrics.REQUEST_DB_TIME.labels(view, tier).observe(queries.seconds)
+        metrics.SERIALIZER_TIME.labels(view, tier).observe(serializer_seconds)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_label(request, view_func)
+
+
+def view_label(request, view_func):
+    """"CourseViewSet.list" for viewset actions, "ViewName.get" for API views."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return request.resolver_match.view_name or view_func.__name__
+    actions = getattr(view_func, 'actions', None) or {}
+    method = request.method.lower()
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts and times queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# cProfile hooks the whole interpreter (sys.monitoring on Python 3.12+): a
+# second enable() while one is running raises ValueError, and a profile
+# would record other threads' frames. One request is profiled at a time.
+_profiler_lock = threading.Lock()
+
+
+class ProfilerMiddleware:
+    """
+    Profile single API requests on demand (see observability.profiling):
+    requests from a super admin carrying PROFILER_HEADER, and a
+    PROFILER_SAMPLE_RATE share of all others. The profile id is returned in
+    the X-Profile-Id response header. Requests arriving while another one is
+    profiled are served unprofiled. Removed from the stack at startup
+    unless PROFILER_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = settings.PROFILER_HEADER
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            profile = getattr(request, '_profile', None)
+            if profile is not None:
+                profile.profiler.disable()
+                profile.sql_trace.__exit__(None, None, None)
+                _profiler_lock.release()
+        if profile is None:
+            return response
+
+        profiling.save(profile.finish(request, response))
+        response['X-Profile-Id'] = profile.id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Only DRF views are profiled
+        if getattr(view_func, 'cls', None) is None:
+            return None
+        if not (request.headers.get(self.header) and _is_super_admin(request)):
+            if not self.sample_rate or random.random() >= self.sample_rate:
+                return None
+        if not _profiler_lock.acquire(blocking=False):
+            return None
+
+        profile = profiling.RequestProfile(request, view_label(request, view_func))
+        try:
+            profile.profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage, ...) owns the hook
+            _profiler_lock.release()
+            return None
+        profile.sql_trace = connection.execute_wrapper(profile)
+        profile.sql_trace.__enter__()
+        request._profile = profile
+        return None
+
+
+def _is_super_admin(request):
+    """Authenticate the token early, before the view does, to vet the profiling header."""
+    from tenants.authentication import TenantAwareJWTAuthentication
+    try:
+        result = TenantAwareJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return result is not None and result[0].role_name == 'SUPER_ADMIN'
+
+
+class SlowQueryMiddleware:
+    """
+    Log the request's queries slower than SLOW_QUERY_THRESHOLD_MS, tagged
+    with the view (see observability.slow_queries). Removed from the stack
+    at startup unless SLOW_QUERY_LOG_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._slow_query_log = slow_queries.SlowQueryLog(f'{request.method} {request.path}')
+        with connection.execute_wrapper(request._slow_query_log):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._slow_query_log.origin = view_label(request, view_func)
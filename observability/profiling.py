@@ -0,0 +1,158 @@
+"""
+On-demand request profiles.
+
+A profile holds the cProfile stats of one request plus every SQL statement
+it ran, with timings. Profiles are taken when a super admin sends the
+PROFILER_HEADER header, or for a PROFILER_SAMPLE_RATE share of API requests.
+They are stored zlib-compressed for PROFILER_TTL seconds, in the cache or
+under PROFILER_DIR when it is set. The stats are kept in the format of
+pstats' dump_stats, so a download opens directly in pstats or snakeviz.
+"""
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+INDEX_KEY = 'profile_index'
+INDEX_SIZE = 100
+SQL_PARAMS_LIMIT = 500
+
+
+def _profile_key(profile_id):
+    return f'profile_{profile_id}'
+
+
+class RequestProfile:
+    """cProfile plus a SQL trace (a connection.execute_wrapper) for one request."""
+
+    def __init__(self, request, view):
+        self.id = uuid.uuid4().hex
+        self.view = view
+        self.path = request.get_full_path()
+        self.method = request.method
+        self.queries = []
+        self.profiler = cProfile.Profile()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params)[:SQL_PARAMS_LIMIT],
+                'many': many,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+    def finish(self, request, response):
+        """Build the stored record once the response is ready."""
+        duration = time.perf_counter() - self.started
+        self.profiler.create_stats()
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated
+        return {
+            'meta': {
+                'id': self.id,
+                'view': self.view,
+                'method': self.method,
+                'path': self.path,
+                'status': response.status_code,
+                'user_id': user.pk if authenticated else None,
+                'tenant_id': user.tenant_id if authenticated else None,
+                'started_at': self.started_at,
+                'duration_ms': round(duration * 1000, 3),
+                'query_count': len(self.queries),
+                'query_ms': round(sum(query['ms'] for query in self.queries), 3),
+            },
+            'sql': self.queries,
+            'stats': self.profiler.stats,
+        }
+
+
+# ==========================================
+# Storage
+# ==========================================
+
+def _directory():
+    path = getattr(settings, 'PROFILER_DIR', '')
+    return Path(path) if path else None
+
+
+def save(record):
+    blob = zlib.compress(marshal.dumps(record))
+    meta = record['meta']
+    timeout = settings.PROFILER_TTL
+    directory = _directory()
+    if directory is not None:
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{meta['id']}.prof.z").write_bytes(blob)
+        (directory / f"{meta['id']}.json").write_text(json.dumps(meta))
+        return
+
+    cache.set(_profile_key(meta['id']), blob, timeout=timeout)
+    # Newest first; readers drop entries whose profile has expired
+    index = cache.get(INDEX_KEY) or []
+    cache.set(INDEX_KEY, [meta] + index[:INDEX_SIZE - 1], timeout=timeout)
+
+
+def load(profile_id):
+    """Return a stored record, or None when it is unknown or expired."""
+    directory = _directory()
+    if directory is not None:
+        path = directory / f'{profile_id}.prof.z'
+        blob = path.read_bytes() if path.is_file() else None
+    else:
+        blob = cache.get(_profile_key(profile_id))
+    return marshal.loads(zlib.decompress(blob)) if blob is not None else None
+
+
+def recent():
+    """Metadata of the stored profiles, newest first."""
+    directory = _directory()
+    if directory is None:
+        index = cache.get(INDEX_KEY) or []
+        live = cache.get_many([_profile_key(meta['id']) for meta in index])
+        return [meta for meta in index if _profile_key(meta['id']) in live]
+
+    expired_before = time.time() - settings.PROFILER_TTL
+    metas = []
+    for path in directory.glob('*.json') if directory.is_dir() else ():
+        if path.stat().st_mtime < expired_before:
+            path.unlink(missing_ok=True)
+            path.with_name(path.name.replace('.json', '.prof.z')).unlink(missing_ok=True)
+            continue
+        metas.append(json.loads(path.read_text()))
+    return sorted(metas, key=lambda meta: meta['started_at'], reverse=True)[:INDEX_SIZE]
+
+
+def is_valid_id(profile_id):
+    return len(profile_id) == 32 and all(char in '0123456789abcdef' for char in profile_id)
+
+
+class _LoadedStats:
+    """Lets pstats.Stats read stats that were stored as a dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def summarize(stats, limit=40, sort='cumulative'):
+    """pstats' text report of the `limit` most expensive functions."""
+    stream = io.StringIO()
+    report = pstats.Stats(_LoadedStats(stats), stream=stream)
+    report.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,237 @@
+"""
+Slow-query log.
+
+Requests (SlowQueryMiddleware) and Celery tasks run their queries through a
+connection.execute_wrapper that times each statement. Statements slower
+than SLOW_QUERY_THRESHOLD_MS are logged with their origin ("CourseViewSet.list",
+"task analytics.tasks.rollup_daily_metrics") and aggregated in the cache
+per fingerprint: the SQL with every literal and placeholder replaced by "?",
+so one ORM query with different arguments is counted as one.
+
+A SELECT whose fingerprint has no recent plan is queued, after commit, to
+a Celery worker that re-runs it once under EXPLAIN (ANALYZE, BUFFERS) on
+PostgreSQL (plain EXPLAIN QUERY PLAN elsewhere), at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL seconds; the request only pays for the enqueue.
+Parameter values go to the task only: the stored example keeps their types.
+The `slow_query_report` command prints the top fingerprints.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'slowq_index'
+INDEX_SIZE = 1000
+ORIGINS_KEPT = 20
+EXAMPLE_LIMIT = 2000
+
+_state = threading.local()
+
+
+# ==========================================
+# Fingerprints
+# ==========================================
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals, placeholders and value lists collapsed to "?" / "(...)"."""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    sql = _ROWS.sub('(...), ...', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.md5(normalized.encode()).hexdigest()[:16]
+
+
+# ==========================================
+# Recording
+# ==========================================
+
+def _key(name, fp):
+    return f'slowq_{name}_{fp}'
+
+
+def _incr(key, delta, timeout):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=timeout):
+            cache.incr(key, delta)
+
+
+class SlowQueryLog:
+    """connection.execute_wrapper recording statements above the threshold."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+
+    def __call__(self, execute, sql, params, many, context):
+        # The EXPLAIN we issue ourselves passes through here too
+        if getattr(_state, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        ms = (time.perf_counter() - started) * 1000
+        if ms >= self.threshold_ms:
+            try:
+                record(sql, params, many, ms, self.origin, context['connection'])
+            except Exception:
+                logger.exception("Could not record slow query")
+        return result
+
+
+def record(sql, params, many, ms, origin, conn=connection):
+    normalized = normalize(sql)
+    fp = fingerprint(normalized)
+    logger.warning("Slow query %s (%.1f ms) from %s: %s", fp, ms, origin, normalized[:500])
+
+    timeout = settings.SLOW_QUERY_TTL
+    _incr(_key('count', fp), 1, timeout)
+    _incr(_key('us', fp), int(ms * 1000), timeout)
+
+    sample = cache.get(_key('sample', fp))
+    if sample is None:
+        sample = {'fingerprint': fp, 'sql': normalized, 'first_seen': time.time(), 'max_ms': 0, 'origins': {}}
+        index = cache.get(INDEX_KEY) or []
+        if fp not in index:
+            cache.set(INDEX_KEY, [fp] + index[:INDEX_SIZE - 1], timeout=timeout)
+    origins = sample['origins']
+    if origin in origins or len(origins) < ORIGINS_KEPT:
+        origins[origin] = origins.get(origin, 0) + 1
+    sample['last_seen'] = time.time()
+    sample['last_ms'] = round(ms, 3)
+    if ms > sample['max_ms']:
+        sample['max_ms'] = round(ms, 3)
+        sample['example'] = f'{sql[:EXAMPLE_LIMIT]} -- params: {redact(params)!r}'[:EXAMPLE_LIMIT * 2]
+    cache.set(_key('sample', fp), sample, timeout=timeout)
+
+    if not settings.SLOW_QUERY_EXPLAIN or many or sql.lstrip()[:6].upper() != 'SELECT':
+        return
+    if cache.add(_key('explained', fp), 1, timeout=settings.SLOW_QUERY_EXPLAIN_INTERVAL):
+        transaction.on_commit(lambda: _queue_explain(fp, sql, params, ms), using=conn.alias)
+
+
+def redact(params):
+    """Parameter type names in place of values, which may be personal data."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def _queue_explain(fp, sql, params, ms):
+    from .tasks import explain_slow_query_task
+    try:
+        explain_slow_query_task.delay(fp, sql, params, ms)
+    except Exception:
+        # Broker down or parameters that do not serialize; the next
+        # occurrence after SLOW_QUERY_EXPLAIN_INTERVAL tries again
+        logger.info("Could not queue EXPLAIN of slow query %s", fp, exc_info=True)
+
+
+def store_plan(fp, sql, params, ms, conn=connection):
+    """EXPLAIN `sql` and attach the plan to the fingerprint's sample."""
+    plan = explain(conn, sql, params)
+    if plan is None:
+        return None
+    sample = cache.get(_key('sample', fp))
+    if sample is not None:
+        sample['explain'] = plan
+        sample['explained_at'] = time.time()
+        sample['explained_ms'] = round(ms, 3)
+        cache.set(_key('sample', fp), sample, timeout=settings.SLOW_QUERY_TTL)
+    return plan
+
+
+def explain(conn, sql, params):
+    """Plan of `sql` as text, or None when it cannot be explained here."""
+    if conn.needs_rollback:
+        return None
+    if conn.vendor == 'postgresql':
+        prefix = conn.ops.explain_query_prefix(analyze=True, buffers=True)
+    else:
+        prefix = conn.ops.explain_query_prefix()
+    _state.explaining = True
+    try:
+        # A savepoint keeps a failing EXPLAIN from aborting the caller's transaction
+        with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError:
+        logger.info("Could not EXPLAIN slow query", exc_info=True)
+        return None
+    finally:
+        _state.explaining = False
+
+
+# ==========================================
+# Report
+# ==========================================
+
+def report():
+    """Aggregated slow queries: one dict per fingerprint, unordered."""
+    index = cache.get(INDEX_KEY) or []
+    keys = [_key(name, fp) for fp in index for name in ('sample', 'count', 'us')]
+    values = cache.get_many(keys)
+    rows = []
+    for fp in index:
+        sample = values.get(_key('sample', fp))
+        count = values.get(_key('count', fp))
+        if sample is None or not count:
+            continue
+        total_ms = values.get(_key('us', fp), 0) / 1000
+        rows.append({**sample, 'count': count, 'total_ms': round(total_ms, 3), 'mean_ms': round(total_ms / count, 3)})
+    return rows
+
+
+def reset():
+    index = cache.get(INDEX_KEY) or []
+    cache.delete_many([_key(name, fp) for fp in index for name in ('sample', 'count', 'us', 'explained')])
+    cache.delete(INDEX_KEY)
+    return len(index)
+
+
+# ==========================================
+# Celery tasks
+# ==========================================
+# Connected by ObservabilityConfig.ready when SLOW_QUERY_LOG_ENABLED is set.
+
+_task_wrappers = {}
+
+
+def on_task_prerun(task_id=None, task=None, **kwargs):
+    wrapper = connection.execute_wrapper(SlowQueryLog(f'task {task.name}'))
+    wrapper.__enter__()
+    _task_wrappers[task_id] = wrapper
+
+
+def on_task_postrun(task_id=None, **kwargs):
+    wrapper = _task_wrappers.pop(task_id, None)
+    if wrapper is not None:
+        wrapper.__exit__(None, None, None)
+
+
+def connect():
+    from celery.signals import task_postrun, task_prerun
+    task_prerun.connect(on_task_prerun, weak=False)
+    task_postrun.connect(on_task_postrun, weak=False)
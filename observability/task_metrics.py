@@ -0,0 +1,176 @@
+"""
+Prometheus metrics for Celery tasks.
+
+Publishers stamp every task message with an `enqueued_at` header, so the
+worker can observe how long the task waited in the broker before it started
+(the clocks of the web and worker hosts are assumed to be in sync). Workers
+record runtime by final state, retries and failures per task and queue, and
+serve them from an HTTP exporter on CELERY_METRICS_PORT.
+
+Queue depth is read from the broker when the web /metrics endpoint is
+scraped, not by the workers, so each queue is reported once however many
+workers consume it.
+"""
+import logging
+import os
+import time
+
+from celery import current_app
+from celery.signals import (
+    before_task_publish, task_failure, task_postrun, task_prerun, task_retry, worker_process_shutdown,
+)
+from celery.utils.time import maybe_iso8601
+from django.conf import settings
+from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+from .metrics import LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+TASKS_PUBLISHED = Counter(
+    'celery_tasks_published_total',
+    'Task messages sent to the broker.',
+    ['task', 'queue'],
+)
+TASK_QUEUE_WAIT = Histogram(
+    'celery_task_queue_wait_seconds',
+    'Time from publish (or ETA) until a worker started the task.',
+    ['task', 'queue'],
+    buckets=WAIT_BUCKETS,
+)
+TASK_RUNTIME = Histogram(
+    'celery_task_runtime_seconds',
+    'Task execution time by final state.',
+    ['task', 'queue', 'state'],
+    buckets=LATENCY_BUCKETS + (30, 60, 300),
+)
+TASK_RETRIES = Counter(
+    'celery_task_retries_total',
+    'Task retries requested.',
+    ['task', 'queue'],
+)
+TASK_FAILURES = Counter(
+    'celery_task_failures_total',
+    'Tasks that raised, by exception type.',
+    ['task', 'queue', 'exception'],
+)
+
+_started = {}
+
+
+def _queue(task):
+    delivery_info = task.request.delivery_info or {}
+    return delivery_info.get('routing_key') or getattr(task, 'queue', None) or 'eager'
+
+
+# ==========================================
+# Signal handlers
+# ==========================================
+# Connected by ObservabilityConfig.ready when METRICS_ENABLED is set.
+
+def on_publish(sender=None, headers=None, routing_key=None, **kwargs):
+    headers['enqueued_at'] = time.time()
+    TASKS_PUBLISHED.labels(sender, routing_key or 'default').inc()
+
+
+def on_prerun(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    enqueued_at = getattr(task.request, 'enqueued_at', None)
+    if enqueued_at is None:
+        return
+    ready_at = enqueued_at
+    if task.request.eta:
+        # Countdown / ETA tasks only become due at their ETA
+        ready_at = max(ready_at, maybe_iso8601(task.request.eta).timestamp())
+    TASK_QUEUE_WAIT.labels(task.name, _queue(task)).observe(max(time.time() - ready_at, 0))
+
+
+def on_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name, _queue(task), state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+def on_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name, _queue(sender)).inc()
+
+
+def on_failure(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.labels(sender.name, _queue(sender), type(exception).__name__).inc()
+
+
+def on_process_shutdown(pid=None, **kwargs):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def connect():
+    before_task_publish.connect(on_publish, weak=False)
+    task_prerun.connect(on_prerun, weak=False)
+    task_postrun.connect(on_postrun, weak=False)
+    task_retry.connect(on_retry, weak=False)
+    task_failure.connect(on_failure, weak=False)
+    worker_process_shutdown.connect(on_process_shutdown, weak=False)
+
+
+# ==========================================
+# Worker exporter
+# ==========================================
+
+def start_exporter():
+    """
+    Serve this worker's task metrics on CELERY_METRICS_PORT. Prefork pool
+    children record into PROMETHEUS_MULTIPROC_DIR, which must be set in the
+    worker's environment (and be private to the worker) before it starts.
+    """
+    port = getattr(settings, 'CELERY_METRICS_PORT', None)
+    if not settings.METRICS_ENABLED or not port:
+        return
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+    logger.info("Celery metrics exporter listening on :%s", port)
+
+
+# ==========================================
+# Queue depth
+# ==========================================
+
+class QueueDepthCollector:
+    """Reads the number of waiting messages of every task queue from the broker."""
+
+    def collect(self):
+        family = GaugeMetricFamily('celery_queue_length', 'Messages waiting in the broker queue.', labels=['queue'])
+        try:
+            with current_app.connection_for_read() as connection:
+                connection.ensure_connection(max_retries=1)
+                channel = connection.default_channel
+                for queue in sorted(task_queues(current_app)):
+                    family.add_metric([queue], _queue_length(connection, channel, queue))
+        except Exception:
+            logger.warning("Could not sample Celery queue depth", exc_info=True)
+            return
+        yield family
+
+
+def task_queues(app):
+    """Every queue a registered task is routed to, plus the default queue."""
+    queues = {getattr(task, 'queue', None) for task in app.tasks.values()}
+    queues.add(app.conf.task_default_queue)
+    queues.discard(None)
+    return queues
+
+
+def _queue_length(connection, channel, queue):
+    try:
+        return channel.queue_declare(queue=queue, passive=True).message_count
+    except connection.channel_errors:
+        # Not declared yet: nothing was ever published to it
+        return 0
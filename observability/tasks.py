@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from .slow_queries import store_plan
+
+
+@shared_task(queue="default_queue")
+def explain_slow_query_task(fp, sql, params, ms):
+    """
+    Re-run a slow SELECT under EXPLAIN off the request path and keep its plan.
+    """
+    plan = store_plan(fp, sql, params, ms)
+    return f"Explained slow query {fp}" if plan is not None else f"Could not explain slow query {fp}"
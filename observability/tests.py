@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from . import middleware, slow_queries
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_AUTH_TOKEN='scrape-token')
+class MetricsViewTests(TestCase):
+
+    def test_scrape_with_token(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'api_request_duration_seconds', response.content)
+
+    def test_wrong_token_is_rejected(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer other').status_code, 401)
+
+    @override_settings(METRICS_AUTH_TOKEN='')
+    def test_refused_without_configured_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_hidden_when_disabled(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 404)
+
+
+@override_settings(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=1.0)
+class ProfilerMiddlewareTests(TestCase):
+
+    def test_sampled_request_is_profiled(self):
+        response = self.client.get('/api/courses/')
+        self.assertIn('X-Profile-Id', response)
+        self.assertFalse(middleware._profiler_lock.locked())
+
+    def test_requests_are_served_unprofiled_while_another_is_profiled(self):
+        middleware._profiler_lock.acquire()
+        try:
+            response = self.client.get('/api/courses/')
+        finally:
+            middleware._profiler_lock.release()
+        self.assertNotIn('X-Profile-Id', response)
+
+
+@override_settings(SLOW_QUERY_EXPLAIN=True)
+class SlowQueryLogTests(TestCase):
+    sql = 'SELECT %s::text AS secret'
+    params = ['hunter2']
+
+    def setUp(self):
+        cache.clear()
+
+    def sample(self):
+        [row] = slow_queries.report()
+        return row
+
+    def test_explain_is_queued_after_commit(self):
+        with mock.patch('observability.tasks.explain_slow_query_task.delay') as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                slow_queries.record(self.sql, self.params, False, 250.0, 'test', connection)
+            delay.assert_not_called()
+            self.assertNotIn('explain', self.sample())
+
+            for callback in callbacks:
+                callback()
+        fp = self.sample()['fingerprint']
+        delay.assert_called_once_with(fp, self.sql, self.params, 250.0)
+
+        self.assertIsNotNone(slow_queries.store_plan(fp, self.sql, self.params, 250.0))
+        self.assertIn('explain', self.sample())
+
+    def test_example_params_are_redacted(self):
+        with mock.patch('observability.tasks.explain_slow_query_task.delay'):
+            slow_queries.record(self.sql, self.params, False, 250.0, 'test', connection)
+        example = self.sample()['example']
+        self.assertNotIn('hunter2', example)
+        self.assertIn("params: ['str']", example)
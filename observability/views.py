@@ -0,0 +1,87 @@
+import marshal
+import os
+import pstats
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+
+from accounts.permissions import IsSuperAdmin
+from . import metrics, profiling
+from .task_metrics import QueueDepthCollector
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. A plain Django view so scrapes skip DRF
+    authentication and throttling; scrapes must present METRICS_AUTH_TOKEN,
+    and every scrape is refused while no token is configured.
+    """
+    if not metrics.enabled():
+        raise Http404
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if not token:
+        return HttpResponse(status=403)
+    if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Merge the samples every worker process wrote
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    # Queue depth is sampled from the broker on every scrape
+    broker = CollectorRegistry()
+    broker.register(QueueDepthCollector())
+    return HttpResponse(generate_latest(registry) + generate_latest(broker), content_type=CONTENT_TYPE_LATEST)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Request profiles taken by ProfilerMiddleware (Super Admin only).
+
+    - list: metadata of recent profiles, newest first
+    - retrieve: metadata, SQL trace and the top functions by cumulative time
+      (`?sort=` any pstats sort key, `?limit=` number of functions)
+    - pstats: the raw stats file, for pstats / snakeviz
+    """
+    permission_classes = [IsSuperAdmin]
+    lookup_value_regex = '[0-9a-f]{32}'
+
+    def list(self, request):
+        return Response(profiling.recent())
+
+    def retrieve(self, request, pk=None):
+        record = self._load(pk)
+        sort = request.query_params.get('sort', 'cumulative')
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            raise ValidationError({'sort': f"Must be one of: {', '.join(sorted(pstats.Stats.sort_arg_dict_default))}"})
+        try:
+            limit = int(request.query_params.get('limit', 40))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        return Response({
+            **record['meta'],
+            'sql': record['sql'],
+            'profile': profiling.summarize(record['stats'], limit=limit, sort=sort),
+        })
+
+    @action(detail=True, methods=['get'])
+    def pstats(self, request, pk=None):
+        record = self._load(pk)
+        response = HttpResponse(marshal.dumps(record['stats']), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{pk}.prof"'
+        return response
+
+    def _load(self, pk):
+        record = profiling.load(pk) if profiling.is_valid_id(pk) else None
+        if record is None:
+            raise NotFound('Profile not found or expired.')
+        return record
@@ -0,0 +1,124 @@
+"""
+Grouped revenue analytics.
+
+Every figure in the revenue report comes from a conditional aggregate
+grouped by tenant (`Sum`/`Count` with `filter=`), so a page of tenants costs
+one query per source table instead of ten queries per tenant.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from accounts.models import User
+from courses.models import Course
+from enrollments.models import Enrollment
+from .models import Payment
+
+INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+COMPLETED = Q(status=Payment.Status.COMPLETED)
+PENDING = Q(status=Payment.Status.PENDING)
+FAILED = Q(status=Payment.Status.FAILED)
+
+PAYMENT_AGGREGATES = {
+    'total_revenue': Sum('amount', filter=COMPLETED, default=0),
+    'total_transactions': Count('id'),
+    'completed_payments': Count('id', filter=COMPLETED),
+    'total_amount': Sum('amount', default=0),
+    'pending_payments': Count('id', filter=PENDING),
+    'failed_payments': Count('id', filter=FAILED),
+}
+
+EMPTY_PAYMENTS = {
+    'total_revenue': 0,
+    'total_transactions': 0,
+    'completed_payments': 0,
+    'total_amount': 0,
+    'pending_payments': 0,
+    'failed_payments': 0,
+}
+
+
+def parse_date(value, end_of_day=False):
+    """Parse YYYY-MM-DD into an aware datetime; raises ValueError if invalid."""
+    day = datetime.strptime(value, '%Y-%m-%d').date()
+    if end_of_day:
+        day += timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _in_range(queryset, field, start, end):
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
+
+
+def _grouped_counts(queryset, tenant_ids):
+    rows = queryset.filter(tenant_id__in=tenant_ids).order_by().values('tenant_id').annotate(total=Count('id'))
+    return {row['tenant_id']: row['total'] for row in rows}
+
+
+def tenant_revenue(tenants, start=None, end=None, interval=None):
+    """
+    Revenue rows for `tenants` (an iterable of Tenant), in the same order.
+    Costs four grouped queries, plus one when `interval` adds a time series.
+    """
+    tenants = list(tenants)
+    tenant_ids = [tenant.id for tenant in tenants]
+
+    payments = _in_range(Payment.objects.filter(tenant_id__in=tenant_ids), 'created_at', start, end)
+    payment_rows = {
+        row.pop('tenant_id'): row
+        for row in payments.order_by().values('tenant_id').annotate(**PAYMENT_AGGREGATES)
+    }
+    user_counts = _grouped_counts(_in_range(User.objects.all(), 'date_joined', start, end), tenant_ids)
+    course_counts = _grouped_counts(_in_range(Course.objects.all(), 'created_at', start, end), tenant_ids)
+    enrollment_counts = _grouped_counts(_in_range(Enrollment.objects.all(), 'enrolled_at', start, end), tenant_ids)
+
+    series = {}
+    if interval:
+        bucketed = (
+            payments.order_by()
+            .annotate(period=INTERVALS[interval]('created_at'))
+            .values('tenant_id', 'period')
+            .annotate(**PAYMENT_AGGREGATES)
+            .order_by('tenant_id', 'period')
+        )
+        for row in bucketed:
+            series.setdefault(row.pop('tenant_id'), []).append(row)
+
+    rows = []
+    for tenant in tenants:
+        row = {
+            'tenant_name': tenant.name,
+            'user_count': user_counts.get(tenant.id, 0),
+            'course_count': course_counts.get(tenant.id, 0),
+            'enrollment_count': enrollment_counts.get(tenant.id, 0),
+            **payment_rows.get(tenant.id, EMPTY_PAYMENTS),
+        }
+        if interval:
+            row['series'] = series.get(tenant.id, [])
+        rows.append(row)
+    return rows
+
+
+def platform_revenue(start=None, end=None):
+    """Platform-wide totals in four aggregate queries."""
+    payments = _in_range(Payment.objects.all(), 'created_at', start, end)
+    return {
+        'tenant_name': 'PLATFORM_TOTAL',
+        'user_count': _in_range(
+            User.objects.exclude(role__name__in=['SUPER_ADMIN', 'TENANT_ADMIN']), 'date_joined', start, end
+        ).count(),
+        'course_count': _in_range(Course.objects.all(), 'created_at', start, end).count(),
+        'enrollment_count': _in_range(Enrollment.objects.all(), 'enrolled_at', start, end).count(),
+        **payments.aggregate(**PAYMENT_AGGREGATES),
+    }
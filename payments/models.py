@@ -64,6 +64,29 @@ class Payment(AbstractTenantModel):
  
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', '-created_at', '-id'], name='payment_tenant_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+            # Checkout reuses the user's open payment for a course
+            models.Index(
+                fields=['user', 'course'],
+                condition=models.Q(status='PENDING'),
+                name='payment_pending_idx'
+            ),
+            # Stripe webhooks look payments up by intent id
+            models.Index(
+                fields=['stripe_payment_intent_id'],
+                condition=models.Q(stripe_payment_intent_id__isnull=False),
+                name='payment_intent_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the metrics signals move a payment between status counters
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
     def __str__(self):
         return f"{self.user.email} - {self.course.name} - {self.amount} ({self.status})"
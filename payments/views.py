@@ -4,21 +4,24 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from django.utils import timezone
-from django.db.models import Sum
+from django.conf import settings
+from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.http import HttpResponse
+import hashlib
 import json
 from tenants.models import Tenant
 
+from . import analytics
 from .models import Payment
+from .pagination import RevenueAnalyticsPagination
 from .serializers import (
     PaymentSerializer,
     StripeCheckoutSerializer,
     StripeCheckoutResponseSerializer,
 )
 from .stripe_service import StripeService
-from accounts.models import User
 from accounts.permissions import IsSuperAdmin, IsTenantAdmin, RolePermission
 from courses.models import Course
 from enrollments.models import Enrollment
@@ -54,7 +57,7 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
         if not request.user.tenant:
             return Response([])
             
-        payments = Payment.objects.for_current_user()
+        payments = self.get_queryset()
         if request.user.role_name == 'SUPER_ADMIN':
             if request.query_params.get('tenant'):
                 payments = payments.filter(tenant=request.query_params.get('tenant'))
@@ -187,74 +190,60 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'], url_path='revenue-analytics')
     def revenue_analytics(self, request):
         """
-        SuperAdmin: Get platform-wide revenue analytics.
+        SuperAdmin: Get platform-wide revenue analytics, paginated over tenants.
         tenant admin: Get tenant-wise revenue analytics.
+
+        Optional query params:
+        - start / end: YYYY-MM-DD, inclusive date range
+        - interval: day, week or month, adds a revenue time series per tenant
         """
+        try:
+            start = analytics.parse_date(request.query_params['start']) if request.query_params.get('start') else None
+            end = analytics.parse_date(request.query_params['end'], end_of_day=True) if request.query_params.get('end') else None
+        except ValueError:
+            return Response(
+                {'error': 'start and end must be dates in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        interval = request.query_params.get('interval')
+        if interval and interval not in analytics.INTERVALS:
+            return Response(
+                {'error': f"interval must be one of: {', '.join(analytics.INTERVALS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        analytics = []
-        if request.user.role_name == 'SUPER_ADMIN':
-            tenants = Tenant.objects.filter(is_active=True)
-        else:
-            tenant = Tenant.objects.get(id=request.user.tenant.id)
-            tenant_payments = Payment.objects.filter(tenant=tenant)
-            completed = tenant_payments.filter(status=Payment.Status.COMPLETED)
-            return Response({
-                'tenant_name': tenant.name,
-                'user_count': tenant.users.count(),
-                'course_count': tenant.course_set.count(),
-                'enrollment_count': tenant.enrollment_set.count(),
-                'total_revenue': completed.aggregate(Sum('amount'))['amount__sum'] or 0,
-                'total_transactions': tenant_payments.count(),
-                'completed_payments': completed.count(),
-                'total_amount': tenant_payments.aggregate(Sum('amount'))['amount__sum'] or 0,
-                'pending_payments': tenant_payments.filter(status=Payment.Status.PENDING).count(),
-                'failed_payments': tenant_payments.filter(status=Payment.Status.FAILED).count(),
-            })
+        is_super_admin = request.user.role_name == 'SUPER_ADMIN'
+        scope = 'platform' if is_super_admin else request.user.tenant_id
+        query_hash = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+        cache_key = f'revenue_analytics_{scope}_{query_hash}'
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
 
-        for tenant in tenants:
-            tenant_payments = Payment.objects.filter(tenant=tenant)
-            completed = tenant_payments.filter(status=Payment.Status.COMPLETED)
-
-            analytics.append({
-                'tenant_name': tenant.name,
-                'user_count': tenant.users.count(),
-                'course_count': tenant.course_set.count(),
-                'enrollment_count': tenant.enrollment_set.count(),
-                'total_revenue': completed.aggregate(Sum('amount'))['amount__sum'] or 0,
-                'total_transactions': tenant_payments.count(),
-                'completed_payments': completed.count(),
-                'total_amount': tenant_payments.aggregate(Sum('amount'))['amount__sum'] or 0,
-                'pending_payments': tenant_payments.filter(status=Payment.Status.PENDING).count(),
-                'failed_payments': tenant_payments.filter(status=Payment.Status.FAILED).count(),
-            })
+        if not is_super_admin:
+            data = analytics.tenant_revenue([request.user.tenant], start, end, interval)[0]
+        else:
+            paginator = RevenueAnalyticsPagination()
+            tenants = paginator.paginate_queryset(
+                Tenant.objects.filter(is_active=True).order_by('name'), request, view=self
+            )
+            data = {
+                'count': paginator.page.paginator.count,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'tenants': analytics.tenant_revenue(tenants, start, end, interval),
+                'platform_total': analytics.platform_revenue(start, end),
+            }
 
-        # Platform totals
-
-        all_completed = Payment.objects.filter(status=Payment.Status.COMPLETED)
-        platform_total = {
-            'tenant_name': 'PLATFORM_TOTAL',
-            'user_count': User.objects.exclude(role__name__in=['SUPER_ADMIN', 'TENANT_ADMIN']).count(),
-            'course_count': Course.objects.count(),
-            'enrollment_count': Enrollment.objects.count(),
-            'total_revenue': all_completed.aggregate(Sum('amount'))['amount__sum'] or 0,
-            'total_transactions': Payment.objects.count(),
-            'completed_payments': all_completed.count(),
-            'total_amount': all_completed.aggregate(Sum('amount'))['amount__sum'] or 0,
-            'pending_payments': Payment.objects.filter(status=Payment.Status.PENDING).count(),
-            'failed_payments': Payment.objects.filter(status=Payment.Status.FAILED).count(),
-        }
-
-        return Response({
-            'tenants': analytics,
-            'platform_total': platform_total
-        })
+        cache.set(cache_key, data, timeout=settings.REVENUE_ANALYTICS_CACHE_TIMEOUT)
+        return Response(data)
 
     @action(detail=False, methods=['get'], url_path='my-payments')
     def my_payments(self, request):
         """
         Get current user's payment history.
         """
-        payments = Payment.objects.filter(user=request.user)
+        payments = Payment.objects.filter(user=request.user).select_related('user', 'course', 'tenant')
         serializer = PaymentSerializer(payments, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,166 @@
+"""
+Set-based skill proficiency updates.
+
+Proficiency for a skill is the weight of the user's completed courses that
+teach it over the weight of every course in the tenant that teaches it. All
+affected skills are aggregated in one grouped query and written back with a
+single upsert, so the query count does not grow with the number of skills.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from enrollments.models import Enrollment
+from .models import CourseSkill, UserSkill
+
+HUNDRED = Decimal('100')
+TWO_PLACES = Decimal('0.01')
+
+
+def recompute_user_skills(user_id, tenant_id, course_id=None):
+    """
+    Recompute proficiency for `user_id` on every skill taught by `course_id`
+    (or on every skill in the tenant when no course is given).
+    Runs a constant number of queries: one aggregate and one upsert.
+    """
+    skills = CourseSkill.objects.filter(tenant_id=tenant_id)
+    if course_id is not None:
+        skills = skills.filter(
+            skill_id__in=CourseSkill.objects.filter(course_id=course_id).values('skill_id')
+        )
+
+    completed = Q(course_id__in=Enrollment.objects.filter(
+        user_id=user_id,
+        status=Enrollment.Status.COMPLETED
+    ).values('course_id'))
+
+    rows = skills.order_by().values('skill_id').annotate(
+        total_weight=Sum('weight'),
+        completed_weight=Sum('weight', filter=completed),
+        completed_courses=Count('course_id', filter=completed, distinct=True),
+    )
+
+    now = timezone.now()
+    user_skills = []
+    for row in rows:
+        total = row['total_weight'] or 0
+        done = row['completed_weight'] or 0
+        proficiency = min(done / total * HUNDRED, HUNDRED) if total else Decimal(0)
+        user_skills.append(UserSkill(
+            user_id=user_id,
+            skill_id=row['skill_id'],
+            tenant_id=tenant_id,
+            proficiency=Decimal(proficiency).quantize(TWO_PLACES),
+            courses_completed=row['completed_courses'],
+            last_updated=now,
+        ))
+
+    if user_skills:
+        UserSkill.objects.bulk_create(
+            user_skills,
+            update_conflicts=True,
+            unique_fields=['user', 'skill'],
+            update_fields=['proficiency', 'courses_completed', 'last_updated'],
+        )
+    return len(user_skills)
+
+
+def recompute_tenant_skills(tenant_id, batch_size=2000):
+    """
+    Rebuild UserSkill rows for every user of a tenant: one row per skill
+    taught by a course the user is enrolled in, as enrolling and completing
+    would have left them. For data written without signals (bulk loads,
+    repairs); streams one grouped query and upserts in batches.
+    """
+    totals = dict(
+        CourseSkill.objects.filter(tenant_id=tenant_id).order_by()
+        .values('skill_id').annotate(total=Sum('weight')).values_list('skill_id', 'total')
+    )
+    completed = Q(status=Enrollment.Status.COMPLETED)
+    rows = (
+        Enrollment.objects.filter(tenant_id=tenant_id, course__course_skills__isnull=False)
+        .order_by()
+        .values('user_id', skill_id=F('course__course_skills__skill_id'))
+        .annotate(
+            completed_weight=Sum('course__course_skills__weight', filter=completed),
+            completed_courses=Count('course_id', filter=completed, distinct=True),
+        )
+    )
+
+    now = timezone.now()
+    written = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        total = totals.get(row['skill_id']) or 0
+        done = row['completed_weight'] or 0
+        proficiency = min(done / total * HUNDRED, HUNDRED) if total else Decimal(0)
+        batch.append(UserSkill(
+            user_id=row['user_id'],
+            skill_id=row['skill_id'],
+            tenant_id=tenant_id,
+            proficiency=Decimal(proficiency).quantize(TWO_PLACES),
+            courses_completed=row['completed_courses'],
+            last_updated=now,
+        ))
+        if len(batch) >= batch_size:
+            written += _upsert_user_skills(batch)
+            batch = []
+    if batch:
+        written += _upsert_user_skills(batch)
+    return written
+
+
+def _upsert_user_skills(user_skills):
+    UserSkill.objects.bulk_create(
+        user_skills,
+        update_conflicts=True,
+        unique_fields=['user', 'skill'],
+        update_fields=['proficiency', 'courses_completed', 'last_updated'],
+    )
+    return len(user_skills)
+
+
+def schedule_user_skills_recompute(enrollment):
+    """
+    Recompute skills for a completed enrollment, inline or - when
+    SKILL_RECOMPUTE_ASYNC is set - on a Celery worker after commit.
+    """
+    args = (enrollment.user_id, enrollment.tenant_id, enrollment.course_id)
+    if getattr(settings, 'SKILL_RECOMPUTE_ASYNC', False):
+        from .tasks import recompute_user_skills_task
+        transaction.on_commit(lambda: recompute_user_skills_task.delay(*args))
+    else:
+        recompute_user_skills(*args)
+
+
+def create_missing_user_skills(enrollment):
+    """
+    Create zero-proficiency UserSkill rows for the skills of a newly
+    enrolled course. Returns the rows that were actually created.
+    """
+    skill_ids = set(CourseSkill.objects.filter(
+        course_id=enrollment.course_id
+    ).values_list('skill_id', flat=True))
+    if not skill_ids:
+        return []
+
+    existing = set(UserSkill.objects.filter(
+        user_id=enrollment.user_id,
+        skill_id__in=skill_ids
+    ).values_list('skill_id', flat=True))
+
+    missing = [
+        UserSkill(
+            user_id=enrollment.user_id,
+            skill_id=skill_id,
+            tenant_id=enrollment.tenant_id,
+            proficiency=Decimal('0.00'),
+            courses_completed=0,
+        )
+        for skill_id in sorted(skill_ids - existing)
+    ]
+    # ignore_conflicts covers a concurrent enrollment racing us to a row
+    return UserSkill.objects.bulk_create(missing, ignore_conflicts=True)
@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from .proficiency import recompute_user_skills
+
+
+@shared_task(queue="default_queue")
+def recompute_user_skills_task(user_id, tenant_id, course_id=None):
+    """
+    Recompute a user's skill proficiency off the request path.
+    """
+    updated = recompute_user_skills(user_id, tenant_id, course_id)
+    return f"Recomputed {updated} skills for user {user_id}"
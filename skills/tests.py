@@ -1,3 +1,74 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Role, User
+from courses.models import Course, Module, SubModule
+from enrollments.models import Enrollment, SubModuleProgress
+from enrollments.services import sync_enrollment_state
+from tenants.models import Tenant
+from .models import CourseSkill, Skill, UserSkill
+from .proficiency import create_missing_user_skills
+
+
+class ProficiencyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.user = User.objects.create_user(
+            'learner@acme.test', 'learner', 'pass',
+            tenant=cls.tenant, role=Role.objects.get(name='TENANT_USER'), is_active=True,
+        )
+        cls.skills = [Skill.objects.create(tenant=cls.tenant, name=f'Skill {i}') for i in range(25)]
+
+    def setUp(self):
+        cache.clear()
+
+    def make_course(self, name, skills):
+        course = Course.objects.create(tenant=self.tenant, name=name, description='', status='PUBLISHED')
+        module = Module.objects.create(tenant=self.tenant, course=course, title='Module')
+        SubModule.objects.create(tenant=self.tenant, module=module, title='Lesson', type='VIDEO', order=0)
+        for skill in skills:
+            CourseSkill.objects.create(tenant=self.tenant, course=course, skill=skill)
+        return course
+
+    def complete(self, course):
+        enrollment = Enrollment.objects.create(tenant=self.tenant, user=self.user, course=course)
+        SubModuleProgress.objects.create(
+            tenant=self.tenant, enrollment=enrollment, submodule=SubModule.objects.get(module__course=course),
+            is_completed=True,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sync_enrollment_state(enrollment.pk), Enrollment.Status.COMPLETED)
+        return len(queries)
+
+    def test_completion_queries_do_not_grow_with_skills(self):
+        few = self.complete(self.make_course('Few', self.skills[:2]))
+        many = self.complete(self.make_course('Many', self.skills))
+
+        self.assertEqual(many, few)
+        proficiency = UserSkill.objects.filter(user=self.user).values_list('proficiency', flat=True)
+        self.assertEqual(len(proficiency), 25)
+        # The first two skills are taught by both courses, both now completed
+        self.assertEqual(set(proficiency), {Decimal('100.00')})
+
+    def test_enrolling_creates_the_missing_rows_in_one_insert(self):
+        course = self.make_course('Many', self.skills)
+        UserSkill.objects.create(
+            tenant=self.tenant, user=self.user, skill=self.skills[0], proficiency=Decimal('40.00'), courses_completed=1
+        )
+        enrollment = Enrollment.objects.create(tenant=self.tenant, user=self.user, course=course)
+        self.assertEqual(UserSkill.objects.filter(user=self.user).count(), 25)
+        self.assertEqual(UserSkill.objects.get(user=self.user, skill=self.skills[0]).proficiency, Decimal('40.00'))
 
-# Create your tests here.
+        UserSkill.objects.filter(user=self.user, skill__in=self.skills[1:]).delete()
+        with CaptureQueriesContext(connection) as queries:
+            created = create_missing_user_skills(enrollment)
+        # Course skills, existing rows, one bulk insert
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(sorted(row.skill_id for row in created), [skill.id for skill in self.skills[1:]])
+        self.assertEqual(create_missing_user_skills(enrollment), [])
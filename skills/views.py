@@ -3,9 +3,10 @@ from rest_framework.response import Response
 from .models import Skill, CourseSkill, UserSkill
 from .serializers import SkillSerializer, CourseSkillSerializer, UserSkillSerializer
 from accounts.permissions import RolePermission
+from tenants.mixins import TenantSlugLookupMixin
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(TenantSlugLookupMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Skills.
     - TenantAdmin: Full CRUD
@@ -20,7 +21,7 @@ class SkillViewSet(viewsets.ModelViewSet):
         return [RolePermission()]
 
     def get_queryset(self):
-        return Skill.objects.for_current_user()
+        return Skill.objects.for_current_user().select_related('tenant')
 
 
 class CourseSkillViewSet(viewsets.ModelViewSet):
@@ -38,7 +39,7 @@ class CourseSkillViewSet(viewsets.ModelViewSet):
         return [RolePermission()]
 
     def get_queryset(self):
-        return CourseSkill.objects.for_current_user()
+        return CourseSkill.objects.for_current_user().select_related('tenant', 'course', 'skill')
 
 
 class UserSkillViewSet(viewsets.ReadOnlyModelViewSet):
@@ -56,10 +57,11 @@ class UserSkillViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = UserSkill.objects.select_related('user', 'skill')
         if user.role_name == 'SUPER_ADMIN':
-            return UserSkill.objects.all()
+            return queryset
         if user.role_name == 'TENANT_ADMIN' and user.tenant:
-            return UserSkill.objects.filter(tenant=user.tenant)
+            return queryset.filter(tenant=user.tenant)
         if user.role_name == 'TENANT_USER' and user.tenant:
-            return UserSkill.objects.filter(user=user, tenant=user.tenant)
+            return queryset.filter(user=user, tenant=user.tenant)
         return UserSkill.objects.none()
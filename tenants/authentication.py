@@ -1,14 +1,160 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from .managers import set_current_user
+from .models import Tenant
 from django.contrib.auth.models import AnonymousUser
+from accounts.models import PermissionContext, Role
+from accounts.permission_cache import get_role_permissions, get_role_version, get_user_auth_version
 from accounts.signals import set_current_request
+
+
+# Claims stamped on every token so reads can authenticate without the DB
+TENANT_CLAIMS = (
+    'email', 'username', 'is_staff', 'is_superuser',
+    'tenant_id', 'tenant_slug', 'tenant_name',
+    'role_id', 'role_name', 'perm_version', 'auth_version',
+)
+
+
+def add_tenant_claims(token, user):
+    """Stamp tenant, role, permission-version and auth-version claims onto `token`."""
+    token['email'] = user.email
+    token['username'] = user.username
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['tenant_id'] = user.tenant_id
+    token['tenant_slug'] = user.tenant.slug if user.tenant_id else None
+    token['tenant_name'] = user.tenant.name if user.tenant_id else None
+    token['role_id'] = user.role_id
+    token['role_name'] = user.role_name
+    token['perm_version'] = get_role_version(user.role_id)[0] if user.role_id else None
+    token['auth_version'] = get_user_auth_version(user.pk)
+    return token
+
+
+def _from_claims(model, values):
+    """
+    An instance "loaded" with only `values` (attname -> value); every other
+    field is deferred and fetched from the DB on first access.
+    """
+    fields = [field for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(
+        'default',
+        [field.attname for field in fields],
+        # Claims are JSON: the user id arrives as a string
+        [field.to_python(values[field.attname]) for field in fields],
+    )
+
+
 class TenantAwareJWTAuthentication(JWTAuthentication):
 
 
     def authenticate(self, request):
+        # Reads may trust token claims (opt-in); writes always load the user
+        self.allow_stateless = (
+            getattr(settings, 'STATELESS_JWT_AUTH', False) and
+            request.method in SAFE_METHODS
+        )
         result = super().authenticate(request)
         set_current_request(request)
         if result is not None:
             user, token = result
+            # Resolve role + permissions once; permission classes, managers,
+            # serializers and signals all read this for the rest of the request
+            if not user.is_stateless:
+                user.resolve_permission_context()
             set_current_user(user)
+        else:
+            set_current_user(None)
         return result
+
+    def get_user(self, validated_token):
+        """
+        Same checks as JWTAuthentication.get_user, but loads role and tenant
+        in the same query so role_name / tenant access never hit the DB again.
+        """
+        if getattr(self, 'allow_stateless', False):
+            user = self.get_stateless_user(validated_token)
+            if user is not None:
+                return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = self.user_model.objects.select_related('role', 'tenant').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+    def get_stateless_user(self, validated_token):
+        """
+        Build a read-only User from token claims, or return None when the
+        token predates the claims, the user has no role, the permission
+        version is stale (role edited) or the user's auth version is
+        (user re-assigned, deactivated or deleted) so the caller uses the DB.
+
+        User, tenant and role are built from the claimed fields only; every
+        other field is deferred, so reading one (tenant.is_active,
+        user.first_name, ...) loads the real value from the DB instead of
+        returning a model default.
+        """
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return None
+        if any(claim not in validated_token for claim in TENANT_CLAIMS):
+            return None
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return None
+        # Role-less users have no permissions to build a context from
+        if validated_token['role_id'] is None:
+            return None
+        if get_user_auth_version(validated_token[api_settings.USER_ID_CLAIM]) != validated_token['auth_version']:
+            return None
+
+        role = _from_claims(Role, {'id': validated_token['role_id'], 'name': validated_token['role_name']})
+        version, codenames, lookups = get_role_permissions(role)
+        if version != validated_token['perm_version']:
+            return None
+
+        tenant = None
+        if validated_token['tenant_id'] is not None:
+            tenant = _from_claims(Tenant, {
+                'id': validated_token['tenant_id'],
+                'slug': validated_token['tenant_slug'],
+                'name': validated_token['tenant_name'],
+            })
+
+        claimed = {
+            api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM],
+            'email': validated_token['email'],
+            'username': validated_token['username'],
+            'is_active': True,
+            'is_staff': validated_token['is_staff'],
+            'is_superuser': validated_token['is_superuser'],
+            'tenant_id': validated_token['tenant_id'],
+            'role_id': role.id,
+        }
+        user = _from_claims(get_user_model(), claimed)
+        user.tenant = tenant
+        user.role = role
+        user.is_stateless = True
+        user._permission_context = PermissionContext(role.name, codenames, lookups)
+        return user
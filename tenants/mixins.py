@@ -0,0 +1,32 @@
+from django.http import Http404
+from rest_framework.exceptions import ValidationError
+
+
+class TenantSlugLookupMixin:
+    """
+    Slugs are unique within a tenant only, so a SuperAdmin, whose querysets
+    span every tenant, can match several rows. ?tenant=<tenant slug> narrows
+    the lookup; a slug still shared by several tenants is a 400, not a
+    MultipleObjectsReturned.
+    """
+    tenant_query_param = 'tenant'
+
+    def get_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        tenant = self.request.query_params.get(self.tenant_query_param)
+        if tenant:
+            queryset = queryset.filter(tenant__slug=tenant)
+        matches = list(queryset[:2])
+        if not matches:
+            raise Http404
+        if len(matches) > 1:
+            raise ValidationError({
+                self.tenant_query_param: 'More than one tenant uses this slug; pass ?tenant=<tenant slug>.'
+            })
+
+        obj = matches[0]
+        self.check_object_permissions(self.request, obj)
+        return obj
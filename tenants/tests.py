@@ -1,3 +1,96 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts import permission_cache
+from accounts.models import Role, User
+from accounts.serializers import TenantTokenObtainPairSerializer
+from benchmarks.fixtures import seed_role_permissions
+from .authentication import TenantAwareJWTAuthentication
+from .models import Tenant
+
+
+@override_settings(STATELESS_JWT_AUTH=True)
+class StatelessAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_role_permissions()
+        cls.tenant = Tenant.objects.create(name='Acme')
+        cls.user = User.objects.create_user(
+            'learner@acme.test', 'learner', 'pass', first_name='Lee',
+            tenant=cls.tenant, role=Role.objects.get(name='TENANT_USER'), is_active=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        permission_cache.local_cache.clear()
+
+    def token(self, user=None):
+        return TenantTokenObtainPairSerializer.get_token(user or self.user).access_token
+
+    def stateless_user(self, token=None):
+        return TenantAwareJWTAuthentication().get_stateless_user(token or self.token())
+
+    def test_claims_build_the_user_without_queries(self):
+        token = self.token()
+        # The role's codenames come from the permission cache once warm
+        self.stateless_user(token)
+        with CaptureQueriesContext(connection) as queries:
+            user = self.stateless_user(token)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual((user.pk, user.username, user.tenant_id), (self.user.pk, 'learner', self.tenant.pk))
+        self.assertEqual(user.role_name, 'TENANT_USER')
+        self.assertEqual(user.tenant.slug, 'acme')
+        self.assertTrue(user.has_role_perm('view_course'))
+
+    def test_unclaimed_fields_are_loaded_not_defaulted(self):
+        user = self.stateless_user()
+        Tenant.objects.filter(pk=self.tenant.pk).update(is_active=False)
+        self.assertIs(user.tenant.is_active, False)
+        self.assertEqual(user.first_name, 'Lee')
+
+    def test_role_less_users_use_the_database(self):
+        User.objects.filter(pk=self.user.pk).update(role=None)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.stateless_user(self.token(self.user)))
+
+    def test_role_changes_invalidate_outstanding_tokens(self):
+        token = self.token()
+        self.user.role = Role.objects.get(name='TENANT_ADMIN')
+        self.user.save()
+        self.assertIsNone(self.stateless_user(token))
+
+    def test_deactivation_invalidates_outstanding_tokens(self):
+        token = self.token()
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.stateless_user(token))
+
+    def test_queryset_updates_invalidate_outstanding_tokens(self):
+        token = self.token()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(self.stateless_user(token))
+
+    def test_revocation_is_per_user(self):
+        other = User.objects.create_user(
+            'other@acme.test', 'other', 'pass',
+            tenant=self.tenant, role=Role.objects.get(name='TENANT_USER'), is_active=True,
+        )
+        token = self.token()
+        other.is_active = False
+        other.save()
+        self.assertIsNotNone(self.stateless_user(token))
+
+    def test_only_reads_are_stateless(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token()}')
+        # Raw SQL bypasses every revocation hook
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {User._meta.db_table} SET is_active = false WHERE id = %s', [self.user.pk])
+        # The token is still trusted for reads until it expires or its
+        # version moves; writes always check the database
+        self.assertEqual(client.get('/api/courses/').status_code, 200)
+        self.assertEqual(client.post('/api/courses/', {}).status_code, 401)